@@ -0,0 +1,30 @@
+"""add_data_updated_at_to_users
+
+Revision ID: 3e8d2a6c9b17
+Revises: 7c3e9b1f2a4d
+Create Date: 2026-10-19 13:20:41.502117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8d2a6c9b17'
+down_revision: Union[str, Sequence[str], None] = '7c3e9b1f2a4d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  """Upgrade schema."""
+  op.add_column('users', sa.Column('data_updated_at', sa.DateTime(timezone=True), nullable=True))
+  op.create_index(op.f('ix_users_data_updated_at'), 'users', ['data_updated_at'], unique=False)
+
+
+def downgrade() -> None:
+  """Downgrade schema."""
+  op.drop_index(op.f('ix_users_data_updated_at'), table_name='users')
+  op.drop_column('users', 'data_updated_at')
@@ -0,0 +1,58 @@
+"""add_date_dim
+
+Revision ID: 5b9d3f7e1c28
+Revises: c2b8e4f6a915
+Create Date: 2026-10-19 18:02:47.531904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.lib.calendar import DATE_DIM_FIRST, DATE_DIM_LAST, date_dim_rows
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9d3f7e1c28'
+down_revision: Union[str, Sequence[str], None] = 'c2b8e4f6a915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  """Upgrade schema."""
+  date_dim = op.create_table(
+      'date_dim',
+      sa.Column('day', sa.Date(), nullable=False),
+      sa.Column('week_start', sa.Date(), nullable=False),
+      sa.Column('month_start', sa.Date(), nullable=False),
+      sa.Column('month_end', sa.Date(), nullable=False),
+      sa.Column('weekday', sa.SmallInteger(), nullable=False),
+      sa.Column('ordinal', sa.Integer(), nullable=False),
+      sa.PrimaryKeyConstraint('day')
+  )
+  op.create_index(op.f('ix_date_dim_week_start'), 'date_dim', ['week_start'], unique=False)
+  op.create_index(op.f('ix_date_dim_month_start'), 'date_dim', ['month_start'], unique=False)
+
+  if op.get_bind().dialect.name == 'postgresql':
+    # Same values as app.lib.calendar.day_info, generated server-side
+    op.execute(sa.text("""
+        INSERT INTO date_dim (day, week_start, month_start, month_end, weekday, ordinal)
+        SELECT d::date,
+               date_trunc('week', d)::date,
+               date_trunc('month', d)::date,
+               (date_trunc('month', d) + interval '1 month - 1 day')::date,
+               extract(isodow FROM d)::int - 1,
+               (d::date - date '0001-01-01') + 1
+        FROM generate_series(CAST(:first AS date), CAST(:last AS date), interval '1 day') AS d
+    """).bindparams(first=DATE_DIM_FIRST, last=DATE_DIM_LAST))
+  else:
+    op.bulk_insert(date_dim, list(date_dim_rows()))
+
+
+def downgrade() -> None:
+  """Downgrade schema."""
+  op.drop_index(op.f('ix_date_dim_month_start'), table_name='date_dim')
+  op.drop_index(op.f('ix_date_dim_week_start'), table_name='date_dim')
+  op.drop_table('date_dim')
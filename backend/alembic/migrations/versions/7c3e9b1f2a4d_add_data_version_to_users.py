@@ -0,0 +1,28 @@
+"""add_data_version_to_users
+
+Revision ID: 7c3e9b1f2a4d
+Revises: 1a885a71679c
+Create Date: 2026-10-19 09:12:04.318220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9b1f2a4d'
+down_revision: Union[str, Sequence[str], None] = '1a885a71679c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  """Upgrade schema."""
+  op.add_column('users', sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+  """Downgrade schema."""
+  op.drop_column('users', 'data_version')
@@ -0,0 +1,90 @@
+"""add_habit_target_history
+
+Revision ID: 8e1a6c4d2f07
+Revises: 5b9d3f7e1c28
+Create Date: 2026-10-19 19:14:36.902118
+
+"""
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1a6c4d2f07'
+down_revision: Union[str, Sequence[str], None] = '5b9d3f7e1c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# First day of date_dim; the oldest range of a habit starts here
+HISTORY_START = date(1970, 1, 1)
+
+habits = sa.table('habits', sa.column('id', sa.UUID()), sa.column('target', sa.Integer()))
+completions = sa.table(
+    'habit_completions',
+    sa.column('habit_id', sa.UUID()),
+    sa.column('date', sa.Date()),
+    sa.column('target_at_time', sa.Integer()),
+)
+
+
+def _ranges(completion_rows, current_target: int) -> list[dict]:
+  """Ranges of consecutive completion records with the same stored target"""
+  islands = []
+  last_date = None
+  for row in completion_rows:
+    if not islands or islands[-1][1] != row.target_at_time:
+      islands.append((row.date, row.target_at_time))
+    last_date = row.date
+  if islands[-1][1] != current_target:
+    # Changed after the last completion record: the current target starts the day after
+    islands.append((last_date + timedelta(days=1), current_target))
+  if len(islands) == 1:
+    return []
+
+  return [
+      {
+          'valid_from': HISTORY_START if i == 0 else start,
+          'valid_to': islands[i + 1][0] - timedelta(days=1) if i + 1 < len(islands) else None,
+          'target': target,
+      }
+      for i, (start, target) in enumerate(islands)
+  ]
+
+
+def upgrade() -> None:
+  """Upgrade schema."""
+  history = op.create_table(
+      'habit_target_history',
+      sa.Column('habit_id', sa.UUID(), nullable=False),
+      sa.Column('valid_from', sa.Date(), nullable=False),
+      sa.Column('valid_to', sa.Date(), nullable=True),
+      sa.Column('target', sa.Integer(), nullable=False),
+      sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('habit_id', 'valid_from')
+  )
+
+  # Derive history from the targets stored on completion records; habits whose
+  # records all carry the current target need none
+  bind = op.get_bind()
+  targets = dict(bind.execute(sa.select(habits.c.id, habits.c.target)).all())
+  rows = bind.execute(
+      sa.select(completions.c.habit_id, completions.c.date, completions.c.target_at_time)
+      .order_by(completions.c.habit_id, completions.c.date))
+  values = []
+  for habit_id, habit_rows in groupby(rows, key=lambda row: row.habit_id):
+    if habit_id in targets:
+      values.extend({'habit_id': habit_id, **row} for row in _ranges(habit_rows, targets[habit_id]))
+    if len(values) >= 1000:
+      op.bulk_insert(history, values)
+      values = []
+  if values:
+    op.bulk_insert(history, values)
+
+
+def downgrade() -> None:
+  """Downgrade schema."""
+  op.drop_table('habit_target_history')
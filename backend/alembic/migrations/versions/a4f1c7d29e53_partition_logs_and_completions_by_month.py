@@ -0,0 +1,95 @@
+"""partition_logs_and_completions_by_month
+
+Rebuilds habit_logs and habit_completions as tables range-partitioned by
+month on date, copying their rows across. The primary keys become
+(id, date) because every unique key of a partitioned table must contain
+the partition key. PostgreSQL only; other databases keep plain tables.
+
+Revision ID: a4f1c7d29e53
+Revises: 3e8d2a6c9b17
+Create Date: 2026-10-19 15:02:17.336481
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f1c7d29e53'
+down_revision: Union[str, Sequence[str], None] = '3e8d2a6c9b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Future months created up front; the app and manage_partitions.py keep it going
+MONTHS_AHEAD = 3
+
+# Constraints and indexes recreated on the rebuilt tables
+CONSTRAINTS = {
+    'habit_logs': [
+        'ALTER TABLE habit_logs ADD CONSTRAINT habit_logs_pkey PRIMARY KEY ({pk})',
+        'ALTER TABLE habit_logs ADD CONSTRAINT uq_habit_date UNIQUE (habit_id, date)',
+        'ALTER TABLE habit_logs ADD CONSTRAINT habit_logs_habit_id_fkey '
+        'FOREIGN KEY (habit_id) REFERENCES habits (id) ON DELETE CASCADE',
+        'CREATE INDEX ix_habit_logs_habit_id ON habit_logs (habit_id)',
+    ],
+    'habit_completions': [
+        'ALTER TABLE habit_completions ADD CONSTRAINT habit_completions_pkey PRIMARY KEY ({pk})',
+        'ALTER TABLE habit_completions ADD CONSTRAINT uq_habit_completions_habit_date UNIQUE (habit_id, date)',
+        'ALTER TABLE habit_completions ADD CONSTRAINT habit_completions_habit_id_fkey '
+        'FOREIGN KEY (habit_id) REFERENCES habits (id) ON DELETE CASCADE',
+        'CREATE INDEX idx_habit_completions_habit_date ON habit_completions (habit_id, date)',
+        'CREATE INDEX idx_habit_completions_date ON habit_completions (date)',
+        'CREATE INDEX idx_habit_completions_completed ON habit_completions (is_completed)',
+    ],
+}
+
+
+def _add_months(month: date, months: int) -> date:
+  index = month.year * 12 + month.month - 1 + months
+  return date(index // 12, index % 12 + 1, 1)
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+  """Copy `table` into a new (un)partitioned table of the same name"""
+  bind = op.get_bind()
+  old = f'{table}_old'
+  op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+  op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)'
+             + (' PARTITION BY RANGE (date)' if partitioned else ''))
+
+  if partitioned:
+    this_month = date.today().replace(day=1)
+    first = bind.execute(sa.text(f'SELECT min(date) FROM {old}')).scalar() or this_month
+    month = min(first.replace(day=1), this_month)
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+      op.execute(f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                 f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')")
+      month = _add_months(month, 1)
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+  # Loaded before the keys and indexes exist, which is much faster
+  op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+  # Dropping the old table frees its constraint and index names
+  op.execute(f'DROP TABLE {old}')
+  for statement in CONSTRAINTS[table]:
+    op.execute(statement.format(pk='id, date' if partitioned else 'id'))
+
+
+def upgrade() -> None:
+  """Upgrade schema."""
+  if op.get_bind().dialect.name != 'postgresql':
+    return
+  for table in CONSTRAINTS:
+    _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+  """Downgrade schema."""
+  if op.get_bind().dialect.name != 'postgresql':
+    return
+  # Partitions are dropped along with the partitioned table
+  for table in CONSTRAINTS:
+    _rebuild(table, partitioned=False)
@@ -0,0 +1,54 @@
+"""add_log_months_and_logs_archive
+
+Revision ID: c2b8e4f6a915
+Revises: a4f1c7d29e53
+Create Date: 2026-10-19 16:41:08.215730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2b8e4f6a915'
+down_revision: Union[str, Sequence[str], None] = 'a4f1c7d29e53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  """Upgrade schema."""
+  op.create_table(
+      'habit_log_months',
+      sa.Column('habit_id', sa.UUID(), nullable=False),
+      sa.Column('month', sa.Date(), nullable=False),
+      sa.Column('total_quantity', sa.Integer(), nullable=False),
+      sa.Column('days_logged', sa.Integer(), nullable=False),
+      sa.Column('day_quantities', sa.JSON(), nullable=False),
+      sa.Column('completed_days', sa.Integer(), nullable=False),
+      sa.Column('compacted_at', sa.DateTime(timezone=True), nullable=False),
+      sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('habit_id', 'month')
+  )
+
+  op.create_table(
+      'habit_logs_archive',
+      sa.Column('id', sa.UUID(), nullable=False),
+      sa.Column('habit_id', sa.UUID(), nullable=False),
+      sa.Column('date', sa.Date(), nullable=False),
+      sa.Column('quantity', sa.Integer(), nullable=False),
+      sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+      sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+      sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('id')
+  )
+  op.create_index(op.f('ix_habit_logs_archive_habit_id'), 'habit_logs_archive', ['habit_id'], unique=False)
+
+
+def downgrade() -> None:
+  """Downgrade schema."""
+  op.drop_index(op.f('ix_habit_logs_archive_habit_id'), table_name='habit_logs_archive')
+  op.drop_table('habit_logs_archive')
+  op.drop_table('habit_log_months')
@@ -0,0 +1,30 @@
+"""add_habit_deleted_at
+
+Revision ID: d7f2b9a3e461
+Revises: 8e1a6c4d2f07
+Create Date: 2026-10-19 20:05:12.448193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f2b9a3e461'
+down_revision: Union[str, Sequence[str], None] = '8e1a6c4d2f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  """Upgrade schema."""
+  op.add_column('habits', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+  op.create_index(op.f('ix_habits_deleted_at'), 'habits', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+  """Downgrade schema."""
+  op.drop_index(op.f('ix_habits_deleted_at'), table_name='habits')
+  op.drop_column('habits', 'deleted_at')
@@ -1,20 +1,94 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
   env: str = "dev"
   port: int = 8000
   database_url: str | None = None
+  # Serve the hot read/log endpoints through an AsyncSession (asyncpg/aiosqlite)
+  async_db_enabled: bool = False
+  # Defaults to database_url with its driver swapped for the async one
+  async_database_url: str | None = None
+
+  # Connection pool, per worker process (ignored for SQLite)
+  db_pool_size: int = 5
+  db_max_overflow: int = 10
+  db_pool_timeout: float = 30.0
+  # Seconds before a connection is replaced; -1 disables recycling
+  db_pool_recycle: int = 1800
+  # Ping on every checkout; with a short recycle this can usually be disabled
+  db_pool_pre_ping: bool = True
+  # Server-side statement timeout (Postgres only), disabled when unset
+  db_statement_timeout_ms: int | None = None
+  # Future monthly partitions of habit_logs/habit_completions kept created (Postgres only)
+  partition_months_ahead: int = 3
+  # Create missing partitions on startup; manage_partitions.py does the same from cron
+  partition_maintenance_on_startup: bool = True
+  # Logs of whole months older than this are rolled up into habit_log_months by compact_logs.py
+  log_compaction_horizon_days: int = 730
+  # Deleted habits with more logs than this are soft-deleted and purged in the background
+  habit_purge_threshold: int = 5000
+  # Child rows deleted per transaction while purging a habit
+  habit_purge_batch_size: int = 5000
+
+  # Per-route latency and SQL counters on GET /metrics and pool usage on GET /metrics/pool.
+  # Unauthenticated, so only enable where the port is not publicly reachable
+  metrics_enabled: bool = False
+  # Adds app/db timings to every response (needs metrics_enabled); exposes them to any client
+  server_timing_enabled: bool = False
+
+  # Read replica for idempotent endpoints; reads use the primary when unset
+  database_replica_url: str | None = None
+  # Seconds a client stays pinned to the primary after a write
+  replica_pin_seconds: int = 10
   jwt_secret: str | None = None
   access_token_expire_minutes: int = 7 * 24 * 60
+
+  # bcrypt cost factor; existing hashes are upgraded on the next login
+  bcrypt_rounds: int = 12
+  # Processes for bcrypt work, 0 hashes inline in the request thread
+  password_hash_workers: int = 2
+  # Hashing calls allowed in flight before requests get a 503
+  password_hash_max_pending: int = 64
   redis_url: str = "redis://localhost:6379/0"
   rate_limit_enabled: bool = True
+  # "memory" counts per process; "redis" shares counters across workers
+  rate_limit_backend: Literal["memory", "redis"] = "memory"
+  rate_limit_auth_per_minute: int = 10
+  rate_limit_log_writes_per_minute: int = 120
+  # Keys tracked by the in-process backend before the least recent are evicted
+  rate_limit_max_keys: int = 100_000
+  # Only enable behind a proxy that sets X-Forwarded-For
+  rate_limit_trust_forwarded_for: bool = False
+
+  # Authenticated-user cache used by verify_token
+  user_cache_enabled: bool = True
+  user_cache_ttl_seconds: float = 30.0
+  user_cache_max_entries: int = 10000
+  # Share cached users and their invalidations across workers through Redis
+  user_cache_redis_enabled: bool = False
+  user_cache_redis_ttl_seconds: int = 300
+
+  # Serialized stats/badges responses, keyed by the per-user data version
+  response_cache_enabled: bool = True
+  response_cache_ttl_seconds: float = 300.0
+  response_cache_max_entries: int = 5000
+  # Share cached responses across workers through Redis
+  response_cache_redis_enabled: bool = False
+  # How long other workers wait for the one computing a cold entry
+  response_cache_lock_timeout_seconds: float = 5.0
 
   # oauth stubs
   google_client_id: str | None = None
   google_client_secret: str | None = None
   google_redirect_uri: str | None = None
+  # Shared HTTP session and certificate cache for Google sign-in
+  google_certs_url: str = "https://www.googleapis.com/oauth2/v1/certs"
+  google_http_pool_size: int = 10
+  google_http_timeout_seconds: float = 5.0
+  # Used when the certificate response carries no max-age
+  google_certs_default_ttl_seconds: int = 3600
 
   def __init__(self, **kwargs):
     super().__init__(**kwargs)
@@ -0,0 +1,32 @@
+"""
+Fast response path: rows go straight to JSON bytes through cached TypeAdapters.
+
+Returning models lets FastAPI validate them against ``response_model`` and
+then serialize them. The list endpoints instead select plain columns, shape
+them as TypedDict rows and dump those with a prebuilt serializer, skipping
+model construction and the second validation. ``response_model`` stays on
+the route for the OpenAPI schema.
+"""
+
+from functools import cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@cache
+def type_adapter(tp: Any) -> TypeAdapter:
+  return TypeAdapter(tp)
+
+
+def dump_json(tp: Any, value: Any) -> bytes:
+  return type_adapter(tp).dump_json(value)
+
+
+def json_response(tp: Any, value: Any, response: Response | None = None) -> Response:
+  """JSON response from already-shaped data, keeping headers set by dependencies (e.g. ETag)"""
+  result = Response(content=dump_json(tp, value), media_type="application/json")
+  if response is not None:
+    result.headers.update(response.headers)
+  return result
@@ -0,0 +1,149 @@
+"""
+Google sign-in: pooled HTTP session, cached signing certificates and ID-token checks.
+
+requests and google.auth are imported on first use so that booting a worker
+does not pay for them until someone signs in with Google.
+"""
+
+import base64
+import json
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+  import requests
+
+
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+
+class GoogleRequestError(Exception):
+  """A call to Google failed at the HTTP level"""
+
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+@lru_cache
+def get_http_session() -> "requests.Session":
+  """Process-wide session so Google calls reuse pooled keep-alive connections."""
+  import requests
+  from requests.adapters import HTTPAdapter
+  from urllib3.util.retry import Retry
+
+  session = requests.Session()
+  adapter = HTTPAdapter(
+      pool_connections=2,
+      pool_maxsize=settings.google_http_pool_size,
+      max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",)),
+  )
+  session.mount("https://", adapter)
+  return session
+
+
+def _cache_ttl(response: "requests.Response", default: float) -> float:
+  cache_control = response.headers.get("Cache-Control", "")
+  if "no-store" in cache_control or "no-cache" in cache_control:
+    return 0.0
+  match = _MAX_AGE.search(cache_control)
+  if match:
+    return float(match.group(1))
+  return default
+
+
+class GoogleCertsCache:
+  """
+  Google's token-signing certificates keyed by ``kid``.
+
+  Entries live for the response's Cache-Control max-age. Concurrent misses
+  share one fetch, and a token signed by an unknown key forces a refresh so
+  key rotation is picked up before the old certificates expire.
+  """
+
+  min_refresh_seconds = 30.0
+
+  def __init__(self, url: str, session: "requests.Session | None" = None, default_ttl: float = 3600.0):
+    self.url = url
+    self.default_ttl = default_ttl
+    self._session = session
+    self._certs: dict[str, str] = {}
+    self._expires_at = 0.0
+    self._fetched_at = 0.0
+    self._lock = threading.Lock()
+
+  @property
+  def session(self) -> "requests.Session":
+    return self._session or get_http_session()
+
+  def get(self, kid: str | None = None) -> dict[str, str]:
+    if time.monotonic() < self._expires_at and (kid is None or kid in self._certs):
+      return self._certs
+    with self._lock:
+      # Re-check: another thread may have refreshed while we waited, and
+      # unknown kids only force a refetch once per min_refresh_seconds
+      now = time.monotonic()
+      if now < self._expires_at and (kid is None or kid in self._certs or now - self._fetched_at < self.min_refresh_seconds):
+        return self._certs
+      response = _request(self.session.get, self.url, timeout=settings.google_http_timeout_seconds)
+      self._certs = response.json()
+      self._fetched_at = time.monotonic()
+      self._expires_at = self._fetched_at + _cache_ttl(response, self.default_ttl)
+      return self._certs
+
+  def clear(self):
+    with self._lock:
+      self._certs = {}
+      self._expires_at = 0.0
+      self._fetched_at = 0.0
+
+
+google_certs = GoogleCertsCache(settings.google_certs_url, default_ttl=settings.google_certs_default_ttl_seconds)
+
+
+def _token_kid(token: str) -> str | None:
+  header = token.split(".", 1)[0]
+  header += "=" * (-len(header) % 4)
+  try:
+    return json.loads(base64.urlsafe_b64decode(header)).get("kid")
+  except ValueError:
+    return None
+
+
+def verify_google_id_token(token: str, audience: str | None, clock_skew_seconds: int = 10) -> dict[str, Any]:
+  """Verify a Google ID token against the cached certificates; raises ValueError if invalid."""
+  from google.auth import jwt as google_jwt
+
+  certs = google_certs.get(_token_kid(token))
+  idinfo = google_jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=clock_skew_seconds)
+  if idinfo.get("iss") not in GOOGLE_ISSUERS:
+    raise ValueError(f"Wrong issuer {idinfo.get('iss')!r}")
+  return idinfo
+
+
+def exchange_code(code: str, redirect_uri: str | None) -> dict[str, Any]:
+  """Trade an authorization code for Google's tokens."""
+  response = _request(get_http_session().post, GOOGLE_TOKEN_URL, data={
+      "client_id": settings.google_client_id,
+      "client_secret": settings.google_client_secret,
+      "code": code,
+      "grant_type": "authorization_code",
+      "redirect_uri": redirect_uri,
+  }, timeout=settings.google_http_timeout_seconds)
+  return response.json()
+
+
+def _request(method, url: str, **kwargs) -> "requests.Response":
+  import requests
+
+  try:
+    response = method(url, **kwargs)
+    response.raise_for_status()
+  except requests.exceptions.RequestException as e:
+    raise GoogleRequestError(str(e)) from e
+  return response
@@ -0,0 +1,126 @@
+"""
+In-process request metrics rendered in the Prometheus text format.
+
+Each gunicorn worker keeps its own registry, so Prometheus should scrape the
+workers individually (or sum the series) rather than expecting totals from
+one of them.
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from app.db.pool_metrics import pool_snapshot
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+@dataclass
+class Histogram:
+  buckets: tuple
+  counts: list[int] = field(default_factory=list)
+  total: float = 0.0
+  count: int = 0
+
+  def __post_init__(self):
+    self.counts = [0] * len(self.buckets)
+
+  def observe(self, value: float):
+    index = bisect.bisect_left(self.buckets, value)
+    if index < len(self.counts):
+      self.counts[index] += 1
+    self.total += value
+    self.count += 1
+
+  def lines(self, name: str, labels: str) -> list[str]:
+    out = []
+    cumulative = 0
+    for bound, n in zip(self.buckets, self.counts, strict=True):
+      cumulative += n
+      out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+    out.append(f"{name}_sum{{{labels}}} {self.total:.6f}")
+    out.append(f"{name}_count{{{labels}}} {self.count}")
+    return out
+
+
+class RequestMetrics:
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._latency: dict[tuple[str, str], Histogram] = {}
+    self._queries: dict[tuple[str, str], Histogram] = {}
+    self._db_seconds: dict[tuple[str, str], float] = defaultdict(float)
+    self._responses: dict[tuple[str, str, int], int] = defaultdict(int)
+
+  def observe(self, method: str, route: str, status: int, seconds: float, queries: int, db_seconds: float):
+    key = (method, route)
+    with self._lock:
+      self._latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+      self._queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(queries)
+      self._db_seconds[key] += db_seconds
+      self._responses[(method, route, status)] += 1
+
+  def clear(self):
+    with self._lock:
+      self._latency.clear()
+      self._queries.clear()
+      self._db_seconds.clear()
+      self._responses.clear()
+
+  def render(self) -> str:
+    lines = [
+        "# HELP http_requests_total Responses by route template and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    with self._lock:
+      for (method, route, status), n in sorted(self._responses.items()):
+        lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+
+      lines += [
+          "# HELP http_request_duration_seconds Request latency by route template.",
+          "# TYPE http_request_duration_seconds histogram",
+      ]
+      for (method, route), histogram in sorted(self._latency.items()):
+        lines += histogram.lines("http_request_duration_seconds", f'method="{method}",route="{route}"')
+
+      lines += [
+          "# HELP http_request_db_queries SQL statements executed per request.",
+          "# TYPE http_request_db_queries histogram",
+      ]
+      for (method, route), histogram in sorted(self._queries.items()):
+        lines += histogram.lines("http_request_db_queries", f'method="{method}",route="{route}"')
+
+      lines += [
+          "# HELP http_request_db_seconds_total Time spent in SQL statements.",
+          "# TYPE http_request_db_seconds_total counter",
+      ]
+      for (method, route), seconds in sorted(self._db_seconds.items()):
+        lines.append(f'http_request_db_seconds_total{{method="{method}",route="{route}"}} {seconds:.6f}')
+
+    lines += _pool_lines()
+    return "\n".join(lines) + "\n"
+
+
+_POOL_GAUGES = ("checked_out", "checked_in", "overflow", "saturation", "size")
+_POOL_COUNTERS = ("checkouts", "connects", "disconnects", "invalidations", "checkout_timeouts",
+                  "checkout_wait_seconds_total")
+
+
+def _pool_lines() -> list[str]:
+  snapshot = pool_snapshot()
+  lines = []
+  for metric, kind in [(m, "gauge") for m in _POOL_GAUGES] + [(m, "counter") for m in _POOL_COUNTERS]:
+    samples = [(pool, data[metric]) for pool, data in sorted(snapshot.items()) if metric in data]
+    if not samples:
+      continue
+    suffix = "" if kind == "gauge" or metric.endswith("_total") else "_total"
+    name = f"db_pool_{metric}{suffix}"
+    lines.append(f"# TYPE {name} {kind}")
+    lines += [f'{name}{{pool="{pool}"}} {value}' for pool, value in samples]
+  return lines
+
+
+request_metrics = RequestMetrics()
@@ -1,9 +1,157 @@
-from fastapi_limiter import FastAPILimiter
-from redis import asyncio as aioredis
+"""
+Sliding-window rate limiting with an in-process backend and a shared Redis one.
+
+Each limit uses the sliding-window counter approximation: the current fixed
+window's count plus the previous window's count weighted by how much of it
+still overlaps the sliding window. That is two integers per key, so a check
+is a dict lookup in memory or one script call in Redis.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 
 from app.core.config import settings
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryRateLimiter:
+  """
+  Per-process counters, for single-node deployments and as the Redis fallback.
+
+  Checks run on the event loop and replace each entry with a fresh tuple in a
+  single store, so no lock is taken; at worst two racing threads lose a hit.
+  Beyond max_keys the least recently hit key is dropped, so a flood of new
+  keys cannot reset the windows of clients that are still active.
+  """
+
+  def __init__(self, max_keys: int = 100_000):
+    self.max_keys = max_keys
+    # key -> (window index, previous window count, current window count), in LRU order
+    self._windows: OrderedDict[str, tuple[int, int, int]] = OrderedDict()
+
+  async def hit(self, key: str, limit: int, window: int) -> float:
+    return self.hit_sync(key, limit, window)
+
+  def hit_sync(self, key: str, limit: int, window: int) -> float:
+    """Count a hit; returns 0 when allowed, else seconds until retrying makes sense"""
+    now = time.time()
+    index = int(now // window)
+    offset = now - index * window
+    entry = self._windows.get(key)
+    if entry is None or entry[0] < index - 1:
+      previous, current = 0, 0
+    elif entry[0] == index - 1:
+      previous, current = entry[2], 0
+    else:
+      previous, current = entry[1], entry[2]
+
+    blocked = previous * (1 - offset / window) + current >= limit
+    self._windows[key] = (index, previous, current if blocked else current + 1)
+    self._windows.move_to_end(key)
+    while len(self._windows) > self.max_keys:
+      self._windows.popitem(last=False)
+    return window - offset if blocked else 0.0
+
+  def clear(self):
+    self._windows.clear()
+
+
+# Checks and increments atomically so concurrent workers never overshoot
+_SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current >= tonumber(ARGV[2]) then
+  return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class RedisRateLimiter:
+  """Counters shared by every worker through Redis; falls back to memory on errors."""
+
+  def __init__(self, url: str, fallback: MemoryRateLimiter):
+    from redis import asyncio as aioredis
+
+    self._client = aioredis.from_url(url, socket_timeout=0.05)
+    self._script = self._client.register_script(_SLIDING_WINDOW_SCRIPT)
+    self.fallback = fallback
+
+  async def hit(self, key: str, limit: int, window: int) -> float:
+    from redis.exceptions import RedisError
+
+    now = time.time()
+    index = int(now // window)
+    offset = now - index * window
+    try:
+      allowed = await self._script(
+          keys=[f"rl:{key}:{index}", f"rl:{key}:{index - 1}"],
+          args=[1 - offset / window, limit, window * 2],
+      )
+    except RedisError as exc:
+      logger.warning("Redis rate limiter unavailable, using local counters: %s", exc)
+      return self.fallback.hit_sync(key, limit, window)
+    return 0.0 if allowed else window - offset
+
+  def clear(self):
+    self.fallback.clear()
+
+
+def install_rate_limiter(app: FastAPI) -> None:
+  """Attach the configured backend; the limit dependencies look it up per request"""
+  memory = MemoryRateLimiter(max_keys=settings.rate_limit_max_keys)
+  if settings.rate_limit_backend == "redis":
+    app.state.rate_limiter = RedisRateLimiter(settings.redis_url, fallback=memory)
+  else:
+    app.state.rate_limiter = memory
+
+
+def client_ip(request: Request) -> str:
+  if settings.rate_limit_trust_forwarded_for:
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+      return forwarded.split(",", 1)[0].strip()
+  return request.client.host if request.client else "unknown"
+
+
+async def _enforce(request: Request, key: str, limit: int, window: int):
+  limiter = getattr(request.app.state, "rate_limiter", None)
+  if limiter is None:
+    return
+  retry_after = await limiter.hit(key, limit, window)
+  if retry_after:
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def limit_per_ip(name: str, limit: Callable[[], int], window: int = 60):
+  """Dependency limiting an endpoint per client IP, e.g. for unauthenticated auth routes"""
+  async def dependency(request: Request):
+    if settings.rate_limit_enabled:
+      await _enforce(request, f"{name}:ip:{client_ip(request)}", limit(), window)
+  return dependency
+
+
+def limit_per_user(name: str, limit: Callable[[], int], window: int = 60):
+  """Dependency limiting an endpoint per authenticated user, checked before any DB work"""
+  async def dependency(request: Request, current_user: TokenClaims = Depends(verify_token_claims)):
+    if settings.rate_limit_enabled:
+      await _enforce(request, f"{name}:user:{current_user.id}", limit(), window)
+  return dependency
 
 
-async def init_rate_limiter() -> None:
-  redis = await aioredis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
-  await FastAPILimiter.init(redis)
+auth_rate_limit = limit_per_ip("auth", lambda: settings.rate_limit_auth_per_minute)
+log_write_rate_limit = limit_per_user("log-write", lambda: settings.rate_limit_log_writes_per_minute)
@@ -0,0 +1,221 @@
+"""
+Read-through cache of serialized stats/badges responses.
+
+Entries are keyed by the request's ETag, which already hashes the user, path,
+query, data version and (for day-dependent endpoints) today's date. A write
+bumps the data version, so every cached response for that user becomes
+unreachable at once in all workers; stale entries age out of the LRU/TTL.
+
+A per-process LRU sits in front of an optional Redis tier shared by the
+gunicorn workers. Concurrent misses for the same key are coalesced: within a
+process through a per-key lock (or future, for the async routes), across
+processes through a short-lived Redis lock that the losers poll on.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from pydantic_core import to_json
+
+from app.core.config import settings
+from app.core.fast_json import dump_json
+
+
+logger = logging.getLogger(__name__)
+
+_POLL_SECONDS = 0.05
+
+
+def serialize(result: Any, tp: Any = None) -> bytes:
+  # With a type the prebuilt serializer is used, otherwise models are dumped by inference
+  return dump_json(tp, result) if tp is not None else to_json(result)
+
+
+class ResponseCache:
+  def __init__(self, max_entries: int, ttl_seconds: float):
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+    self._lock = threading.Lock()
+    self._inflight: dict[str, threading.Lock] = {}
+    self._inflight_async: dict[str, asyncio.Future] = {}
+    self._redis = None
+    self._async_redis = None
+
+  def _redis_client(self):
+    if not settings.response_cache_redis_enabled:
+      return None
+    if self._redis is None:
+      import redis
+      self._redis = redis.Redis.from_url(settings.redis_url, socket_timeout=0.05)
+    return self._redis
+
+  def _async_redis_client(self):
+    if not settings.response_cache_redis_enabled:
+      return None
+    if self._async_redis is None:
+      from redis import asyncio as aioredis
+      self._async_redis = aioredis.from_url(settings.redis_url, socket_timeout=0.05)
+    return self._async_redis
+
+  def get_local(self, key: str) -> bytes | None:
+    now = time.monotonic()
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry and entry[0] > now:
+        self._entries.move_to_end(key)
+        return entry[1]
+      if entry:
+        del self._entries[key]
+    return None
+
+  def set_local(self, key: str, body: bytes) -> None:
+    with self._lock:
+      self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> bytes:
+    """Sync routes: one thread per key computes, the others wait for its result"""
+    body = self.get_local(key)
+    if body is not None:
+      return body
+    with self._lock:
+      key_lock = self._inflight.setdefault(key, threading.Lock())
+    try:
+      with key_lock:
+        body = self.get_local(key)
+        if body is None:
+          body = self._compute_shared(key, compute)
+          self.set_local(key, body)
+        return body
+    finally:
+      with self._lock:
+        if self._inflight.get(key) is key_lock:
+          del self._inflight[key]
+
+  def _compute_shared(self, key: str, compute: Callable[[], bytes]) -> bytes:
+    client = self._redis_client()
+    if client is None:
+      return compute()
+    try:
+      body = client.get(key)
+      if body is not None:
+        return body
+      if not client.set(f"{key}:lock", 1, nx=True, px=int(settings.response_cache_lock_timeout_seconds * 1000)):
+        # Another worker is computing; wait for its result, then give up and compute
+        deadline = time.monotonic() + settings.response_cache_lock_timeout_seconds
+        while time.monotonic() < deadline:
+          time.sleep(_POLL_SECONDS)
+          body = client.get(key)
+          if body is not None:
+            return body
+    except Exception as e:
+      logger.warning("Response cache Redis read failed: %s", e)
+      return compute()
+
+    body = compute()
+    try:
+      client.set(key, body, ex=int(self.ttl_seconds))
+      client.delete(f"{key}:lock")
+    except Exception as e:
+      logger.warning("Response cache Redis write failed: %s", e)
+    return body
+
+  async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+    """Async routes: concurrent misses await the first caller's future"""
+    body = self.get_local(key)
+    if body is not None:
+      return body
+    future = self._inflight_async.get(key)
+    if future is not None:
+      return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    self._inflight_async[key] = future
+    try:
+      body = await self._acompute_shared(key, compute)
+      self.set_local(key, body)
+      future.set_result(body)
+      return body
+    except BaseException as e:
+      future.set_exception(e)
+      # Waiters get the exception; mark it retrieved for the no-waiter case
+      future.exception()
+      raise
+    finally:
+      del self._inflight_async[key]
+
+  async def _acompute_shared(self, key: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+    client = self._async_redis_client()
+    if client is None:
+      return await compute()
+    try:
+      body = await client.get(key)
+      if body is not None:
+        return body
+      if not await client.set(f"{key}:lock", 1, nx=True, px=int(settings.response_cache_lock_timeout_seconds * 1000)):
+        deadline = time.monotonic() + settings.response_cache_lock_timeout_seconds
+        while time.monotonic() < deadline:
+          await asyncio.sleep(_POLL_SECONDS)
+          body = await client.get(key)
+          if body is not None:
+            return body
+    except Exception as e:
+      logger.warning("Response cache Redis read failed: %s", e)
+      return await compute()
+
+    body = await compute()
+    try:
+      await client.set(key, body, ex=int(self.ttl_seconds))
+      await client.delete(f"{key}:lock")
+    except Exception as e:
+      logger.warning("Response cache Redis write failed: %s", e)
+    return body
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+
+response_cache = ResponseCache(settings.response_cache_max_entries, settings.response_cache_ttl_seconds)
+
+
+def _cache_key(request: Request) -> str | None:
+  # Set by the ETag dependency; without it there is no version to key on
+  etag = getattr(request.state, "etag", None)
+  if not settings.response_cache_enabled or etag is None:
+    return None
+  return f"response_cache:{request.state.user_id}:{etag}"
+
+
+def _response(request: Request, body: bytes) -> Response:
+  return Response(content=body, media_type="application/json", headers={
+      "ETag": request.state.etag,
+      "Cache-Control": "private, no-cache",
+  })
+
+
+def cached_response(request: Request, compute: Callable[[], Any], tp: Any = None):
+  """Serve a sync endpoint's result from the cache, computing it at most once per key"""
+  key = _cache_key(request)
+  if key is None:
+    return compute()
+  return _response(request, response_cache.get_or_compute(key, lambda: serialize(compute(), tp)))
+
+
+async def cached_response_async(request: Request, compute: Callable[[], Awaitable[Any]], tp: Any = None):
+  """Async counterpart of cached_response"""
+  key = _cache_key(request)
+  if key is None:
+    return await compute()
+
+  async def compute_body() -> bytes:
+    return serialize(await compute(), tp)
+  return _response(request, await response_cache.aget_or_compute(key, compute_body))
@@ -1,21 +1,97 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone, UTC
-from typing import Any, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from fastapi import HTTPException, status
 
 from app.core.config import settings
 
+# passlib and jose are imported on first use to keep worker boot fast
+if TYPE_CHECKING:
+  from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache
+def _crypt_context(rounds: int) -> "CryptContext":
+  from passlib.context import CryptContext
+
+  # Hashes with other cost factors verify fine and are flagged for upgrade
+  return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+# Module-level functions so they can be pickled into the hashing processes
+def _hash(plain_password: str, rounds: int) -> str:
+  return _crypt_context(rounds).hash(plain_password)
+
+
+def _verify(plain_password: str, password_hash: str | None, rounds: int) -> bool:
+  return _crypt_context(rounds).verify(plain_password, password_hash)
+
+
+def _verify_and_update(plain_password: str, password_hash: str | None, rounds: int) -> tuple[bool, str | None]:
+  return _crypt_context(rounds).verify_and_update(plain_password, password_hash)
+
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_pending: threading.BoundedSemaphore | None = None
+
+
+def _get_executor() -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+  global _executor, _pending
+  with _executor_lock:
+    if _executor is None:
+      # spawn: forking a threaded server process is unsafe
+      _executor = ProcessPoolExecutor(
+          max_workers=settings.password_hash_workers,
+          mp_context=multiprocessing.get_context("spawn"))
+      _pending = threading.BoundedSemaphore(settings.password_hash_max_pending)
+      atexit.register(shutdown_password_hasher)
+    return _executor, _pending  # type: ignore[return-value]
+
+
+def shutdown_password_hasher() -> None:
+  global _executor, _pending
+  with _executor_lock:
+    if _executor is not None:
+      _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _pending = None
+
+
+def _run_bcrypt(fn: Callable, *args):
+  """Run a bcrypt call on the hashing pool, or inline when the pool is disabled"""
+  if settings.password_hash_workers <= 0:
+    return fn(*args)
+
+  executor, pending = _get_executor()
+  # Shed load instead of queueing unboundedly behind a login storm
+  if not pending.acquire(blocking=False):
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, retry shortly",
+        headers={"Retry-After": "1"})
+  try:
+    return executor.submit(fn, *args).result()
+  finally:
+    pending.release()
 
 
 def hash_password(plain_password: str) -> str:
-  return pwd_context.hash(plain_password)
+  return _run_bcrypt(_hash, plain_password, settings.bcrypt_rounds)
 
 
 def verify_password(plain_password: str, password_hash: str | None) -> bool:
-  return pwd_context.verify(plain_password, password_hash)
+  return _run_bcrypt(_verify, plain_password, password_hash, settings.bcrypt_rounds)
+
+
+def verify_and_update_password(plain_password: str, password_hash: str | None) -> tuple[bool, str | None]:
+  """Verify a password and return a rehashed value when the stored cost factor is outdated"""
+  return _run_bcrypt(_verify_and_update, plain_password, password_hash, settings.bcrypt_rounds)
 
 
 def create_access_token(subject: str, expires_minutes: Optional[int] = None, extra: dict | None = None) -> str:
@@ -25,12 +101,16 @@ def create_access_token(subject: str, expires_minutes: Optional[int] = None, ext
                                "exp": datetime.now(UTC) + expire_delta}
   if extra:
     to_encode.update(extra)
+  from jose import jwt
+
   # jwt_secret is guaranteed to be non-None due to validation in Settings.__init__
   jwt_secret: str = settings.jwt_secret  # type: ignore
   return jwt.encode(to_encode, jwt_secret, algorithm="HS256")
 
 
 def decode_token(token: str) -> dict[str, Any]:
+  from jose import JWTError, jwt
+
   try:
     # jwt_secret is guaranteed to be non-None due to validation in Settings.__init__
     jwt_secret: str = settings.jwt_secret  # type: ignore
@@ -0,0 +1,178 @@
+"""Cache of authenticated users: in-process LRU with an optional Redis tier."""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from uuid import UUID
+
+from app.core.config import settings
+from app.models.user import Provider, User
+
+
+logger = logging.getLogger(__name__)
+
+def _dump(user: User) -> dict:
+  return {
+      "id": str(user.id),
+      "email": user.email,
+      "name": user.name,
+      "avatar_url": user.avatar_url,
+      "google_sub": user.google_sub,
+      "provider": user.provider.value if user.provider else None,
+      "created_at": user.created_at.isoformat() if user.created_at else None,
+      "has_password": user.has_password,
+  }
+
+
+def _load(data: dict) -> User:
+  # Detached snapshot: never added to a session
+  return User(
+      id=UUID(data["id"]),
+      email=data["email"],
+      name=data["name"],
+      avatar_url=data["avatar_url"],
+      google_sub=data["google_sub"],
+      provider=Provider(data["provider"]) if data["provider"] else None,
+      created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+      has_password=data["has_password"],
+  )
+
+
+class UserCache:
+  """
+  TTL-bounded LRU of user snapshots keyed by user id.
+
+  A miss captures a version before querying the database and ``set`` drops
+  the result if the user was invalidated meanwhile, so a concurrent profile
+  change is never overwritten by the stale row.
+
+  Without Redis the version is a process-wide invalidation counter. With
+  Redis it is a per-user counter kept in Redis, which also acts as a shared
+  second tier: entries remember the version they were stored under, so an
+  invalidation in one worker retires the local entries of every other
+  worker. If Redis cannot be reached nothing is cached.
+  """
+
+  def __init__(self, max_entries: int, ttl_seconds: float):
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    self._entries: OrderedDict[UUID, tuple[float, int, dict]] = OrderedDict()
+    # Counter value at each user's last invalidation, bounded like the entries.
+    # Forgetting one raises the floor, so misses that began before it still
+    # drop their result.
+    self._invalidated: OrderedDict[UUID, int] = OrderedDict()
+    self._counter = 0
+    self._floor = 0
+    self._lock = threading.Lock()
+    self._redis = None
+
+  def _redis_client(self):
+    if not settings.user_cache_redis_enabled:
+      return None
+    if self._redis is None:
+      import redis
+      self._redis = redis.Redis.from_url(settings.redis_url, socket_timeout=0.05)
+    return self._redis
+
+  def version(self, user_id: UUID) -> int | None:
+    """Version to pass to ``set`` after a miss, or None when it cannot be read"""
+    if not settings.user_cache_enabled:
+      return None
+    client = self._redis_client()
+    if client is None:
+      with self._lock:
+        return self._counter
+    try:
+      return int(client.get(f"user_cache_version:{user_id}") or 0)
+    except Exception as e:
+      logger.warning("User cache Redis read failed: %s", e)
+      return None
+
+  def get(self, user_id: UUID) -> User | None:
+    if not settings.user_cache_enabled:
+      return None
+    client = self._redis_client()
+    version, raw = None, None
+    if client is not None:
+      try:
+        version, raw = client.mget(f"user_cache_version:{user_id}", f"user_cache:{user_id}")
+      except Exception as e:
+        logger.warning("User cache Redis read failed: %s", e)
+        return None
+      version = int(version or 0)
+
+    now = time.monotonic()
+    with self._lock:
+      entry = self._entries.get(user_id)
+      if entry and entry[0] > now and (client is None or entry[1] == version):
+        self._entries.move_to_end(user_id)
+        return _load(entry[2])
+      if entry:
+        del self._entries[user_id]
+
+    if raw:
+      cached = json.loads(raw)
+      if cached["version"] == version:
+        with self._lock:
+          self._store_local(user_id, cached["user"], version)
+        return _load(cached["user"])
+    return None
+
+  def set(self, user: User, version: int | None) -> None:
+    if not settings.user_cache_enabled or version is None:
+      return
+    data = _dump(user)
+    client = self._redis_client()
+    if client is None:
+      with self._lock:
+        if self._invalidated.get(user.id, self._floor) > version:
+          return
+        self._store_local(user.id, data, version)
+      return
+    if self.version(user.id) != version:
+      return
+    with self._lock:
+      self._store_local(user.id, data, version)
+    try:
+      client.set(f"user_cache:{user.id}", json.dumps({"version": version, "user": data}),
+                 ex=settings.user_cache_redis_ttl_seconds)
+    except Exception as e:
+      logger.warning("User cache Redis write failed: %s", e)
+
+  def _store_local(self, user_id: UUID, data: dict, version: int) -> None:
+    # Caller holds the lock
+    self._entries[user_id] = (time.monotonic() + self.ttl_seconds, version, data)
+    self._entries.move_to_end(user_id)
+    while len(self._entries) > self.max_entries:
+      self._entries.popitem(last=False)
+
+  def invalidate(self, user_id: UUID) -> None:
+    """Evict a user after a profile or credential change"""
+    with self._lock:
+      self._counter += 1
+      self._invalidated[user_id] = self._counter
+      self._invalidated.move_to_end(user_id)
+      while len(self._invalidated) > self.max_entries:
+        self._floor = self._invalidated.popitem(last=False)[1]
+      self._entries.pop(user_id, None)
+    client = self._redis_client()
+    if client is not None:
+      try:
+        # Never expires: a restarted counter could match an entry stored under an old version
+        client.incr(f"user_cache_version:{user_id}")
+        client.delete(f"user_cache:{user_id}")
+      except Exception as e:
+        logger.warning("User cache Redis delete failed: %s", e)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+      self._invalidated.clear()
+      self._counter = 0
+      self._floor = 0
+
+
+user_cache = UserCache(settings.user_cache_max_entries, settings.user_cache_ttl_seconds)
@@ -0,0 +1,43 @@
+from functools import lru_cache
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.pool_metrics import instrument_engine
+from app.db.session import engine_options
+
+
+# Sync drivers in DATABASE_URL and their async counterparts
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+  """Translate a sync DATABASE_URL into the matching async driver URL"""
+  parsed = make_url(url)
+  backend = parsed.get_backend_name()
+  if backend not in ASYNC_DRIVERS:
+    raise ValueError(f"No async driver configured for {backend}")
+  return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+  # Created on first use so the sync-only scripts never import the async drivers
+  url = settings.async_database_url or to_async_url(settings.database_url)  # type: ignore
+  async_engine = create_async_engine(url, pool_logging_name="async", **engine_options(url, is_async=True))
+  instrument_engine(async_engine.sync_engine, "async")
+  return async_engine
+
+
+@lru_cache
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+  return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+  async with get_async_sessionmaker()() as db:
+    yield db
@@ -0,0 +1,131 @@
+"""
+Monthly range partitions of habit_logs and habit_completions (PostgreSQL).
+
+Both tables are partitioned by RANGE (date): one partition per calendar month,
+named <table>_pYYYY_MM, plus <table>_default for rows outside every monthly
+range so an insert never fails for lack of a partition. Queries bounded by
+date only touch the partitions of their window.
+
+ensure_partitions keeps `months_ahead` future months created. It runs on app
+startup and from manage_partitions.py, serialised across processes by an
+advisory lock. Old months can be detached into standalone tables.
+
+On other dialects the tables are plain and every function here is a no-op.
+"""
+
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.lib.calendar import add_months, month_start
+
+
+PARTITIONED_TABLES = ("habit_logs", "habit_completions")
+
+# pg_advisory_xact_lock key for partition DDL
+_LOCK_KEY = 0x7061727473
+_MONTHLY = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def partition_name(table: str, month: date) -> str:
+  return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def default_partition_name(table: str) -> str:
+  return f"{table}_default"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+  if conn.dialect.name != "postgresql":
+    return False
+  return conn.execute(
+      text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+  ).scalar() is True
+
+
+def monthly_partitions(conn: Connection, table: str) -> dict[date, str]:
+  """Month -> partition name for the monthly partitions attached to `table`"""
+  names = conn.execute(text(
+      "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+      "WHERE i.inhparent = to_regclass(:table)"), {"table": table}).scalars()
+  months = {}
+  for name in names:
+    match = _MONTHLY.search(name)
+    if name.startswith(table) and match:
+      months[date(int(match[1]), int(match[2]), 1)] = name
+  return months
+
+
+def create_default_partition(conn: Connection, table: str) -> None:
+  conn.execute(text(f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT"))
+
+
+def create_partition(conn: Connection, table: str, month: date) -> str:
+  """Create the partition of `month`, moving its rows out of the default partition if needed"""
+  name = partition_name(table, month)
+  bounds = f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+  default = default_partition_name(table)
+  in_month = {"start": month, "end": add_months(month, 1)}
+  stray = conn.execute(
+      text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE date >= :start AND date < :end)"), in_month).scalar()
+  if not stray:
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+    return name
+
+  # PostgreSQL refuses a partition whose rows sit in the default one, so the
+  # rows are moved into a standalone table that is then attached
+  conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+  conn.execute(text(
+      f"WITH moved AS (DELETE FROM {default} WHERE date >= :start AND date < :end RETURNING *) "
+      f"INSERT INTO {name} SELECT * FROM moved"), in_month)
+  conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+  return name
+
+
+def ensure_table_partitions(conn: Connection, table: str, months_ahead: int,
+                            since: date | None = None, today: date | None = None) -> list[str]:
+  """Create the default partition and every missing month from `since` (default: this month) to `months_ahead`"""
+  if not is_partitioned(conn, table):
+    return []
+  conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+  create_default_partition(conn, table)
+  this_month = month_start(today or date.today())
+  month, last = month_start(since or this_month), add_months(this_month, months_ahead)
+  existing = monthly_partitions(conn, table)
+  created = []
+  while month <= last:
+    if month not in existing:
+      created.append(create_partition(conn, table, month))
+    month = add_months(month, 1)
+  return created
+
+
+def ensure_partitions(conn: Connection, months_ahead: int, today: date | None = None) -> list[str]:
+  """Create missing partitions of every partitioned table; returns the new partitions"""
+  created = []
+  for table in PARTITIONED_TABLES:
+    created += ensure_table_partitions(conn, table, months_ahead, today=today)
+  return created
+
+
+def detach_partitions(conn: Connection, before: date) -> list[str]:
+  """Detach the monthly partitions that end on or before `before`; their tables are kept"""
+  detached = []
+  for table in PARTITIONED_TABLES:
+    if not is_partitioned(conn, table):
+      continue
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+    for month, name in sorted(monthly_partitions(conn, table).items()):
+      if add_months(month, 1) <= before:
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        detached.append(name)
+  return detached
+
+
+def create_initial_partitions(table, connection: Connection, **kw) -> None:
+  """after_create hook, so metadata.create_all() on PostgreSQL yields insertable tables"""
+  if connection.dialect.name == "postgresql":
+    ensure_table_partitions(connection, table.name, settings.partition_months_ahead)
@@ -0,0 +1,119 @@
+"""Connection pool instrumentation: checkout wait, saturation and churn."""
+
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+@dataclass
+class PoolStats:
+  checkouts: int = 0
+  checkins: int = 0
+  connects: int = 0
+  disconnects: int = 0
+  invalidations: int = 0
+  checkout_timeouts: int = 0
+  checkout_wait_seconds_total: float = 0.0
+  checkout_wait_seconds_max: float = 0.0
+
+
+# Keyed by the pool's logging name so stats survive Pool.recreate()
+_stats: dict[str, PoolStats] = {}
+_pools: dict[str, Pool] = {}
+_lock = threading.Lock()
+
+
+def _get_stats(name: str) -> PoolStats:
+  with _lock:
+    return _stats.setdefault(name, PoolStats())
+
+
+class _TimedCheckoutMixin:
+  """Measures how long a checkout waits for a free connection."""
+
+  def _do_get(self):
+    name = self._orig_logging_name  # type: ignore[attr-defined]
+    started = time.perf_counter()
+    try:
+      return super()._do_get()  # type: ignore[misc]
+    except exc.TimeoutError:
+      _get_stats(name).checkout_timeouts += 1
+      raise
+    finally:
+      waited = time.perf_counter() - started
+      stats = _get_stats(name)
+      stats.checkout_wait_seconds_total += waited
+      stats.checkout_wait_seconds_max = max(stats.checkout_wait_seconds_max, waited)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+  pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+  pass
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+  """Count checkouts, checkins and connection churn for an engine's pool"""
+  stats = _get_stats(name)
+  _pools[name] = engine.pool
+
+  @event.listens_for(engine, "checkout")
+  def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    stats.checkouts += 1
+
+  @event.listens_for(engine, "checkin")
+  def on_checkin(dbapi_connection, connection_record):
+    stats.checkins += 1
+
+  @event.listens_for(engine, "connect")
+  def on_connect(dbapi_connection, connection_record):
+    stats.connects += 1
+
+  @event.listens_for(engine, "close")
+  def on_close(dbapi_connection, connection_record):
+    stats.disconnects += 1
+
+  @event.listens_for(engine, "invalidate")
+  def on_invalidate(dbapi_connection, connection_record, exception):
+    stats.invalidations += 1
+
+  @event.listens_for(engine, "engine_disposed")
+  def on_disposed(engine_):
+    _pools[name] = engine_.pool
+
+
+def pool_snapshot() -> dict[str, dict]:
+  """Current pool occupancy plus cumulative counters for every instrumented engine"""
+  snapshot = {}
+  for name, pool in list(_pools.items()):
+    stats = _get_stats(name)
+    data: dict = {
+        "checkouts": stats.checkouts,
+        "checkins": stats.checkins,
+        "connects": stats.connects,
+        "disconnects": stats.disconnects,
+        "invalidations": stats.invalidations,
+        "checkout_timeouts": stats.checkout_timeouts,
+        "checkout_wait_seconds_total": round(stats.checkout_wait_seconds_total, 6),
+        "checkout_wait_seconds_max": round(stats.checkout_wait_seconds_max, 6),
+        "checkout_wait_seconds_avg": round(
+            stats.checkout_wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0,
+    }
+    if isinstance(pool, QueuePool):
+      capacity = pool.size() + max(pool._max_overflow, 0)
+      data.update({
+          "size": pool.size(),
+          "max_overflow": pool._max_overflow,
+          "checked_out": pool.checkedout(),
+          "checked_in": pool.checkedin(),
+          "overflow": pool.overflow(),
+          "saturation": round(pool.checkedout() / capacity, 4) if capacity else 0.0,
+      })
+    snapshot[name] = data
+  return snapshot
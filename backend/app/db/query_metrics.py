@@ -0,0 +1,45 @@
+"""Per-request SQL statement counts and DB time, collected through engine events."""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+  count: int = 0
+  seconds: float = 0.0
+
+
+# The middleware stores one mutable QueryStats per request; threadpool workers
+# and run_sync greenlets see copies of the context that point at the same object
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_request() -> QueryStats:
+  stats = QueryStats()
+  _current.set(stats)
+  return stats
+
+
+def current_stats() -> QueryStats | None:
+  return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  if _current.get() is not None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  stats = _current.get()
+  started = conn.info.get("query_started")
+  if stats is None or not started:
+    return
+  stats.count += 1
+  stats.seconds += time.perf_counter() - started.pop()
@@ -1,12 +1,62 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_engine
 
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)  # type: ignore
+def engine_options(url: str, is_async: bool = False) -> dict:
+  """Pool and connection options for an engine, driven by Settings"""
+  options: dict = {"pool_pre_ping": settings.db_pool_pre_ping}
+  backend = make_url(url).get_backend_name()
+  if backend == "sqlite":
+    # SQLite uses its own single-file pools; sizing does not apply
+    return options
+
+  options.update(
+      poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+      pool_size=settings.db_pool_size,
+      max_overflow=settings.db_max_overflow,
+      pool_timeout=settings.db_pool_timeout,
+      pool_recycle=settings.db_pool_recycle,
+  )
+  if backend == "postgresql" and settings.db_statement_timeout_ms:
+    if is_async:
+      options["connect_args"] = {"server_settings": {
+          "statement_timeout": str(settings.db_statement_timeout_ms)}}
+    else:
+      options["connect_args"] = {
+          "options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+  return options
+
+
+@event.listens_for(Engine, "connect")
+def _sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+  """SQLite only enforces foreign keys, and so ON DELETE CASCADE, when switched on per connection"""
+  if type(dbapi_connection).__module__.startswith(("sqlite3", "sqlalchemy.dialects.sqlite")):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+engine = create_engine(settings.database_url, pool_logging_name="primary",  # type: ignore
+                       **engine_options(settings.database_url))  # type: ignore
+instrument_engine(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica for idempotent endpoints
+replica_engine = None
+if settings.database_replica_url:
+  replica_engine = create_engine(settings.database_replica_url, pool_logging_name="replica",
+                                 **engine_options(settings.database_replica_url))
+  instrument_engine(replica_engine, "replica")
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine or engine)
+
+# Set on responses to writes; while present, reads stay on the primary
+PRIMARY_PIN_COOKIE = "primary_pin"
+
 
 def get_db():
   db = SessionLocal()
@@ -14,3 +64,15 @@ def get_db():
     yield db
   finally:
     db.close()
+
+
+def get_read_db(request: Request):
+  """Session for read-only endpoints; uses the replica unless the client wrote recently"""
+  if replica_engine is None or request.cookies.get(PRIMARY_PIN_COOKIE):
+    db = SessionLocal()
+  else:
+    db = ReplicaSessionLocal()
+  try:
+    yield db
+  finally:
+    db.close()
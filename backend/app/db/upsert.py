@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, table):
+  """Return an INSERT construct supporting ON CONFLICT for the session's dialect"""
+  dialect = db.get_bind().dialect.name
+  if dialect == "postgresql":
+    return postgresql.insert(table)
+  if dialect == "sqlite":
+    return sqlite.insert(table)
+  raise NotImplementedError(f"Upserts are not supported on {dialect}")
@@ -0,0 +1,83 @@
+"""
+Calendar arithmetic shared by completions, stats and the date_dim table.
+
+A habit period is the day itself, the Monday-based week or the calendar
+month. Lookups are cached: the same few hundred recent days are asked about
+on every request. SQL that needs the same answers joins date_dim, which holds
+these values for every day from DATE_DIM_FIRST to DATE_DIM_LAST.
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterator, NamedTuple
+
+
+DATE_DIM_FIRST = date(1970, 1, 1)
+DATE_DIM_LAST = date(2099, 12, 31)
+
+
+class Day(NamedTuple):
+  day: date
+  # Monday of the ISO week
+  week_start: date
+  month_start: date
+  month_end: date
+  # Monday is 0
+  weekday: int
+  # date.toordinal(), for day arithmetic in SQL
+  ordinal: int
+
+
+def add_months(month: date, months: int) -> date:
+  """First day of the month `months` after the one containing `month`"""
+  index = month.year * 12 + month.month - 1 + months
+  return date(index // 12, index % 12 + 1, 1)
+
+
+@lru_cache(maxsize=4096)
+def day_info(day: date) -> Day:
+  month_start = day.replace(day=1)
+  return Day(
+      day=day,
+      week_start=day - timedelta(days=day.weekday()),
+      month_start=month_start,
+      month_end=add_months(month_start, 1) - timedelta(days=1),
+      weekday=day.weekday(),
+      ordinal=day.toordinal(),
+  )
+
+
+def week_start(day: date) -> date:
+  return day_info(day).week_start
+
+
+def month_start(day: date) -> date:
+  return day_info(day).month_start
+
+
+@lru_cache(maxsize=4096)
+def period_bounds(frequency: str, day: date) -> tuple[date, date]:
+  """First and last day of the habit period containing `day`; unknown frequencies are daily"""
+  info = day_info(day)
+  if frequency == "weekly":
+    return info.week_start, info.week_start + timedelta(days=6)
+  if frequency == "monthly":
+    return info.month_start, info.month_end
+  return day, day
+
+
+def period_starts(frequency: str, count: int, today: date | None = None) -> list[date]:
+  """Start days of the last `count` periods, the current one first"""
+  current = period_bounds(frequency, today or date.today())[0]
+  if frequency == "weekly":
+    return [current - timedelta(weeks=i) for i in range(count)]
+  if frequency == "monthly":
+    return [add_months(current, -i) for i in range(count)]
+  return [current - timedelta(days=i) for i in range(count)]
+
+
+def date_dim_rows(first: date = DATE_DIM_FIRST, last: date = DATE_DIM_LAST) -> Iterator[dict]:
+  """Rows of the date_dim table between `first` and `last` inclusive"""
+  for ordinal in range(first.toordinal(), last.toordinal() + 1):
+    info = day_info.__wrapped__(date.fromordinal(ordinal))
+    yield info._asdict()
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.core.security import hash_password
+from app.core.user_cache import user_cache
 from app.db.session import get_db
 from app.models.user import Provider, User
 
@@ -13,10 +14,11 @@ def get_or_create_user(db: Session, user_id: str, user_name: str, user_email: st
     user.avatar_url = user_picture
     user.google_sub = user_id
     db.commit()
+    user_cache.invalidate(user.id)
     db.refresh(user)
     return user
   new_user = User(name=user_name, email=user_email, google_sub=user_id, avatar_url=user_picture, provider=Provider.google, has_password=False)
   db.add(new_user)
-  db.commit()
-  db.refresh(new_user)
+  # Committed by the caller together with the user's demo habits
+  db.flush()
   return new_user
@@ -1,18 +1,49 @@
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-from app.core.rate_limit import init_rate_limiter
+from app.core.rate_limit import install_rate_limiter
+from app.db.partitions import ensure_partitions
+from app.db.pool_metrics import pool_snapshot
+from app.db.session import engine
+from app.middleware.etag import install_conditional_get
+from app.middleware.metrics import install_metrics
+from app.middleware.read_your_writes import install_read_your_writes
 from app.problem_details import install_problem_handlers
 from app.routers import auth
 from app.routers import habits
 from app.routers import logs
 from app.routers import stats
 from app.routers import badges
+from app.routers import export
+from app.routers import imports
+
+logger = logging.getLogger(__name__)
+
+
+def maintain_partitions() -> None:
+  """Create the coming months' partitions; a failure must not keep the app from starting"""
+  if engine.dialect.name != "postgresql":
+    return
+  try:
+    with engine.begin() as conn:
+      ensure_partitions(conn, settings.partition_months_ahead)
+  except SQLAlchemyError:
+    logger.exception("Partition maintenance failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  if settings.partition_maintenance_on_startup:
+    await run_in_threadpool(maintain_partitions)
+  yield
+
 
 def create_app() -> FastAPI:
-  app = FastAPI(title="Fitness & Habit Tracker", version="0.1.0")
+  app = FastAPI(title="Fitness & Habit Tracker", version="0.1.0", lifespan=lifespan)
   app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:4321", "https://fitness-habit-tracker.vercel.app"],
@@ -23,17 +54,34 @@ def create_app() -> FastAPI:
   )
 
   install_problem_handlers(app)
+  install_conditional_get(app)
+  install_rate_limiter(app)
+  install_read_your_writes(app)
+  # Added last so it is outermost and times the other middleware too
+  install_metrics(app)
   api_router = APIRouter(prefix="/api")
   api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
   api_router.include_router(habits.router, prefix="/habits", tags=["habits"])
+  if settings.async_db_enabled:
+    # Registered first so they take precedence over the sync routes
+    api_router.include_router(logs.async_router, prefix="/logs/habits", tags=["logs"])
+    api_router.include_router(stats.async_router, prefix="/stats", tags=["stats"])
+    api_router.include_router(badges.async_router, prefix="/badges", tags=["badges"])
   api_router.include_router(logs.router, prefix="/logs/habits", tags=["logs"])
   api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
   api_router.include_router(badges.router, prefix="/badges", tags=["badges"])
+  api_router.include_router(export.router, prefix="/export", tags=["export"])
+  api_router.include_router(imports.router, prefix="/import", tags=["import"])
   app.include_router(api_router)
 
   @app.get("/health")
   async def health():
     return {"status": "ok"}
+
+  if settings.metrics_enabled:
+    @app.get("/metrics/pool", include_in_schema=False)
+    async def pool_metrics():
+      return {"pools": pool_snapshot()}
   return app
 
 app = create_app()
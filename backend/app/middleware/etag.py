@@ -0,0 +1,78 @@
+import hashlib
+from datetime import date
+
+from fastapi import Depends, FastAPI, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.async_session import get_async_db
+from app.db.session import get_read_db
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+from app.models.user import User
+from app.services.data_version import get_data_version
+
+
+class NotModified(Exception):
+  """Raised by the ETag dependencies before the endpoint runs"""
+
+  def __init__(self, etag: str):
+    self.etag = etag
+
+
+def install_conditional_get(app: FastAPI) -> None:
+  @app.exception_handler(NotModified)
+  async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": "private, no-cache"})
+
+
+def _make_etag(request: Request, user_id, version: int, daily: bool) -> str:
+  key = f"{request.url.path}?{request.url.query}|{user_id}|{version}"
+  if daily:
+    # Responses that depend on "today" change at midnight without any write
+    key += f"|{date.today().isoformat()}"
+  return f'W/"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+  header = request.headers.get("if-none-match")
+  if not header:
+    return False
+  if header.strip() == "*":
+    return True
+  # Weak comparison: W/ prefixes are ignored
+  opaque = etag.removeprefix("W/")
+  return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _check(request: Request, response: Response, user_id, version: int | None, daily: bool) -> None:
+  if version is None:
+    return
+  etag = _make_etag(request, user_id, version, daily)
+  if _matches(request, etag):
+    raise NotModified(etag)
+  # The response cache keys on the same hash
+  request.state.etag = etag
+  request.state.user_id = user_id
+  response.headers["ETag"] = etag
+  response.headers["Cache-Control"] = "private, no-cache"
+
+
+def conditional_get(daily: bool = False):
+  """Dependency answering If-None-Match with 304 from the user's data version"""
+  def dependency(request: Request, response: Response, db: Session = Depends(get_read_db), current_user: TokenClaims = Depends(verify_token_claims)):
+    _check(request, response, current_user.id, get_data_version(db, current_user.id), daily)
+  return dependency
+
+
+def conditional_get_async(daily: bool = False):
+  """AsyncSession variant of conditional_get for the async routers"""
+  async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_async_db), current_user: TokenClaims = Depends(verify_token_claims)):
+    version = await db.scalar(select(User.data_version).where(User.id == current_user.id))
+    _check(request, response, current_user.id, version, daily)
+  return dependency
+
+
+etag = conditional_get()
+daily_etag = conditional_get(daily=True)
+daily_etag_async = conditional_get_async(daily=True)
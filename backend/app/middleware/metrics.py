@@ -0,0 +1,48 @@
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import request_metrics
+from app.db import query_metrics
+
+
+def route_template(request: Request) -> str:
+  """
+  The matched route as a template, e.g. /api/habits/{habit_id}.
+
+  Labels use the template rather than the raw path to keep cardinality
+  bounded. Included routers keep only their own path on the route, so the
+  template is rebuilt by putting the parameter names back into the path.
+  """
+  if request.scope.get("route") is None:
+    return "unmatched"
+  params = {str(value): name for name, value in request.path_params.items()}
+  return "/".join(f"{{{params[segment]}}}" if segment in params else segment
+                  for segment in request.url.path.split("/"))
+
+
+def install_metrics(app: FastAPI) -> None:
+  """Time every request per route template and count its SQL statements"""
+  if not settings.metrics_enabled:
+    return
+
+  @app.middleware("http")
+  async def record_request_metrics(request: Request, call_next):
+    stats = query_metrics.start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    template = route_template(request)
+    request_metrics.observe(request.method, template, response.status_code, elapsed, stats.count, stats.seconds)
+
+    if settings.server_timing_enabled:
+      response.headers["Server-Timing"] = (
+          f'app;dur={elapsed * 1000:.1f}, db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+    return response
+
+  @app.get("/metrics", include_in_schema=False)
+  async def metrics():
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,26 @@
+from fastapi import FastAPI, Request
+
+from app.core.config import settings
+from app.db.session import PRIMARY_PIN_COOKIE
+
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def install_read_your_writes(app: FastAPI) -> None:
+  """Pin clients to the primary for a short window after a successful write"""
+  @app.middleware("http")
+  async def pin_writes_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    if (settings.database_replica_url
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400):
+      response.set_cookie(
+          key=PRIMARY_PIN_COOKIE,
+          value="1",
+          max_age=settings.replica_pin_seconds,
+          httponly=True,
+          secure=True,
+          samesite="none"
+      )
+    return response
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Annotated, Optional
 from uuid import UUID
 
@@ -6,6 +7,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 from app.core.security import decode_token
+from app.core.user_cache import user_cache
 from app.db.session import get_db
 from app.models.user import User
 
@@ -13,7 +15,34 @@ from app.models.user import User
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
+@dataclass(frozen=True)
+class TokenClaims:
+  """Identity taken from a verified token, without loading the user row"""
+  id: UUID
+
+
 def verify_token(request: Request,db: Annotated[Session, Depends(get_db)], credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_scheme)] = None) -> User:
+  uid = _get_token_user_id(request, credentials)
+
+  # Cached users are detached snapshots; re-query before modifying them
+  user = user_cache.get(uid)
+  if user:
+    return user
+
+  version = user_cache.version(uid)
+  user = db.query(User).filter(User.id == uid).first()
+  if not user:
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+  user_cache.set(user, version)
+  return user
+
+
+async def verify_token_claims(request: Request, credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_scheme)] = None) -> TokenClaims:
+  """Fast path for endpoints that only need the user id; skips the database"""
+  return TokenClaims(id=_get_token_user_id(request, credentials))
+
+
+def _get_token_user_id(request: Request, credentials: Optional[HTTPAuthorizationCredentials]) -> UUID:
   token = None
 
   # Try to get token from cookie first
@@ -35,8 +64,7 @@ def verify_token(request: Request,db: Annotated[Session, Depends(get_db)], crede
   if not user_id:
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-  uid = UUID(user_id)
-  user = db.query(User).filter(User.id == uid).first()
-  if not user:
-    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-  return user
+  try:
+    return UUID(user_id)
+  except ValueError:
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
@@ -6,5 +6,9 @@ from .badge import Badge      # noqa: F401
 from .habit_log import HabitLog
 from .habit import Habit
 from .habit_completion import HabitCompletion
+from .habit_log_month import HabitLogMonth
+from .habit_log_archive import HabitLogArchive
+from .date_dim import DateDim
+from .habit_target_history import HabitTargetHistory
 
 # from user import User   # ❌ Looks in Python's module search path, not in models/
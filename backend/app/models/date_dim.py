@@ -0,0 +1,41 @@
+"""Calendar dimension: one row per day with its week and month."""
+
+from datetime import date as dt_date
+
+from sqlalchemy import Date, Integer, SmallInteger, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.lib.calendar import date_dim_rows
+
+
+class DateDim(Base):
+  """
+  Static rows from DATE_DIM_FIRST to DATE_DIM_LAST (app.lib.calendar), so
+  queries can bucket dates into weeks and months with a join and GROUP BY
+  that works the same on PostgreSQL and SQLite.
+  """
+
+  __tablename__ = "date_dim"
+
+  day: Mapped[dt_date] = mapped_column(Date, primary_key=True)
+  # Monday of the ISO week
+  week_start: Mapped[dt_date] = mapped_column(Date, nullable=False, index=True)
+  month_start: Mapped[dt_date] = mapped_column(Date, nullable=False, index=True)
+  month_end: Mapped[dt_date] = mapped_column(Date, nullable=False)
+  # Monday is 0
+  weekday: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+  ordinal: Mapped[int] = mapped_column(Integer, nullable=False)
+
+  @classmethod
+  def period_start(cls, frequency: str):
+    """Column with the start of each day's habit period; unknown frequencies are daily"""
+    return {"weekly": cls.week_start, "monthly": cls.month_start}.get(frequency, cls.day)
+
+
+def fill_date_dim(table, connection, **kw) -> None:
+  """after_create hook, so metadata.create_all() yields a filled table"""
+  connection.execute(table.insert(), list(date_dim_rows()))
+
+
+event.listen(DateDim.__table__, "after_create", fill_date_dim)
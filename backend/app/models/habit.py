@@ -2,9 +2,9 @@ import enum
 import uuid
 from datetime import datetime, timezone, UTC
 
-from sqlalchemy import String, DateTime, Enum, Integer, ForeignKey
+from sqlalchemy import String, DateTime, Enum, Integer, ForeignKey, event
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, ORMExecuteState, Session, mapped_column, relationship, with_loader_criteria
 
 from app.db.base import Base
 
@@ -43,9 +43,27 @@ class Habit(Base):
   description: Mapped[str | None] = mapped_column(String(512), nullable=True)
   created_at: Mapped[datetime] = mapped_column(
       DateTime(timezone=True), default=lambda: datetime.now(UTC))
+  # Set when deleted; the row and its history are purged by app.services.habit_purge
+  deleted_at: Mapped[datetime | None] = mapped_column(
+      DateTime(timezone=True), nullable=True, index=True)
 
   user = relationship("User", back_populates="habits")
+  # Child rows go with the habit through ON DELETE CASCADE instead of being
+  # loaded into the session and deleted one by one
   logs = relationship("HabitLog", back_populates="habit",
-                      cascade="all, delete-orphan")
+                      cascade="all, delete-orphan", passive_deletes=True)
   completions = relationship(
-      "HabitCompletion", back_populates="habit", cascade="all, delete-orphan")
+      "HabitCompletion", back_populates="habit", cascade="all, delete-orphan", passive_deletes=True)
+  log_months = relationship(
+      "HabitLogMonth", back_populates="habit", cascade="all, delete-orphan", passive_deletes=True)
+  target_history = relationship(
+      "HabitTargetHistory", back_populates="habit", cascade="all, delete-orphan", passive_deletes=True)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted_habits(state: ORMExecuteState) -> None:
+  """Keep soft-deleted habits out of ORM queries, unless run with include_deleted=True"""
+  if (state.is_select and not state.is_column_load and not state.is_relationship_load
+      and not state.execution_options.get("include_deleted", False)):
+    state.statement = state.statement.options(
+        with_loader_criteria(Habit, lambda cls: cls.deleted_at.is_(None), include_aliases=True))
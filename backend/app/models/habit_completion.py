@@ -2,11 +2,12 @@
 
 import uuid
 from datetime import date as dt_date, datetime, timezone, UTC
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, UniqueConstraint, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.db.partitions import create_initial_partitions
 
 # Forward reference for type hints
 from typing import TYPE_CHECKING
@@ -29,7 +30,8 @@ class HabitCompletion(Base):
       ForeignKey("habits.id", ondelete="CASCADE"),
       nullable=False
   )
-  date: Mapped[dt_date] = mapped_column(Date, nullable=False)
+  # Part of the primary key because a partitioned table's unique keys must include the partition key
+  date: Mapped[dt_date] = mapped_column(Date, primary_key=True, nullable=False)
   is_completed: Mapped[bool] = mapped_column(Boolean, nullable=False)
   target_at_time: Mapped[int] = mapped_column(Integer, nullable=False)
   quantity_achieved: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -51,7 +53,12 @@ class HabitCompletion(Base):
   __table_args__ = (
       UniqueConstraint('habit_id', 'date',
                        name='uq_habit_completions_habit_date'),
+      # Monthly partitions on Postgres, see app.db.partitions
+      {'postgresql_partition_by': 'RANGE (date)'},
   )
 
   def __repr__(self) -> str:
     return f"<HabitCompletion(habit_id={self.habit_id}, date={self.date}, completed={self.is_completed})>"
+
+
+event.listen(HabitCompletion.__table__, "after_create", create_initial_partitions)
@@ -0,0 +1,25 @@
+"""Raw habit logs moved out of habit_logs by the compaction job."""
+
+import uuid
+from datetime import date as dt_date, datetime, UTC
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class HabitLogArchive(Base):
+  """Same columns as habit_logs; only read back for audits or a restore."""
+
+  __tablename__ = "habit_logs_archive"
+
+  id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+  habit_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey(
+      "habits.id", ondelete="CASCADE"), nullable=False, index=True)
+  date: Mapped[dt_date] = mapped_column(Date, nullable=False)
+  quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+  created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+  archived_at: Mapped[datetime] = mapped_column(
+      DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
@@ -0,0 +1,31 @@
+"""Monthly roll-up of habit logs compacted out of habit_logs."""
+
+import uuid
+from datetime import date as dt_date, datetime, UTC
+
+from sqlalchemy import JSON, Date, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+
+class HabitLogMonth(Base):
+  """One row per habit and month whose logs were moved to the archive."""
+
+  __tablename__ = "habit_log_months"
+
+  habit_id: Mapped[uuid.UUID] = mapped_column(
+      UUID(as_uuid=True), ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+  # First day of the month
+  month: Mapped[dt_date] = mapped_column(Date, primary_key=True)
+  total_quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+  days_logged: Mapped[int] = mapped_column(Integer, nullable=False)
+  # Quantity logged on each day of the month, the 1st first; 0 when nothing was logged
+  day_quantities: Mapped[list[int]] = mapped_column(JSON, nullable=False)
+  # Bit n is set when the completion record of day n + 1 was completed
+  completed_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+  compacted_at: Mapped[datetime] = mapped_column(
+      DateTime(timezone=True), nullable=False, default=lambda: datetime.now(UTC))
+
+  habit = relationship("Habit", back_populates="log_months")
@@ -0,0 +1,31 @@
+"""Effective-dated habit targets."""
+
+import uuid
+from datetime import date as dt_date
+
+from sqlalchemy import Date, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+
+class HabitTargetHistory(Base):
+  """
+  The target a habit had from valid_from to valid_to inclusive. Habits whose
+  target never changed have no rows: Habit.target applies to every day.
+  """
+
+  __tablename__ = "habit_target_history"
+
+  habit_id: Mapped[uuid.UUID] = mapped_column(
+      UUID(as_uuid=True), ForeignKey("habits.id", ondelete="CASCADE"), primary_key=True)
+  valid_from: Mapped[dt_date] = mapped_column(Date, primary_key=True)
+  # NULL for the range in effect now
+  valid_to: Mapped[dt_date | None] = mapped_column(Date, nullable=True)
+  target: Mapped[int] = mapped_column(Integer, nullable=False)
+
+  habit = relationship("Habit", back_populates="target_history")
+
+  def __repr__(self) -> str:
+    return f"<HabitTargetHistory(habit_id={self.habit_id}, target={self.target}, {self.valid_from}..{self.valid_to})>"
@@ -2,7 +2,7 @@ import enum
 import uuid
 from datetime import datetime, timezone, UTC
 
-from sqlalchemy import Boolean, String, DateTime, Enum
+from sqlalchemy import BigInteger, Boolean, String, DateTime, Enum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -29,8 +29,14 @@ class User(Base):
   created_at: Mapped[datetime] = mapped_column(
       DateTime(timezone=True), default=lambda: datetime.now(UTC))
   has_password: Mapped[bool | None] = mapped_column(Boolean, default=True, nullable=True)
+  # Bumped by every habit/log mutation; drives the ETags of the polled endpoints
+  data_version: Mapped[int] = mapped_column(
+      BigInteger, default=0, server_default="0", nullable=False)
+  # Set alongside data_version; lets nightly jobs visit only recently changed users
+  data_updated_at: Mapped[datetime | None] = mapped_column(
+      DateTime(timezone=True), nullable=True, index=True)
 
   habits = relationship("Habit", back_populates="user",
-                        cascade="all, delete-orphan")
+                        cascade="all, delete-orphan", passive_deletes=True)
   badges = relationship("Badge", back_populates="user",
                         cascade="all, delete-orphan")
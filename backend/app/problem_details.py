@@ -4,7 +4,7 @@ from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 
-def problem_response(status: int, title: str, detail: str | None = None, type_: str | None = None):
+def problem_response(status: int, title: str, detail: str | None = None, type_: str | None = None, headers: dict | None = None):
   body = {
     "type": type_ or "about:blank",
     "title": title,
@@ -12,13 +12,14 @@ def problem_response(status: int, title: str, detail: str | None = None, type_:
   }
   if detail:
     body["detail"] = detail
-  return JSONResponse(status_code=status, content=body)
+  return JSONResponse(status_code=status, content=body, headers=headers)
 
 
 def install_problem_handlers(app: FastAPI) -> None:
   @app.exception_handler(StarletteHTTPException)
   async def http_exc_handler(request: Request, exc: StarletteHTTPException):
-    return problem_response(exc.status_code, exc.detail or "HTTP Error")
+    # Keep headers such as Retry-After and WWW-Authenticate
+    return problem_response(exc.status_code, exc.detail or "HTTP Error", headers=getattr(exc, "headers", None))
 
   @app.exception_handler(RequestValidationError)
   async def validation_exc_handler(request: Request, exc: RequestValidationError):
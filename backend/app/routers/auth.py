@@ -1,30 +1,37 @@
-import requests
-
 from fastapi import APIRouter, Depends, HTTPException, Response, Request, status
-from fastapi_limiter.depends import RateLimiter
 from app.core.config import settings
+from app.core.rate_limit import auth_rate_limit
+from app.core.google_auth import GoogleRequestError, exchange_code, verify_google_id_token
 from sqlalchemy.orm import Session
 
 from app.middleware.verify_token import verify_token
-from app.core.security import create_access_token, verify_password, hash_password
+from app.core.security import create_access_token, verify_password, verify_and_update_password, hash_password
+from app.core.user_cache import user_cache
 from app.db.session import get_db
 from app.lib.get_or_create_user import get_or_create_user
 from app.models.user import Provider, User
 from app.schemas.auth import GoogleLoginRequest, LoginRequest, ChangePasswordRequest, RegisterRequest, SetupPasswordPayload, UploadProfileRequest
 from app.schemas.user import UserOut
 from app.services.setup_initial_habits import setup_initial_habits, has_existing_habits
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 
 router = APIRouter()
 
 
-@router.post("/login", response_model=dict)
+@router.post("/login", response_model=dict, dependencies=[Depends(auth_rate_limit)])
 def login(payload: LoginRequest, response: Response, db: Session = Depends(get_db)):
   user = db.query(User).filter(User.email == payload.email).first()
-  if not user or not verify_password(payload.password, user.password_hash):
+  if not user:
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+  valid, new_hash = verify_and_update_password(payload.password, user.password_hash)
+  if not valid:
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+  if new_hash:
+    # Transparently upgrade hashes made with an older cost factor
+    user.password_hash = new_hash
+    db.commit()
 
   token = create_access_token(str(user.id))
 
@@ -83,7 +90,7 @@ def logout(response: Response):
   return {"message": "Successfully logged out"}
 
 
-@router.post("/change-password")
+@router.post("/change-password", dependencies=[Depends(auth_rate_limit)])
 def change_password(payload: ChangePasswordRequest, db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
   user = db.query(User).filter(User.id == current_user.id).first()
 
@@ -92,10 +99,11 @@ def change_password(payload: ChangePasswordRequest, db: Session = Depends(get_db
         status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
   user.password_hash = hash_password(payload.newPassword)
   db.commit()
+  user_cache.invalidate(user.id)
   return {"message": "password update success"}
 
 
-@router.post("/register", response_model=dict)
+@router.post("/register", response_model=dict, dependencies=[Depends(auth_rate_limit)])
 def register(payload: RegisterRequest, response: Response, db: Session = Depends(get_db)):
   user = db.query(User).filter(User.email == payload.email).first()
 
@@ -105,11 +113,11 @@ def register(payload: RegisterRequest, response: Response, db: Session = Depends
   new_user = User(name=payload.name, email=payload.email, password_hash=hash_password(
       payload.password), provider=Provider.email)
   db.add(new_user)
-  db.commit()
-  db.refresh(new_user)
+  db.flush()
 
-  # Create demo habits for new user
-  setup_initial_habits(str(new_user.id), db)
+  # Create demo habits for new user, in the same transaction
+  setup_initial_habits(new_user.id, db)
+  db.commit()
 
   token = create_access_token(str(new_user.id))
 
@@ -146,11 +154,12 @@ def update_profile(payload: UploadProfileRequest, db: Session = Depends(get_db),
 
   user.name = payload.name
   db.commit()
+  user_cache.invalidate(user.id)
   db.refresh(user)
   return {"name": user.name}
 
 
-@router.post("/google", response_model=dict)
+@router.post("/google", response_model=dict, dependencies=[Depends(auth_rate_limit)])
 def google_auth(payload: GoogleLoginRequest, request: Request, response: Response, db: Session = Depends(get_db)):
   try:
     # Check required environment variables
@@ -165,25 +174,10 @@ def google_auth(payload: GoogleLoginRequest, request: Request, response: Respons
     #     f"Env vars - client_id: {bool(client_id)}, client_secret: {bool(client_secret)}, redirect_uri: {bool(redirect_uri)}")
 
     # Exchange authorization code for tokens
-    token_url = "https://oauth2.googleapis.com/token"
-    token_data = {
-        "client_id": settings.google_client_id,
-        "client_secret": settings.google_client_secret,
-        "code": payload.code,
-        "grant_type": "authorization_code",
-        "redirect_uri": redirect_uri
-    }
+    tokens = exchange_code(payload.code, redirect_uri)
 
-    token_response = requests.post(token_url, data=token_data)
-    token_response.raise_for_status()
-    tokens = token_response.json()
-
-    # Verify the ID token
-    idinfo = id_token.verify_oauth2_token(
-        tokens["id_token"],
-        google_requests.Request(),
-        settings.google_client_id
-    )
+    # Verify the ID token against the cached Google certificates
+    idinfo = verify_google_id_token(tokens["id_token"], settings.google_client_id)
 
     # Extract user information
     user_id = idinfo["sub"]
@@ -194,8 +188,9 @@ def google_auth(payload: GoogleLoginRequest, request: Request, response: Respons
     user = get_or_create_user(db, user_id, user_name, user_email, user_picture)
 
     # Create demo habits for new Google users (check if they have existing habits)
-    if not has_existing_habits(str(user.id), db):
-      setup_initial_habits(str(user.id), db)
+    if not has_existing_habits(user.id, db):
+      setup_initial_habits(user.id, db)
+    db.commit()
 
     token = create_access_token(str(user.id))
 
@@ -220,7 +215,7 @@ def google_auth(payload: GoogleLoginRequest, request: Request, response: Respons
         })
     }
 
-  except requests.exceptions.RequestException as e:
+  except GoogleRequestError as e:
     raise HTTPException(
         status_code=400, detail=f"Google OAuth request failed: {str(e)}")
   except Exception as e:
@@ -228,7 +223,7 @@ def google_auth(payload: GoogleLoginRequest, request: Request, response: Respons
         status_code=500, detail=f"Authentication failed: {str(e)}")
 
 
-@router.post("/setup-password")
+@router.post("/setup-password", dependencies=[Depends(auth_rate_limit)])
 def setup_password(payload: SetupPasswordPayload, db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
   user = db.query(User).filter(User.id == current_user.id).first()
   if not user:
@@ -237,5 +232,6 @@ def setup_password(payload: SetupPasswordPayload, db: Session = Depends(get_db),
   user.password_hash = hash_password(payload.password)
   user.has_password = True
   db.commit()
+  user_cache.invalidate(user.id)
   db.refresh(user)
   return {"message": "password setup success"}
@@ -1,18 +1,69 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.middleware.verify_token import verify_token
-from app.db.session import get_db
-from app.models.user import User
+from app.core.response_cache import cached_response, cached_response_async
+from app.middleware.etag import daily_etag, daily_etag_async
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+from app.db.async_session import get_async_db
+from app.db.session import get_read_db
 from app.models.habit import Habit
 from app.models.habit_log import HabitLog
+from app.models.habit_log_archive import HabitLogArchive
+from app.models.habit_log_month import HabitLogMonth
 from app.schemas.badge import BadgesResponse, BadgeCategory, Badge as BadgeSchema, BadgeStatus, BadgeCategoryEnum, BadgeProgress
 from app.models.badge import Badge, BadgeCategoryEnum as ModelBadgeCategoryEnum
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, or_, select, union_all
 
 router = APIRouter()
+# Async-driver variants, mounted ahead of `router` when async_db_enabled is set
+async_router = APIRouter()
+
+
+def _consecutive_log_days(db: Session, user_id: uuid.UUID, days: int, *criteria, having=None) -> int:
+  """Number of days in a row, ending today and capped at `days`, with a matching log"""
+  today = datetime.now().date()
+  q = db.query(HabitLog.date).join(Habit).filter(
+      Habit.user_id == user_id,
+      HabitLog.date > today - timedelta(days=days),
+      HabitLog.date <= today,
+      *criteria
+  ).group_by(HabitLog.date)
+  if having is not None:
+    q = q.having(having)
+  logged_dates = {row.date for row in q}
+
+  consecutive_days = 0
+  while consecutive_days < days and today - timedelta(days=consecutive_days) in logged_dates:
+    consecutive_days += 1
+  return consecutive_days
+
+
+def _logged_quantity(db: Session, user_id: uuid.UUID, *criteria, count: bool = False) -> int:
+  """Lifetime logged quantity of the user's matching habits, compacted logs included; with `count`, a non-zero row count instead"""
+  logged = union_all(
+      select(HabitLog.habit_id, HabitLog.quantity),
+      select(HabitLogMonth.habit_id, HabitLogMonth.total_quantity),
+  ).subquery()
+  total = func.count() if count else func.sum(logged.c.quantity)
+  return db.scalar(
+      select(total).select_from(logged).join(Habit, Habit.id == logged.c.habit_id)
+      .where(Habit.user_id == user_id, *criteria)
+  ) or 0
+
+
+def _logs_by_hour(db: Session, user_id: uuid.UUID, hour_matches) -> int:
+  """Number of the user's logs, archived ones included, whose log time matches `hour_matches`"""
+  logged = union_all(
+      select(HabitLog.habit_id, HabitLog.created_at),
+      select(HabitLogArchive.habit_id, HabitLogArchive.created_at),
+  ).subquery()
+  return db.scalar(
+      select(func.count()).select_from(logged).join(Habit, Habit.id == logged.c.habit_id)
+      .where(Habit.user_id == user_id, hour_matches(func.extract('hour', logged.c.created_at)))
+  ) or 0
 
 
 def get_badge_progress(user_id: uuid.UUID, badge_id: str, db: Session) -> dict | None:
@@ -22,45 +73,22 @@ def get_badge_progress(user_id: uuid.UUID, badge_id: str, db: Session) -> dict |
     return {"current": min(habit_count, 1), "target": 1} if habit_count > 0 else None
 
   elif badge_id == "first_log":
-    log_count = db.query(HabitLog).join(
-        Habit).filter(Habit.user_id == user_id).count()
+    log_count = _logged_quantity(db, user_id, count=True)
     return {"current": min(log_count, 1), "target": 1} if log_count > 0 else None
 
   elif badge_id == "week_warrior":
     # Check for 7 consecutive days of logging
-    today = datetime.now().date()
-    consecutive_days = 0
-    for i in range(7):
-      check_date = today - timedelta(days=i)
-      has_log = db.query(HabitLog).join(Habit).filter(
-          and_(Habit.user_id == user_id, HabitLog.date == check_date)
-      ).first()
-      if has_log:
-        consecutive_days += 1
-      else:
-        break
+    consecutive_days = _consecutive_log_days(db, user_id, 7)
     return {"current": consecutive_days, "target": 7} if consecutive_days > 0 else None
 
   elif badge_id == "streak_master":
     # Check for 30-day streak
-    today = datetime.now().date()
-    consecutive_days = 0
-    for i in range(30):
-      check_date = today - timedelta(days=i)
-      has_log = db.query(HabitLog).join(Habit).filter(
-          and_(Habit.user_id == user_id, HabitLog.date == check_date)
-      ).first()
-      if has_log:
-        consecutive_days += 1
-      else:
-        break
+    consecutive_days = _consecutive_log_days(db, user_id, 30)
     return {"current": consecutive_days, "target": 30} if consecutive_days > 0 else None
 
   elif badge_id == "workout_warrior":
     # Count workout habit logs (sum of quantities)
-    workout_logs = db.query(func.sum(HabitLog.quantity)).join(Habit).filter(
-        and_(Habit.user_id == user_id, Habit.category == "fitness")
-    ).scalar() or 0
+    workout_logs = _logged_quantity(db, user_id, Habit.category == "fitness")
     return {"current": workout_logs, "target": 50} if workout_logs > 0 else None
 
   elif badge_id == "sharing_champion":
@@ -69,42 +97,22 @@ def get_badge_progress(user_id: uuid.UUID, badge_id: str, db: Session) -> dict |
 
   elif badge_id == "perfect_week":
     # Check for 7 consecutive days of completing all habits
-    today = datetime.now().date()
-    consecutive_days = 0
-    for i in range(7):
-      check_date = today - timedelta(days=i)
-      # Check if all habits were completed on this day
-      user_habits = db.query(Habit).filter(Habit.user_id == user_id).all()
-      if not user_habits:
-        break
-      all_completed = True
-      for habit in user_habits:
-        has_log = db.query(HabitLog).filter(
-            and_(HabitLog.habit_id == habit.id, HabitLog.date == check_date)
-        ).first()
-        if not has_log:
-          all_completed = False
-          break
-      if all_completed:
-        consecutive_days += 1
-      else:
-        break
+    habit_count = db.query(Habit).filter(Habit.user_id == user_id).count()
+    if not habit_count:
+      return None
+    # A day counts when every habit has a log on it
+    consecutive_days = _consecutive_log_days(
+        db, user_id, 7, having=func.count(func.distinct(HabitLog.habit_id)) >= habit_count)
     return {"current": consecutive_days, "target": 7} if consecutive_days > 0 else None
 
   elif badge_id == "early_bird":
     # Check for logging before 7 AM
-    early_logs = db.query(HabitLog).join(Habit).filter(
-        and_(Habit.user_id == user_id, func.extract(
-            'hour', HabitLog.created_at) < 7)
-    ).count()
+    early_logs = _logs_by_hour(db, user_id, lambda hour: hour < 7)
     return {"current": min(early_logs, 5), "target": 5} if early_logs > 0 else None
 
   elif badge_id == "night_owl":
     # Check for logging after 10 PM
-    night_logs = db.query(HabitLog).join(Habit).filter(
-        and_(Habit.user_id == user_id, func.extract(
-            'hour', HabitLog.created_at) >= 22)
-    ).count()
+    night_logs = _logs_by_hour(db, user_id, lambda hour: hour >= 22)
     return {"current": min(night_logs, 5), "target": 5} if night_logs > 0 else None
 
   elif badge_id == "habit_creator":
@@ -114,63 +122,41 @@ def get_badge_progress(user_id: uuid.UUID, badge_id: str, db: Session) -> dict |
 
   elif badge_id == "cardio_king":
     # Count cardio habit logs
-    cardio_logs = db.query(func.sum(HabitLog.quantity)).join(Habit).filter(
-        and_(Habit.user_id == user_id, Habit.category == "fitness",
-             func.lower(Habit.title).contains("cardio"))
-    ).scalar() or 0
+    cardio_logs = _logged_quantity(
+        db, user_id, Habit.category == "fitness", func.lower(Habit.title).contains("cardio"))
     return {"current": cardio_logs, "target": 30} if cardio_logs > 0 else None
 
   elif badge_id == "flexibility_master":
     # Count flexibility habit logs
-    flexibility_logs = db.query(func.sum(HabitLog.quantity)).join(Habit).filter(
-        and_(Habit.user_id == user_id,
-             or_(func.lower(Habit.title).contains("stretch"),
-                 func.lower(Habit.title).contains("yoga"),
-                 func.lower(Habit.title).contains("flexibility")))
-    ).scalar() or 0
+    flexibility_logs = _logged_quantity(
+        db, user_id,
+        or_(func.lower(Habit.title).contains("stretch"),
+            func.lower(Habit.title).contains("yoga"),
+            func.lower(Habit.title).contains("flexibility")))
     return {"current": flexibility_logs, "target": 20} if flexibility_logs > 0 else None
 
   elif badge_id == "meditation_master":
     # Count meditation minutes (assuming quantity represents minutes)
-    meditation_minutes = db.query(func.sum(HabitLog.quantity)).join(Habit).filter(
-        and_(Habit.user_id == user_id,
-             or_(func.lower(Habit.title).contains("meditation"),
-                 func.lower(Habit.title).contains("mindfulness")))
-    ).scalar() or 0
+    meditation_minutes = _logged_quantity(
+        db, user_id,
+        or_(func.lower(Habit.title).contains("meditation"),
+            func.lower(Habit.title).contains("mindfulness")))
     return {"current": meditation_minutes, "target": 100} if meditation_minutes > 0 else None
 
   elif badge_id == "hydration_hero":
     # Check for 14 consecutive days of hydration
-    today = datetime.now().date()
-    consecutive_days = 0
-    for i in range(14):
-      check_date = today - timedelta(days=i)
-      has_log = db.query(HabitLog).join(Habit).filter(
-          and_(Habit.user_id == user_id, HabitLog.date == check_date,
-               or_(func.lower(Habit.title).contains("water"),
-                   func.lower(Habit.title).contains("hydration")))
-      ).first()
-      if has_log:
-        consecutive_days += 1
-      else:
-        break
+    consecutive_days = _consecutive_log_days(
+        db, user_id, 14,
+        or_(func.lower(Habit.title).contains("water"),
+            func.lower(Habit.title).contains("hydration")))
     return {"current": consecutive_days, "target": 14} if consecutive_days > 0 else None
 
   elif badge_id == "sleep_champion":
     # Check for 21 consecutive days of sleep tracking
-    today = datetime.now().date()
-    consecutive_days = 0
-    for i in range(21):
-      check_date = today - timedelta(days=i)
-      has_log = db.query(HabitLog).join(Habit).filter(
-          and_(Habit.user_id == user_id, HabitLog.date == check_date,
-               or_(func.lower(Habit.title).contains("sleep"),
-                   func.lower(Habit.title).contains("bedtime")))
-      ).first()
-      if has_log:
-        consecutive_days += 1
-      else:
-        break
+    consecutive_days = _consecutive_log_days(
+        db, user_id, 21,
+        or_(func.lower(Habit.title).contains("sleep"),
+            func.lower(Habit.title).contains("bedtime")))
     return {"current": consecutive_days, "target": 21} if consecutive_days > 0 else None
 
   elif badge_id == "motivator":
@@ -195,10 +181,19 @@ def get_badge_status(progress: dict | None, badge_id: str) -> BadgeStatus:
     return BadgeStatus.in_progress
 
 
-@router.get("/", response_model=BadgesResponse)
-def get_badges(db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+@router.get("/", response_model=BadgesResponse, dependencies=[Depends(daily_etag)])
+def get_badges(request: Request, db: Session = Depends(get_read_db), current_user: TokenClaims = Depends(verify_token_claims)):
   """Get all badges for the current user with progress and status"""
+  return cached_response(request, lambda: _get_badges(db, current_user.id))
+
+
+@async_router.get("/", response_model=BadgesResponse, dependencies=[Depends(daily_etag_async)])
+async def get_badges_async(request: Request, db: AsyncSession = Depends(get_async_db), current_user: TokenClaims = Depends(verify_token_claims)):
+  """Get all badges for the current user with progress and status"""
+  return await cached_response_async(request, lambda: db.run_sync(_get_badges, current_user.id))
+
 
+def _get_badges(db: Session, user_id: uuid.UUID) -> BadgesResponse:
   # Get all badge templates from database
   badge_templates = db.query(Badge).filter(Badge.user_id.is_(None)).all()
 
@@ -207,7 +202,7 @@ def get_badges(db: Session = Depends(get_db), current_user: User = Depends(verif
   earned_count = 0
 
   for badge_template in badge_templates:
-    progress = get_badge_progress(current_user.id, badge_template.badge_id, db)
+    progress = get_badge_progress(user_id, badge_template.badge_id, db)
     status = get_badge_status(progress, badge_template.badge_id)
 
     if status == BadgeStatus.earned:
@@ -0,0 +1,44 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+from app.db.session import get_read_db
+from app.services.export_service import iter_export_records, iter_ndjson, iter_csv, iter_gzip
+
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+@router.get("")
+def export_data(
+    format: Literal["ndjson", "csv"] = Query(
+        default="ndjson", description="Output format"),
+    gzip: bool = Query(default=False, description="Compress the stream with gzip"),
+    db: Session = Depends(get_read_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
+):
+  """Stream every habit, log and completion of the current user"""
+  # db stays open while the body streams: FastAPI >= 0.118 closes yield dependencies after the response
+  records = iter_export_records(db, current_user.id)
+  body = iter_ndjson(records) if format == "ndjson" else iter_csv(records)
+
+  filename = f"habit-tracker-export.{format}"
+  media_type = MEDIA_TYPES[format]
+  if gzip:
+    body = iter_gzip(body)
+    filename += ".gz"
+    media_type = "application/gzip"
+
+  return StreamingResponse(
+      body,
+      media_type=media_type,
+      headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+  )
@@ -1,36 +1,39 @@
+from datetime import UTC, datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, Path
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.middleware.verify_token import verify_token
-from app.db.session import get_db
+from app.core.fast_json import json_response
+
+from app.middleware.etag import etag
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+from app.db.session import get_db, get_read_db
 from app.models.habit import Habit, Frequency, Category
-from app.models.user import User
-from app.schemas.habit import HabitOut, HabitCreate, HabitUpdate
-from app.services.completion_service import recalculate_habit_completions, update_habit_completions_for_new_target
+from app.schemas.habit import HabitOut, HabitCreate, HabitRow, HabitTemplateOut, HabitTemplatesAdd, HabitUpdate
+from app.services.completion_service import recalculate_habit_completions, set_habit_target
+from app.services.data_version import bump_data_version
+from app.services.habit_purge import needs_background_purge, purge_habit_in_background
+from app.services.habit_templates import add_habits_from_templates, template_catalogue
 
 
 router = APIRouter()
 
+# Selected in HabitRow's field order for the fast list path
+HABIT_ROW_COLUMNS = (Habit.id, Habit.user_id, Habit.title, Habit.frequency, Habit.target,
+                     Habit.category, Habit.description, Habit.created_at)
+
 
-@router.get("", response_model=list[HabitOut])
-def list_habits(db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
-  habits = db.query(Habit).filter(
-      Habit.user_id == current_user.id).order_by(Habit.created_at.desc()).all()
-  return [HabitOut(**{
-      "id": str(h.id),
-      "user_id": str(h.user_id),
-      "title": h.title,
-      "frequency": h.frequency.value,
-      "target": h.target,
-      "category": h.category.value,
-      "description": h.description,
-      "created_at": h.created_at,
-  }) for h in habits]
+@router.get("", response_model=list[HabitOut], dependencies=[Depends(etag)])
+def list_habits(response: Response, db: Session = Depends(get_read_db), current_user: TokenClaims = Depends(verify_token_claims)):
+  rows = db.execute(
+      select(*HABIT_ROW_COLUMNS).where(Habit.user_id == current_user.id).order_by(Habit.created_at.desc())
+  ).mappings()
+  return json_response(list[HabitRow], [dict(row) for row in rows], response)
 
 
 @router.post("", response_model=HabitOut, status_code=201)
-def create_habit(payload: HabitCreate, db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+def create_habit(payload: HabitCreate, db: Session = Depends(get_db), current_user: TokenClaims = Depends(verify_token_claims)):
   try:
     freq = Frequency(payload.frequency)
   except ValueError:
@@ -44,6 +47,7 @@ def create_habit(payload: HabitCreate, db: Session = Depends(get_db), current_us
   habit = Habit(user_id=current_user.id, title=payload.title, frequency=freq,
                 target=payload.target, category=category, description=payload.description)
   db.add(habit)
+  bump_data_version(db, current_user.id)
   db.commit()
   db.refresh(habit)
   return HabitOut(**{
@@ -58,9 +62,49 @@ def create_habit(payload: HabitCreate, db: Session = Depends(get_db), current_us
   })
 
 
+@router.get("/templates", response_model=list[HabitTemplateOut])
+def list_habit_templates(current_user: TokenClaims = Depends(verify_token_claims)):
+  """Habit templates that can be added with POST /habits/templates"""
+  return [
+      HabitTemplateOut(**template._asdict() | {
+          "category": template.category.value,
+          "frequency": template.frequency.value,
+      })
+      for template in template_catalogue().values()
+  ]
+
+
+@router.post("/templates", response_model=list[HabitOut], status_code=201)
+def add_habit_templates(payload: HabitTemplatesAdd, db: Session = Depends(get_db),
+                        current_user: TokenClaims = Depends(verify_token_claims)):
+  """Create habits from the chosen templates with one INSERT"""
+  catalogue = template_catalogue()
+  unknown = [template_id for template_id in payload.template_ids if template_id not in catalogue]
+  if unknown:
+    raise HTTPException(status_code=422, detail=f"Unknown habit templates: {', '.join(unknown)}")
+
+  # Each template at most once, in the order given
+  rows = add_habits_from_templates(db, current_user.id, list(dict.fromkeys(payload.template_ids)))
+  bump_data_version(db, current_user.id)
+  db.commit()
+  return [
+      HabitOut(**{
+          "id": str(row["id"]),
+          "user_id": str(row["user_id"]),
+          "title": row["title"],
+          "frequency": row["frequency"].value,
+          "target": row["target"],
+          "category": row["category"].value,
+          "description": row["description"],
+          "created_at": row["created_at"],
+      })
+      for row in rows
+  ]
+
+
 @router.get("/{habit_id}", response_model=HabitOut)
 def get_habit(
-        habit_id: UUID = Path(..., description="Habit ID (UUID)"), db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+        habit_id: UUID = Path(..., description="Habit ID (UUID)"), db: Session = Depends(get_read_db), current_user: TokenClaims = Depends(verify_token_claims)):
   habit = db.query(Habit).filter(Habit.id == habit_id,
                                  Habit.user_id == current_user.id).first()
   if not habit:
@@ -78,20 +122,16 @@ def get_habit(
 
 
 @router.put("/{habit_id}", response_model=HabitOut)
-def update_habit(habit_id: str, payload: HabitUpdate, db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+def update_habit(habit_id: str, payload: HabitUpdate, db: Session = Depends(get_db), current_user: TokenClaims = Depends(verify_token_claims)):
   habit = db.query(Habit).filter(Habit.id == UUID(
       habit_id), Habit.user_id == current_user.id).first()
   if not habit:
     raise HTTPException(status_code=404, detail="Habit not found")
-  # Track if target changed for completion recalculation
-  target_changed = False
-
   if payload.title is not None:
     habit.title = payload.title
-  if payload.target is not None:
-    if habit.target != payload.target:
-      target_changed = True
-    habit.target = payload.target
+  if payload.target is not None and habit.target != payload.target:
+    # Appends to the target history and re-evaluates today's completion
+    set_habit_target(db, habit, payload.target)
   if payload.category is not None:
     try:
       habit.category = Category(payload.category)
@@ -100,21 +140,9 @@ def update_habit(habit_id: str, payload: HabitUpdate, db: Session = Depends(get_
   if payload.description is not None:
     habit.description = payload.description
 
+  bump_data_version(db, current_user.id)
   db.commit()
   db.refresh(habit)
-
-  # Update completions if target changed
-  if target_changed:
-    try:
-      # Use the new function that preserves historical accuracy
-      update_habit_completions_for_new_target(db, habit.id, habit.target)
-      db.commit()
-    except Exception as e:
-      # Log error but don't fail the update
-      print(
-          f"Warning: Failed to update completions for habit {habit.id}: {e}")
-      db.rollback()
-      db.commit()  # Still save the habit update
   return HabitOut(**{
       "id": str(habit.id),
       "user_id": str(habit.user_id),
@@ -128,11 +156,19 @@ def update_habit(habit_id: str, payload: HabitUpdate, db: Session = Depends(get_
 
 
 @router.delete("/{habit_id}", status_code=204)
-def delete_habit(habit_id: str, db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+def delete_habit(habit_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db),
+                 current_user: TokenClaims = Depends(verify_token_claims)):
   habit = db.query(Habit).filter(Habit.id == UUID(habit_id),
                                  Habit.user_id == current_user.id).first()
   if not habit:
     raise HTTPException(status_code=404, detail="Habit not found")
-  db.delete(habit)
+  if needs_background_purge(db, habit.id):
+    # Hidden from now on; its history is deleted in batches after the response
+    habit.deleted_at = datetime.now(UTC)
+    background_tasks.add_task(purge_habit_in_background, db.get_bind(), habit.id)
+  else:
+    # Child rows go through ON DELETE CASCADE
+    db.delete(habit)
+  bump_data_version(db, current_user.id)
   db.commit()
   return None
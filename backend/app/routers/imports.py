@@ -0,0 +1,29 @@
+from dataclasses import asdict
+from typing import Literal
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+from app.db.session import get_db
+from app.schemas.log_import import ImportResultOut
+from app.services.log_import import iter_import_rows, import_logs
+
+
+router = APIRouter()
+
+
+@router.post("/logs", response_model=ImportResultOut)
+def import_habit_logs(
+    file: UploadFile = File(..., description="CSV or NDJSON file of habit logs"),
+    format: Literal["ndjson", "csv"] = Query(
+        default="ndjson", description="Upload format"),
+    start_row: int = Query(
+        default=0, ge=0, description="Resume after this row (last_committed_row of a failed import)"),
+    db: Session = Depends(get_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
+):
+  """Bulk import historical habit logs, parsing the upload incrementally"""
+  rows = iter_import_rows(file.file, format)
+  result = import_logs(db, current_user.id, rows, start_row=start_row)
+  return ImportResultOut(**asdict(result))
@@ -3,28 +3,43 @@ from datetime import date, datetime, timedelta
 from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi_limiter.depends import RateLimiter
 from app.core.config import settings
-from sqlalchemy import func, and_, desc
+from sqlalchemy import func, and_, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.middleware.verify_token import verify_token
-from app.db.session import get_db
+from app.core.fast_json import json_response
+from app.core.rate_limit import log_write_rate_limit
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+from app.db.async_session import get_async_db
+from app.db.session import get_db, get_read_db
 from app.models.habit import Habit
 from app.models.habit_log import HabitLog
-from app.models.user import User
-from app.schemas.habit_log import HabitLogCreate, HabitLogOut
+from app.schemas.habit_log import HabitLogCreate, HabitLogOut, HabitLogRow
 from app.schemas.stats import TodayHabitLog
 from app.services.completion_service import update_habit_completion
+from app.services.data_version import bump_data_version
+from app.services.log_compaction import compacted_daily_totals, compaction_cutoff
 
 
 router = APIRouter()
+# Async-driver variants, mounted ahead of `router` when async_db_enabled is set
+async_router = APIRouter()
 
 
-@router.post("/{habit_id}/log", response_model=HabitLogOut)
-def create_log(habit_id: str, payload: HabitLogCreate, db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+@router.post("/{habit_id}/log", response_model=HabitLogOut, dependencies=[Depends(log_write_rate_limit)])
+def create_log(habit_id: str, payload: HabitLogCreate, db: Session = Depends(get_db), current_user: TokenClaims = Depends(verify_token_claims)):
+  return _create_log(db, current_user.id, habit_id, payload)
+
+
+@async_router.post("/{habit_id}/log", response_model=HabitLogOut, dependencies=[Depends(log_write_rate_limit)])
+async def create_log_async(habit_id: str, payload: HabitLogCreate, db: AsyncSession = Depends(get_async_db), current_user: TokenClaims = Depends(verify_token_claims)):
+  return await db.run_sync(_create_log, current_user.id, habit_id, payload)
+
+
+def _create_log(db: Session, user_id: UUID, habit_id: str, payload: HabitLogCreate) -> HabitLogOut:
   habit = db.query(Habit).filter(Habit.id == UUID(
-      habit_id), Habit.user_id == current_user.id).first()
+      habit_id), Habit.user_id == user_id).first()
 
   if not habit:
     raise HTTPException(status_code=404, detail="Habit not found")
@@ -35,6 +50,9 @@ def create_log(habit_id: str, payload: HabitLogCreate, db: Session = Depends(get
 
   # Calculate total quantity after adding new quantity
   current_quantity = existing.quantity if existing else 0
+  if log_date < compaction_cutoff():
+    # Late log on a day whose earlier logs may sit in a monthly summary
+    current_quantity += sum(row.quantity for row in compacted_daily_totals(db, [habit.id], log_date, log_date))
   new_total_quantity = current_quantity + payload.quantity
 
   # Check if new total would exceed the habit's target
@@ -55,6 +73,7 @@ def create_log(habit_id: str, payload: HabitLogCreate, db: Session = Depends(get
 
     # Update completion status for this date
     update_habit_completion(db, habit.id, log_date)
+    bump_data_version(db, user_id)
     db.commit()
 
     return HabitLogOut(**{
@@ -73,6 +92,7 @@ def create_log(habit_id: str, payload: HabitLogCreate, db: Session = Depends(get
 
     # Update completion status for this date
     update_habit_completion(db, habit.id, log_date)
+    bump_data_version(db, user_id)
     db.commit()
 
     return HabitLogOut(**{
@@ -85,19 +105,27 @@ def create_log(habit_id: str, payload: HabitLogCreate, db: Session = Depends(get
 
 
 @router.get("/", response_model=list[HabitLogOut])
-def list_logs(habit_id: str = Query(..., description="Habit ID"), date: date | None = Query(default=None, description="Filter by date"), db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+def list_logs(habit_id: str = Query(..., description="Habit ID"), date: date | None = Query(default=None, description="Filter by date"), db: Session = Depends(get_read_db), current_user: TokenClaims = Depends(verify_token_claims)):
+  return json_response(list[HabitLogRow], _list_logs(db, current_user.id, habit_id, date))
+
+
+@async_router.get("/", response_model=list[HabitLogOut])
+async def list_logs_async(habit_id: str = Query(..., description="Habit ID"), date: date | None = Query(default=None, description="Filter by date"), db: AsyncSession = Depends(get_async_db), current_user: TokenClaims = Depends(verify_token_claims)):
+  return json_response(list[HabitLogRow], await db.run_sync(_list_logs, current_user.id, habit_id, date))
+
+
+def _list_logs(db: Session, user_id: UUID, habit_id: str, date: date | None) -> list[HabitLogRow]:
   habit = db.query(Habit).filter(Habit.id == UUID(habit_id),
-                                 Habit.user_id == current_user.id).first()
+                                 Habit.user_id == user_id).first()
 
   if not habit:
     raise HTTPException(status_code=404, detail="Habit not found")
 
-  q = db.query(HabitLog).filter(HabitLog.habit_id == habit.id)
+  q = select(HabitLog.id, HabitLog.habit_id, HabitLog.date, HabitLog.quantity, HabitLog.created_at).where(
+      HabitLog.habit_id == habit.id)
 
   if date:
-    q = q.filter(HabitLog.date == date)
+    q = q.where(HabitLog.date == date)
 
   q = q.order_by(HabitLog.date.desc())
-  logs = q.all()
-
-  return [HabitLogOut(**{"id": str(l.id), "habit_id": str(l.habit_id), "date": l.date, "quantity": l.quantity, "created_at": l.created_at}) for l in logs]
+  return [dict(row) for row in db.execute(q).mappings()]
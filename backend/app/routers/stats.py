@@ -1,79 +1,108 @@
+import heapq
 import uuid
-from datetime import date, datetime, timedelta
+from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-
-from app.middleware.verify_token import verify_token
-from app.db.session import get_db
+from sqlalchemy import case, func, and_, or_, desc, select, true
+
+from app.core.response_cache import cached_response, cached_response_async
+from app.middleware.etag import daily_etag, daily_etag_async
+from app.middleware.verify_token import TokenClaims, verify_token_claims
+from app.db.async_session import get_async_db
+from app.db.session import get_read_db
+from app.lib.calendar import period_bounds, period_starts
+from app.models.date_dim import DateDim
 from app.models.habit import Habit
 from app.models.habit_log import HabitLog
 from app.models.habit_completion import HabitCompletion
-from app.models.user import User
-from app.schemas.stats import TodayHabitLog, DailyLogCount, HabitStats, HabitDailyProgress, DayLogs, HabitLogEntry
+from app.models.habit_log_month import HabitLogMonth
+from app.models.habit_target_history import HabitTargetHistory
+from app.schemas.stats import TodayHabitLog, DailyLogCount, HabitStats, HabitDailyProgress, DayLogs, DayLogsRow, HabitLogEntry
 from app.services.completion_service import get_habit_streak_from_completions, get_habit_completion_stats
+from app.services.log_compaction import expand_months
+from app.services.target_history import in_effect
 
 router = APIRouter()
+# Async-driver variants, mounted ahead of `router` when async_db_enabled is set
+async_router = APIRouter()
 
 
-@router.get("/overview/calendar", response_model=list[DayLogs])
-def overview(db: Session = Depends(get_db), current_user: User = Depends(verify_token)):
+@router.get("/overview/calendar", response_model=list[DayLogs], dependencies=[Depends(daily_etag)])
+def overview(request: Request, db: Session = Depends(get_read_db), current_user: TokenClaims = Depends(verify_token_claims)):
   """Get comprehensive overview of all habit logs grouped by date"""
-  # Get all habits for the user
-  habits = db.query(Habit).filter(Habit.user_id == current_user.id).all()
-  habit_ids = [h.id for h in habits]
+  return cached_response(request, lambda: _overview(db, current_user.id), list[DayLogsRow])
 
-  if not habit_ids:
-    return []
 
-  # Get all logs for user's habits, ordered by date and created_at
-  logs = db.query(HabitLog).filter(
-      HabitLog.habit_id.in_(habit_ids)
-  ).order_by(HabitLog.date.desc(), HabitLog.created_at.desc()).all()
-
-  # Group logs by date
-  logs_by_date = {}
-  for log in logs:
-    log_date = log.date
-    if log_date not in logs_by_date:
-      logs_by_date[log_date] = []
-
-    # Find the habit for this log
-    habit = next((h for h in habits if h.id == log.habit_id), None)
-    if habit:
-      logs_by_date[log_date].append({
-          'habit_id': str(log.habit_id),
-          'habit_title': habit.title,
-          'quantity': log.quantity,
-          'target': habit.target,
-          'logged_at': log.created_at
-      })
-
-  # Convert to the desired format
-  day_logs = []
-  total_logs = 0
-
-  for date_key in sorted(logs_by_date.keys(), reverse=True):  # Most recent first
-    habits_for_day = logs_by_date[date_key]
-    day_logs.append(DayLogs(
-        date=date_key,
-        habits=[HabitLogEntry(**habit_data) for habit_data in habits_for_day],
-        totalLogs=len(habits_for_day)
-    ))
-    total_logs += len(habits_for_day)
+@async_router.get("/overview/calendar", response_model=list[DayLogs], dependencies=[Depends(daily_etag_async)])
+async def overview_async(request: Request, db: AsyncSession = Depends(get_async_db), current_user: TokenClaims = Depends(verify_token_claims)):
+  """Get comprehensive overview of all habit logs grouped by date"""
+  return await cached_response_async(request, lambda: db.run_sync(_overview, current_user.id), list[DayLogsRow])
+
+
+def _overview(db: Session, user_id: uuid.UUID) -> list[DayLogsRow]:
+  rows = db.execute(
+      select(HabitLog.date, HabitLog.habit_id, Habit.title, HabitLog.quantity, Habit.target, HabitLog.created_at)
+      .join(Habit, Habit.id == HabitLog.habit_id)
+      .where(Habit.user_id == user_id)
+      .order_by(HabitLog.date.desc(), HabitLog.created_at.desc())
+  )
+
+  # Days rolled up into monthly summaries have no log time
+  compacted = sorted((
+      (day.date, day.habit_id, title, day.quantity, target, None)
+      for summary, title, target in db.execute(
+          select(HabitLogMonth, Habit.title, Habit.target)
+          .join(Habit, Habit.id == HabitLogMonth.habit_id)
+          .where(Habit.user_id == user_id))
+      for day in expand_months([summary])
+  ), key=lambda row: row[0], reverse=True)
+
+  # Rows arrive grouped by date, most recent first
+  day_logs: list[DayLogsRow] = []
+  for log_date, habit_id, habit_title, quantity, target, logged_at in heapq.merge(
+      rows, compacted, key=lambda row: row[0], reverse=True):
+    if not day_logs or day_logs[-1]["date"] != log_date:
+      day_logs.append({"date": log_date, "habits": [], "totalLogs": 0})
+    day = day_logs[-1]
+    day["habits"].append({
+        "habit_id": habit_id,
+        "habit_title": habit_title,
+        "quantity": quantity,
+        "target": target,
+        "logged_at": logged_at,
+    })
+    day["totalLogs"] += 1
 
   return day_logs
 
-@router.get("/{habit_id}/stats/streak", response_model=HabitStats)
+
+@router.get("/{habit_id}/stats/streak", response_model=HabitStats, dependencies=[Depends(daily_etag)])
 def get_habit_stats_streak(
+    request: Request,
+    habit_id: str,
+    db: Session = Depends(get_read_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
+):
+  """Get statistics for a specific habit using completion records."""
+  return cached_response(request, lambda: _habit_stats_streak(db, current_user.id, habit_id))
+
+
+@async_router.get("/{habit_id}/stats/streak", response_model=HabitStats, dependencies=[Depends(daily_etag_async)])
+async def get_habit_stats_streak_async(
+    request: Request,
     habit_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_token)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
 ):
   """Get statistics for a specific habit using completion records."""
+  return await cached_response_async(request, lambda: db.run_sync(_habit_stats_streak, current_user.id, habit_id))
+
+
+def _habit_stats_streak(db: Session, user_id: uuid.UUID, habit_id: str) -> HabitStats:
   habit = db.query(Habit).filter(Habit.id == uuid.UUID(
-      habit_id), Habit.user_id == current_user.id).first()
+      habit_id), Habit.user_id == user_id).first()
 
   if not habit:
     raise HTTPException(status_code=404, detail="Habit not found")
@@ -95,19 +124,37 @@ def get_habit_stats_streak(
   )
 
 
-@router.get("/{habit_id}/daily-progress", response_model=list[HabitDailyProgress])
+@router.get("/{habit_id}/daily-progress", response_model=list[HabitDailyProgress], dependencies=[Depends(daily_etag)])
 def get_habit_daily_progress(
+    request: Request,
     habit_id: str,
     days: int = Query(default=7, ge=1, le=365,
                       description="Number of days to look back"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_token)
+    db: Session = Depends(get_read_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
 ):
   """Get daily progress for a specific habit over the specified number of days using completion records.
   Shows individual days for all habit types (original behavior).
   """
+  return cached_response(request, lambda: _habit_daily_progress(db, current_user.id, habit_id, days))
+
+
+@async_router.get("/{habit_id}/daily-progress", response_model=list[HabitDailyProgress], dependencies=[Depends(daily_etag_async)])
+async def get_habit_daily_progress_async(
+    request: Request,
+    habit_id: str,
+    days: int = Query(default=7, ge=1, le=365,
+                      description="Number of days to look back"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
+):
+  """Get daily progress for a specific habit over the specified number of days using completion records."""
+  return await cached_response_async(request, lambda: db.run_sync(_habit_daily_progress, current_user.id, habit_id, days))
+
+
+def _habit_daily_progress(db: Session, user_id: uuid.UUID, habit_id: str, days: int) -> list[HabitDailyProgress]:
   habit = db.query(Habit).filter(Habit.id == uuid.UUID(
-      habit_id), Habit.user_id == current_user.id).first()
+      habit_id), Habit.user_id == user_id).first()
 
   if not habit:
     raise HTTPException(status_code=404, detail="Habit not found")
@@ -117,238 +164,164 @@ def get_habit_daily_progress(
 # use for individual habit chart
 
 
-@router.get("/{habit_id}/progress", response_model=list[HabitDailyProgress])
+@router.get("/{habit_id}/progress", response_model=list[HabitDailyProgress], dependencies=[Depends(daily_etag)])
 def get_habit_progress(
+    request: Request,
     habit_id: str,
     periods: int = Query(default=7, ge=1, le=365,
                          description="Number of periods to look back"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_token)
+    db: Session = Depends(get_read_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
 ):
   """Get progress for a specific habit over the specified number of periods using completion records.
   For daily habits: shows days
   For weekly habits: shows weeks  
   For monthly habits: shows months
   """
-  habit = db.query(Habit).filter(Habit.id == uuid.UUID(
-      habit_id), Habit.user_id == current_user.id).first()
-
-  if not habit:
-    raise HTTPException(status_code=404, detail="Habit not found")
-
-  if habit.frequency.value == "daily":
-    return _get_daily_progress(habit, periods, db)
-  elif habit.frequency.value == "weekly":
-    return _get_weekly_progress(habit, periods, db)
-  elif habit.frequency.value == "monthly":
-    return _get_monthly_progress(habit, periods, db)
-  else:
-    # Fallback to daily for unknown frequencies
-    return _get_daily_progress(habit, periods, db)
-
-
-def _get_daily_progress(habit: Habit, days: int, db: Session) -> list[HabitDailyProgress]:
-  """Get daily progress for daily habits."""
-  end_date = date.today()
-  start_date = end_date - timedelta(days=days-1)
-
-  # Get completion records for this habit in the date range
-  completions = db.query(HabitCompletion).filter(
-      and_(
-          HabitCompletion.habit_id == habit.id,
-          HabitCompletion.date >= start_date,
-          HabitCompletion.date <= end_date
-      )
-  ).all()
+  return cached_response(request, lambda: _habit_progress(db, current_user.id, habit_id, periods))
 
-  # Convert to dict for faster lookup
-  completion_dict = {comp.date: comp for comp in completions}
 
-  # Generate progress data for each day
-  result = []
-  current_date = start_date
-  while current_date <= end_date:
-    if current_date in completion_dict:
-      # Use completion record data
-      completion = completion_dict[current_date]
-      result.append(HabitDailyProgress(
-          date=current_date,
-          completed=completion.is_completed,
-          target=completion.target_at_time,
-          actual=completion.quantity_achieved,
-          effective_target=completion.target_at_time
-      ))
-    else:
-      # No completion record for this date
-      result.append(HabitDailyProgress(
-          date=current_date,
-          completed=False,
-          target=habit.target,
-          actual=0,
-          effective_target=habit.target
-      ))
-    current_date += timedelta(days=1)
-
-  return result
+@async_router.get("/{habit_id}/progress", response_model=list[HabitDailyProgress], dependencies=[Depends(daily_etag_async)])
+async def get_habit_progress_async(
+    request: Request,
+    habit_id: str,
+    periods: int = Query(default=7, ge=1, le=365,
+                         description="Number of periods to look back"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
+):
+  """Get progress for a specific habit over the specified number of periods using completion records."""
+  return await cached_response_async(request, lambda: db.run_sync(_habit_progress, current_user.id, habit_id, periods))
 
 
-def _get_weekly_progress(habit: Habit, weeks: int, db: Session) -> list[HabitDailyProgress]:
-  """Get weekly progress for weekly habits."""
-  today = date.today()
+def _habit_progress(db: Session, user_id: uuid.UUID, habit_id: str, periods: int) -> list[HabitDailyProgress]:
+  habit = db.query(Habit).filter(Habit.id == uuid.UUID(
+      habit_id), Habit.user_id == user_id).first()
 
-  # Get the Monday of the current week
-  days_since_monday = today.weekday()
-  current_week_start = today - timedelta(days=days_since_monday)
+  if not habit:
+    raise HTTPException(status_code=404, detail="Habit not found")
 
-  # Generate progress data for each week
-  result = []
-  for i in range(weeks):
-    week_start = current_week_start - timedelta(days=7 * i)
-    week_end = week_start + timedelta(days=6)
-
-    # Get completion records for this week
-    completions = db.query(HabitCompletion).filter(
-        and_(
-            HabitCompletion.habit_id == habit.id,
-            HabitCompletion.date >= week_start,
-            HabitCompletion.date <= week_end
-        )
-    ).all()
-
-    # Check if this week was completed
-    is_completed = any(comp.is_completed for comp in completions)
-
-    # Sum up quantities for this week
-    total_quantity = sum(comp.quantity_achieved for comp in completions)
-
-    # Use the most recent target (from the most recent completion record)
-    target = habit.target
-    if completions:
-      target = completions[0].target_at_time
+  return _get_period_progress(habit, habit.frequency.value, periods, db)
 
-    result.append(HabitDailyProgress(
-        date=week_start,  # Use Monday as the representative date
-        completed=is_completed,
-        target=target,
-        actual=total_quantity,
-        effective_target=target  # Target that was in effect during this week
-    ))
 
-  return result
+def _get_daily_progress(habit: Habit, days: int, db: Session) -> list[HabitDailyProgress]:
+  """Get daily progress, oldest day first."""
+  return _get_period_progress(habit, "daily", days, db)
 
 
-def _get_monthly_progress(habit: Habit, months: int, db: Session) -> list[HabitDailyProgress]:
-  """Get monthly progress for monthly habits."""
+def _get_period_progress(habit: Habit, frequency: str, periods: int, db: Session) -> list[HabitDailyProgress]:
+  """
+  Get progress per period (day, week or month) in one grouped query: date_dim
+  supplies every day, completion records their quantities and the target
+  history the target in effect at the end of the period (today for the
+  current one). Periods are represented by their first day; days run oldest
+  first, weeks and months newest first.
+  """
   today = date.today()
+  starts = period_starts(frequency, periods, today)
+  period = DateDim.period_start(frequency)
+  period_end = {"weekly": DateDim.weekday == 6, "monthly": DateDim.day == DateDim.month_end}.get(frequency, true())
+  rows = db.execute(
+      select(
+          period.label("period_start"),
+          func.max(case((HabitCompletion.is_completed, 1), else_=0)).label("completed"),
+          func.coalesce(func.sum(HabitCompletion.quantity_achieved), 0).label("actual"),
+          # Habits without target history fall back to their stored targets
+          func.coalesce(func.max(HabitTargetHistory.target), func.max(HabitCompletion.target_at_time)).label("target"))
+      .select_from(DateDim)
+      .outerjoin(HabitCompletion, and_(HabitCompletion.habit_id == habit.id, HabitCompletion.date == DateDim.day))
+      .outerjoin(HabitTargetHistory, and_(
+          in_effect(habit.id, DateDim.day),
+          or_(DateDim.day == today, and_(DateDim.day < today, period_end))))
+      .where(DateDim.day >= starts[-1], DateDim.day <= period_bounds(frequency, starts[0])[1])
+      .group_by(period)
+  ).all()
+  by_period = {row.period_start: row for row in rows}
 
-  # Generate progress data for each month
   result = []
-  for i in range(months):
-    # Calculate the month start date
-    if today.month - i <= 0:
-      month_start = today.replace(
-          year=today.year - 1, month=12 + (today.month - i), day=1)
-    else:
-      month_start = today.replace(month=today.month - i, day=1)
-
-    # Calculate the month end date
-    if month_start.month == 12:
-      month_end = month_start.replace(
-          year=month_start.year + 1, month=1, day=1) - timedelta(days=1)
-    else:
-      month_end = month_start.replace(
-          month=month_start.month + 1, day=1) - timedelta(days=1)
-
-    # Get completion records for this month
-    completions = db.query(HabitCompletion).filter(
-        and_(
-            HabitCompletion.habit_id == habit.id,
-            HabitCompletion.date >= month_start,
-            HabitCompletion.date <= month_end
-        )
-    ).all()
-
-    # Check if this month was completed
-    is_completed = any(comp.is_completed for comp in completions)
-
-    # Sum up quantities for this month
-    total_quantity = sum(comp.quantity_achieved for comp in completions)
-
-    # Use the most recent target (from the most recent completion record)
-    target = habit.target
-    if completions:
-      target = completions[0].target_at_time
-
+  for start in starts:
+    row = by_period.get(start)
+    target = row.target if row and row.target is not None else habit.target
     result.append(HabitDailyProgress(
-        date=month_start,  # Use 1st of month as the representative date
-        completed=is_completed,
+        date=start,
+        completed=bool(row and row.completed),
         target=target,
-        actual=total_quantity,
-        effective_target=target  # Target that was in effect during this month
+        actual=row.actual if row else 0,
+        effective_target=target
     ))
 
-  return result
-
-
-def get_week_start_end(today: date) -> tuple[date, date]:
-  """Get the start and end dates of the week containing the given date."""
-  # Get Monday of the current week
-  days_since_monday = today.weekday()
-  week_start = today - timedelta(days=days_since_monday)
-  week_end = week_start + timedelta(days=6)
-  return week_start, week_end
-
-
-def get_month_start_end(today: date) -> tuple[date, date]:
-  """Get the start and end dates of the month containing the given date."""
-  month_start = today.replace(day=1)
-  if today.month == 12:
-    month_end = today.replace(
-        year=today.year + 1, month=1, day=1) - timedelta(days=1)
-  else:
-    month_end = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
-  return month_start, month_end
+  if frequency in ("weekly", "monthly"):
+    return result
+  return result[::-1]
 
 
 # Send today's habit logs stats
-@router.get("/logs/today", response_model=list[TodayHabitLog])
+@router.get("/logs/today", response_model=list[TodayHabitLog], dependencies=[Depends(daily_etag)])
 def get_today_habits_logs_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(verify_token)
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
 ):
   """Get all user's habits with their completion status for the appropriate time period using completion records."""
+  return cached_response(request, lambda: _today_habits_logs_stats(db, current_user.id))
+
+
+@async_router.get("/logs/today", response_model=list[TodayHabitLog], dependencies=[Depends(daily_etag_async)])
+async def get_today_habits_logs_stats_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenClaims = Depends(verify_token_claims)
+):
+  """Get all user's habits with their completion status for the appropriate time period using completion records."""
+  return await cached_response_async(request, lambda: db.run_sync(_today_habits_logs_stats, current_user.id))
+
+
+def _today_habits_logs_stats(db: Session, user_id: uuid.UUID) -> list[TodayHabitLog]:
   today = date.today()
 
   # Get all habits for the user
-  habits = db.query(Habit).filter(Habit.user_id == current_user.id).all()
+  habits = db.query(Habit).filter(Habit.user_id == user_id).all()
 
   if not habits:
     return []
 
+  # Current period of each habit; unknown frequencies fall back to daily
+  periods = {habit.id: period_bounds(habit.frequency.value, today) for habit in habits}
+  window_start = min(start for start, _ in periods.values())
+  window_end = max(end for _, end in periods.values())
+
+  def in_period(row) -> bool:
+    start_date, end_date = periods[row.habit_id]
+    return start_date <= row.date <= end_date
+
+  # One query for the completion records of every habit, split per period below
+  completions_by_habit: dict[uuid.UUID, list[HabitCompletion]] = {habit.id: [] for habit in habits}
+  for comp in db.query(HabitCompletion).join(Habit).filter(
+      Habit.user_id == user_id,
+      HabitCompletion.date >= window_start,
+      HabitCompletion.date <= window_end
+  ):
+    if in_period(comp):
+      completions_by_habit[comp.habit_id].append(comp)
+
+  # Most recent log as a fallback, only for habits without completion records
+  latest_logs: dict[uuid.UUID, HabitLog] = {}
+  without_completions = [habit_id for habit_id, comps in completions_by_habit.items() if not comps]
+  if without_completions:
+    for log in db.query(HabitLog).filter(
+        HabitLog.habit_id.in_(without_completions),
+        HabitLog.date >= window_start,
+        HabitLog.date <= window_end
+    ):
+      if in_period(log):
+        latest = latest_logs.get(log.habit_id)
+        if latest is None or log.created_at > latest.created_at:
+          latest_logs[log.habit_id] = log
+
   # Build response
   result = []
   for habit in habits:
-    # Determine the time period based on habit frequency
-    if habit.frequency.value == "daily":
-      start_date = today
-      end_date = today
-    elif habit.frequency.value == "weekly":
-      start_date, end_date = get_week_start_end(today)
-    elif habit.frequency.value == "monthly":
-      start_date, end_date = get_month_start_end(today)
-    else:
-      # Fallback to daily for unknown frequencies
-      start_date = today
-      end_date = today
-
-    # Get completion records for the appropriate time period
-    completions = db.query(HabitCompletion).filter(
-        and_(
-            HabitCompletion.habit_id == habit.id,
-            HabitCompletion.date >= start_date,
-            HabitCompletion.date <= end_date
-        )
-    ).all()
+    completions = completions_by_habit[habit.id]
 
     # Sum quantities for current_progress
     current_progress = sum(comp.quantity_achieved for comp in completions)
@@ -359,20 +332,7 @@ def get_today_habits_logs_stats(
     # Get the most recent completion for log_id and log_created_at
     most_recent_completion = max(
         completions, key=lambda comp: comp.updated_at) if completions else None
-
-    # Get the most recent log for log_id and log_created_at (fallback)
-    if not most_recent_completion:
-      period_logs = db.query(HabitLog).filter(
-          and_(
-              HabitLog.habit_id == habit.id,
-              HabitLog.date >= start_date,
-              HabitLog.date <= end_date
-          )
-      ).all()
-      most_recent_log = max(
-          period_logs, key=lambda log: log.created_at) if period_logs else None
-    else:
-      most_recent_log = None
+    most_recent_log = latest_logs.get(habit.id)
 
     result.append(TodayHabitLog(
         habit_id=str(habit.id),
@@ -1,7 +1,9 @@
+import uuid
 from datetime import datetime, date as dt_date
 from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
 
 
 UUIDStr = Annotated[str, Field(pattern=r"^[0-9a-fA-F-]{36}$")]
@@ -18,6 +20,18 @@ class HabitOut(BaseModel):
   created_at: datetime
 
 
+class HabitRow(TypedDict):
+  """HabitOut as selected columns, for the fast serialization path"""
+  id: uuid.UUID
+  user_id: uuid.UUID
+  title: str
+  frequency: str
+  target: int
+  category: str
+  description: str | None
+  created_at: datetime
+
+
 class HabitCreate(BaseModel):
   title: str
   frequency: str
@@ -31,3 +45,16 @@ class HabitUpdate(BaseModel):
   target: int | None = Field(None, gt=0, description="Target must be positive")
   category: str | None = None
   description: str | None = None
+
+
+class HabitTemplateOut(BaseModel):
+  id: str
+  title: str
+  description: str
+  category: str
+  frequency: str
+  target: int
+
+
+class HabitTemplatesAdd(BaseModel):
+  template_ids: list[str] = Field(min_length=1, max_length=50, description="Template ids from GET /habits/templates")
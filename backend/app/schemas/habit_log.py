@@ -1,10 +1,16 @@
+import uuid
 from datetime import datetime, date as dt_date
 from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
+
+from app.lib.calendar import DATE_DIM_FIRST, DATE_DIM_LAST
 
 
 UUIDStr = Annotated[str, Field(pattern=r"^[0-9a-fA-F-]{36}$")]
+# Days outside date_dim would drop out of stats and completion rebuilds
+LogDate = Annotated[dt_date, Field(ge=DATE_DIM_FIRST, le=DATE_DIM_LAST)]
 
 class HabitLogOut(BaseModel):
   id: UUIDStr
@@ -14,6 +20,15 @@ class HabitLogOut(BaseModel):
   created_at: datetime
 
 
+class HabitLogRow(TypedDict):
+  """HabitLogOut as selected columns, for the fast serialization path"""
+  id: uuid.UUID
+  habit_id: uuid.UUID
+  date: dt_date
+  quantity: int
+  created_at: datetime
+
+
 class HabitLogCreate(BaseModel):
-  date: Optional[dt_date] | None = None
+  date: Optional[LogDate] = None
   quantity: int = 1
\ No newline at end of file
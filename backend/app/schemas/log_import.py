@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class ImportResultOut(BaseModel):
+  rows_read: int
+  rows_imported: int
+  rows_skipped: int
+  last_committed_row: int
+  completions_rebuilt: int
+  completed: bool
+  error: str | None = None
+  row_errors: list[str] = []
@@ -1,7 +1,9 @@
+import uuid
 from datetime import datetime, date as dt_date
 from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
 
 
 UUIDStr = Annotated[str, Field(pattern=r"^[0-9a-fA-F-]{36}$")]
@@ -45,7 +47,8 @@ class HabitLogEntry(BaseModel):
   habit_title: str
   quantity: int
   target: int
-  logged_at: datetime
+  # None for days compacted into monthly summaries
+  logged_at: datetime | None
 
 
 class DayLogs(BaseModel):
@@ -54,6 +57,22 @@ class DayLogs(BaseModel):
   totalLogs: int
 
 
+class HabitLogEntryRow(TypedDict):
+  habit_id: uuid.UUID
+  habit_title: str
+  quantity: int
+  target: int
+  # None for days compacted into monthly summaries
+  logged_at: datetime | None
+
+
+class DayLogsRow(TypedDict):
+  """DayLogs as plain data, for the fast serialization path"""
+  date: dt_date
+  habits: list[HabitLogEntryRow]
+  totalLogs: int
+
+
 class OverviewResponse(BaseModel):
   logs: list[DayLogs]
   total_days: int
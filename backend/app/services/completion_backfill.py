@@ -0,0 +1,141 @@
+"""
+Set-based backfill of habit completions, one habit-id range at a time.
+
+Each range is a single INSERT ... SELECT: logs are summed per habit and day,
+a window sum over the habit's period (day, Monday-based week or month) decides
+completion, and rows that already exist are skipped with ON CONFLICT DO
+NOTHING. Random UUID habit ids spread evenly over the UUID space, so equal
+slices of it make evenly sized ranges without scanning the habits first.
+
+Only habit_logs is read: months rolled up by the log compaction keep their
+completion records, and weeks straddling the compaction cutoff may verify
+as mismatched; check_completions.py accounts for compacted logs.
+"""
+
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import and_, case, func, literal_column, select, true
+from sqlalchemy.orm import Session
+
+from app.db.upsert import dialect_insert
+from app.models.date_dim import DateDim
+from app.models.habit import Frequency, Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.models.habit_target_history import HabitTargetHistory
+from app.services.target_history import in_effect
+
+
+_UUID_SPACE = 1 << 128
+
+
+@dataclass
+class VerifyResult:
+  missing: int = 0
+  mismatched: int = 0
+
+
+def habit_id_range(index: int, chunks: int) -> tuple[uuid.UUID | None, uuid.UUID | None]:
+  """Bounds [low, high) of slice `index` out of `chunks` equal slices of the UUID space"""
+  def bound(i: int) -> uuid.UUID:
+    # The low digit is set to "a": on SQLite a bound of only decimal digits would
+    # get the UUID column's numeric affinity and compare as a number, not as text
+    return uuid.UUID(int=_UUID_SPACE * i // chunks | 0xA)
+  low = bound(index) if index > 0 else None
+  high = bound(index + 1) if index + 1 < chunks else None
+  return low, high
+
+
+def _in_range(column, low: uuid.UUID | None, high: uuid.UUID | None):
+  criteria = []
+  if low is not None:
+    criteria.append(column >= low)
+  if high is not None:
+    criteria.append(column < high)
+  return and_(true(), *criteria)
+
+
+# Version 4 layout as 32 hex digits, the way Uuid columns are stored on SQLite.
+# The variant digit is always a or b, so the value never parses as a number
+# under the column's numeric affinity
+_SQLITE_NEW_ID = literal_column(
+    "lower(hex(randomblob(6)) || '4' || substr(hex(randomblob(2)), 2)"
+    " || substr('ab', 1 + abs(random()) % 2, 1) || substr(hex(randomblob(8)), 2))")
+
+
+def _new_id(dialect: str):
+  return func.gen_random_uuid() if dialect == "postgresql" else _SQLITE_NEW_ID
+
+
+def _period_totals(db: Session, low: uuid.UUID | None, high: uuid.UUID | None):
+  """Per habit and day: the day's quantity, the target in effect and the whole period's total"""
+  daily = (
+      select(HabitLog.habit_id, HabitLog.date, func.sum(HabitLog.quantity).label("quantity"),
+             Habit.target, Habit.frequency)
+      .join(Habit, Habit.id == HabitLog.habit_id)
+      .where(_in_range(HabitLog.habit_id, low, high))
+      .group_by(HabitLog.habit_id, HabitLog.date, Habit.target, Habit.frequency)
+  ).subquery()
+  # date_dim holds each day's week and month start, so no dialect-specific date functions
+  period = case(
+      (daily.c.frequency == Frequency.weekly, DateDim.week_start),
+      (daily.c.frequency == Frequency.monthly, DateDim.month_start),
+      else_=daily.c.date)
+  return (
+      select(
+          daily.c.habit_id, daily.c.date, daily.c.quantity,
+          func.coalesce(HabitTargetHistory.target, daily.c.target).label("target"),
+          func.sum(daily.c.quantity).over(partition_by=(daily.c.habit_id, period)).label("period_quantity"))
+      .select_from(daily)
+      .join(DateDim, DateDim.day == daily.c.date)
+      # Habits without target history use their current target
+      .outerjoin(HabitTargetHistory, in_effect(daily.c.habit_id, daily.c.date))
+  ).subquery()
+
+
+def backfill_range(db: Session, low: uuid.UUID | None, high: uuid.UUID | None) -> int:
+  """Insert the missing completion records of habits in [low, high); returns rows inserted"""
+  dialect = db.get_bind().dialect.name
+  totals = _period_totals(db, low, high)
+  now = func.current_timestamp()
+  rows = select(
+      _new_id(dialect), totals.c.habit_id, totals.c.date, totals.c.period_quantity >= totals.c.target,
+      totals.c.target, totals.c.quantity, now, now,
+  ).where(true())  # SQLite needs a WHERE to tell ON CONFLICT from a join constraint
+  stmt = dialect_insert(db, HabitCompletion.__table__).from_select(
+      ["id", "habit_id", "date", "is_completed", "target_at_time", "quantity_achieved", "created_at", "updated_at"],
+      rows,
+  ).on_conflict_do_nothing(index_elements=["habit_id", "date"])
+  return db.execute(stmt).rowcount
+
+
+def count_missing(db: Session, low: uuid.UUID | None, high: uuid.UUID | None) -> int:
+  """Completion records backfill_range would insert, without writing"""
+  totals = _period_totals(db, low, high)
+  return db.scalar(
+      select(func.count())
+      .select_from(totals)
+      .outerjoin(HabitCompletion, and_(HabitCompletion.habit_id == totals.c.habit_id,
+                                       HabitCompletion.date == totals.c.date))
+      .where(HabitCompletion.id.is_(None))
+  )
+
+
+def verify_range(db: Session, low: uuid.UUID | None, high: uuid.UUID | None) -> VerifyResult:
+  """Compare stored completion records with the logs of habits in [low, high)"""
+  totals = _period_totals(db, low, high)
+  mismatch = case(
+      (HabitCompletion.id.is_(None), None),
+      (HabitCompletion.quantity_achieved != totals.c.quantity, 1),
+      # Stored rows keep the target of their time; completion is judged against it
+      (HabitCompletion.is_completed != (totals.c.period_quantity >= HabitCompletion.target_at_time), 1),
+      else_=None,
+  )
+  missing, mismatched = db.execute(
+      select(func.count() - func.count(HabitCompletion.id), func.count(mismatch))
+      .select_from(totals)
+      .outerjoin(HabitCompletion, and_(HabitCompletion.habit_id == totals.c.habit_id,
+                                       HabitCompletion.date == totals.c.date))
+  ).one()
+  return VerifyResult(missing=missing, mismatched=mismatched)
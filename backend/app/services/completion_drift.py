@@ -0,0 +1,137 @@
+"""
+Detection and repair of completion records that drifted from the logs.
+
+Habits are walked in id order, a chunk at a time: each chunk's daily log
+totals (hot and compacted) and stored completions are read in a few queries,
+the expected rows are recomputed with the same rules as
+rebuild_habit_completions, and the differences are counted. Repair rebuilds
+the drifted habits in bulk and deletes records left without logs. Passing
+`changed_since` limits the walk to habits of users whose data changed after
+that time.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.models.user import User
+from app.services.completion_service import compute_completions, rebuild_habit_completions
+from app.services.log_compaction import with_compacted_totals
+from app.services.target_history import target_ranges
+
+
+# Habits checked per round of queries
+DRIFT_CHUNK_SIZE = 500
+# Number of drifted habit ids kept in the report
+MAX_REPORTED_HABITS = 100
+
+
+@dataclass
+class DriftReport:
+  habits_checked: int = 0
+  # Expected from the logs but not stored
+  missing: int = 0
+  # Stored with another quantity or completion status than the logs imply
+  mismatched: int = 0
+  # Stored for a day without logs
+  orphaned: int = 0
+  habits_repaired: int = 0
+  drifted_habit_ids: list[uuid.UUID] = field(default_factory=list)
+
+  @property
+  def drifted(self) -> int:
+    return self.missing + self.mismatched + self.orphaned
+
+
+def iter_habit_chunks(db: Session, changed_since: datetime | None = None,
+                      chunk_size: int = DRIFT_CHUNK_SIZE) -> Iterator[dict]:
+  """Yield habits (id -> row with frequency and target) in id order, keyset-paginated"""
+  last_id = None
+  while True:
+    q = select(Habit.id, Habit.frequency, Habit.target).order_by(Habit.id).limit(chunk_size)
+    if changed_since is not None:
+      q = q.join(User, User.id == Habit.user_id).where(User.data_updated_at >= changed_since)
+    if last_id is not None:
+      q = q.where(Habit.id > last_id)
+    habits = {row.id: row for row in db.execute(q)}
+    if not habits:
+      return
+    yield habits
+    last_id = max(habits)
+
+
+def check_chunk(db: Session, habits: dict) -> tuple[DriftReport, list[uuid.UUID]]:
+  """Compare one chunk; returns its report and the ids of completion rows without logs"""
+  habit_ids = list(habits)
+  daily_totals = with_compacted_totals(db, habit_ids, db.execute(
+      select(HabitLog.habit_id, HabitLog.date, func.sum(HabitLog.quantity).label("quantity"))
+      .where(HabitLog.habit_id.in_(habit_ids))
+      .group_by(HabitLog.habit_id, HabitLog.date)
+  ))
+  stored = {
+      (row.habit_id, row.date): row for row in db.execute(
+          select(HabitCompletion.id, HabitCompletion.habit_id, HabitCompletion.date, HabitCompletion.is_completed,
+                 HabitCompletion.target_at_time, HabitCompletion.quantity_achieved)
+          .where(HabitCompletion.habit_id.in_(habit_ids)))
+  }
+  stored_targets = {key: row.target_at_time for key, row in stored.items()}
+
+  report = DriftReport(habits_checked=len(habits))
+  drifted: set[uuid.UUID] = set()
+  for expected in compute_completions(habits, daily_totals, stored_targets, target_ranges(db, habit_ids)):
+    row = stored.pop((expected["habit_id"], expected["date"]), None)
+    if row is None:
+      report.missing += 1
+    elif (row.quantity_achieved, bool(row.is_completed)) != (expected["quantity_achieved"], expected["is_completed"]):
+      report.mismatched += 1
+    else:
+      continue
+    drifted.add(expected["habit_id"])
+
+  # Whatever was not matched has no logs behind it
+  report.orphaned = len(stored)
+  drifted.update(row.habit_id for row in stored.values())
+  report.drifted_habit_ids = sorted(drifted)
+  return report, [row.id for row in stored.values()]
+
+
+def repair_habits(db: Session, habit_ids: list[uuid.UUID], orphaned_ids: list[uuid.UUID]) -> None:
+  """Delete completion rows without logs and rebuild the rest from the logs"""
+  if orphaned_ids:
+    db.execute(delete(HabitCompletion).where(HabitCompletion.id.in_(orphaned_ids)))
+  rebuild_habit_completions(db, habit_ids)
+
+
+def check_completions(db: Session, changed_since: datetime | None = None, repair: bool = False,
+                      chunk_size: int = DRIFT_CHUNK_SIZE,
+                      on_chunk: Callable[[DriftReport], None] | None = None) -> DriftReport:
+  """
+  Check (and optionally repair) the completion records of every habit, or only
+  of habits whose owner's data changed since `changed_since`.
+  Repairs are committed per chunk.
+  """
+  total = DriftReport()
+  for habits in iter_habit_chunks(db, changed_since, chunk_size):
+    report, orphaned_ids = check_chunk(db, habits)
+    if repair and report.drifted_habit_ids:
+      repair_habits(db, report.drifted_habit_ids, orphaned_ids)
+      db.commit()
+      report.habits_repaired = len(report.drifted_habit_ids)
+
+    total.habits_checked += report.habits_checked
+    total.missing += report.missing
+    total.mismatched += report.mismatched
+    total.orphaned += report.orphaned
+    total.habits_repaired += report.habits_repaired
+    room = MAX_REPORTED_HABITS - len(total.drifted_habit_ids)
+    total.drifted_habit_ids.extend(report.drifted_habit_ids[:max(room, 0)])
+    if on_chunk:
+      on_chunk(total)
+  return total
@@ -4,18 +4,29 @@ import uuid
 from datetime import date, datetime, timezone, timedelta, UTC
 from collections import defaultdict
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, case, func, select
+
+from app.db.upsert import dialect_insert
+from app.lib.calendar import DATE_DIM_FIRST, period_bounds
+from app.services.log_compaction import compacted_daily_totals, compaction_cutoff, with_compacted_totals
+from app.services.target_history import in_effect, target_on, target_ranges
 
 from app.models.habit import Habit
 from app.models.habit_log import HabitLog
 from app.models.habit_completion import HabitCompletion
+from app.models.date_dim import DateDim
+from app.models.habit_target_history import HabitTargetHistory
+
+
+# Completion rows written per multi-row upsert statement
+COMPLETION_UPSERT_CHUNK_SIZE = 1000
 
 
 def update_habit_completion(db: Session, habit_id: uuid.UUID, completion_date: date) -> HabitCompletion:
   """
   Update or create a habit completion record for a specific date.
   For weekly/monthly habits, checks if the period total meets the target.
-  Uses stored target_at_time for historical accuracy when available.
+  Uses the target in effect on that date (habit_target_history).
 
   Args:
       db: Database session
@@ -30,52 +41,27 @@ def update_habit_completion(db: Session, habit_id: uuid.UUID, completion_date: d
   if not habit:
     raise ValueError(f"Habit with ID {habit_id} not found")
 
-  # Determine the period based on habit frequency
-  if habit.frequency.value == "daily":
-    # For daily habits: check if this day meets the target
-    period_start = completion_date
-    period_end = completion_date
-  elif habit.frequency.value == "weekly":
-    # For weekly habits: check if the week meets the target
-    days_since_monday = completion_date.weekday()
-    period_start = completion_date - timedelta(days=days_since_monday)
-    period_end = period_start + timedelta(days=6)
-  elif habit.frequency.value == "monthly":
-    # For monthly habits: check if the month meets the target
-    period_start = completion_date.replace(day=1)
-    if completion_date.month == 12:
-      period_end = completion_date.replace(
-          year=completion_date.year + 1, month=1, day=1) - timedelta(days=1)
-    else:
-      period_end = completion_date.replace(
-          month=completion_date.month + 1, day=1) - timedelta(days=1)
-  else:
-    # Fallback to daily for unknown frequencies
-    period_start = completion_date
-    period_end = completion_date
+  # Day, Monday-based week or calendar month, depending on the frequency
+  period_start, period_end = period_bounds(habit.frequency.value, completion_date)
 
-  # Get all logs for this habit in the period
-  period_logs = db.query(HabitLog).filter(
-      and_(
+  # Period total (for the completion check) and the day's own quantity in one query
+  period_total_quantity, daily_quantity = db.execute(
+      select(
+          func.coalesce(func.sum(HabitLog.quantity), 0),
+          func.coalesce(func.sum(case((HabitLog.date == completion_date, HabitLog.quantity), else_=0)), 0))
+      .where(
           HabitLog.habit_id == habit_id,
           HabitLog.date >= period_start,
           HabitLog.date <= period_end
       )
-  ).all()
+  ).one()
 
-  # Calculate total quantity for the period (for completion check)
-  period_total_quantity = sum(log.quantity for log in period_logs)
-
-  # Get logs for this specific date (for quantity_achieved)
-  daily_logs = db.query(HabitLog).filter(
-      and_(
-          HabitLog.habit_id == habit_id,
-          HabitLog.date == completion_date
-      )
-  ).all()
-
-  # Calculate quantity for this specific date
-  daily_quantity = sum(log.quantity for log in daily_logs)
+  if period_start < compaction_cutoff():
+    # Part of the period may have been rolled up into monthly summaries
+    for row in compacted_daily_totals(db, [habit_id], period_start, period_end):
+      period_total_quantity += row.quantity
+      if row.date == completion_date:
+        daily_quantity += row.quantity
 
   # Check if completion record already exists
   existing_completion = db.query(HabitCompletion).filter(
@@ -85,23 +71,24 @@ def update_habit_completion(db: Session, habit_id: uuid.UUID, completion_date: d
       )
   ).first()
 
-  if existing_completion:
-    # Update existing record using stored target for historical accuracy
-    stored_target = existing_completion.target_at_time
-    is_completed = period_total_quantity >= stored_target
+  # Target in effect on the day; without history the stored or current target applies
+  target = db.scalar(select(HabitTargetHistory.target).where(in_effect(habit_id, completion_date)))
+  if target is None:
+    target = existing_completion.target_at_time if existing_completion else habit.target
+  is_completed = period_total_quantity >= target
 
+  if existing_completion:
     existing_completion.is_completed = is_completed
+    existing_completion.target_at_time = target
     existing_completion.quantity_achieved = daily_quantity
     existing_completion.updated_at = datetime.now(UTC)
     return existing_completion
   else:
-    # Create new record with current target
-    is_completed = period_total_quantity >= habit.target
     completion = HabitCompletion(
         habit_id=habit_id,
         date=completion_date,
         is_completed=is_completed,
-        target_at_time=habit.target,
+        target_at_time=target,
         quantity_achieved=daily_quantity
     )
     db.add(completion)
@@ -110,9 +97,10 @@ def update_habit_completion(db: Session, habit_id: uuid.UUID, completion_date: d
 
 def recalculate_habit_completions(db: Session, habit_id: uuid.UUID) -> int:
   """
-  Recalculate all completion records for a habit (useful when target changes).
+  Recalculate all completion records for a habit.
   For weekly/monthly habits, checks if the period total meets the target.
-  Uses the stored target_at_time values to preserve historical accuracy.
+  Uses the target in effect on each date, or the stored target_at_time for
+  habits without target history.
 
   Args:
       db: Database session
@@ -131,121 +119,79 @@ def recalculate_habit_completions(db: Session, habit_id: uuid.UUID) -> int:
       HabitCompletion.habit_id == habit_id
   ).all()
 
-  updated_count = 0
-
-  for completion in completions:
-    # Determine the period based on habit frequency
-    if habit.frequency.value == "daily":
-      # For daily habits: check if this day meets the target
-      period_start = completion.date
-      period_end = completion.date
-    elif habit.frequency.value == "weekly":
-      # For weekly habits: check if the week meets the target
-      days_since_monday = completion.date.weekday()
-      period_start = completion.date - timedelta(days=days_since_monday)
-      period_end = period_start + timedelta(days=6)
-    elif habit.frequency.value == "monthly":
-      # For monthly habits: check if the month meets the target
-      period_start = completion.date.replace(day=1)
-      if completion.date.month == 12:
-        period_end = completion.date.replace(
-            year=completion.date.year + 1, month=1, day=1) - timedelta(days=1)
-      else:
-        period_end = completion.date.replace(
-            month=completion.date.month + 1, day=1) - timedelta(days=1)
-    else:
-      # Fallback to daily for unknown frequencies
-      period_start = completion.date
-      period_end = completion.date
-
-    # Get all logs for this habit in the period
-    period_logs = db.query(HabitLog).filter(
-        and_(
-            HabitLog.habit_id == habit_id,
-            HabitLog.date >= period_start,
-            HabitLog.date <= period_end
-        )
-    ).all()
-
-    # Calculate total quantity for the period (for completion check)
-    period_total_quantity = sum(log.quantity for log in period_logs)
-
-    # Get logs for this specific date (for quantity_achieved)
-    daily_logs = db.query(HabitLog).filter(
-        and_(
-            HabitLog.habit_id == habit_id,
-            HabitLog.date == completion.date
-        )
-    ).all()
-
-    # Calculate quantity for this specific date
-    daily_quantity = sum(log.quantity for log in daily_logs)
-
-    # Use the stored target_at_time for historical accuracy
-    stored_target = completion.target_at_time
-    is_completed = period_total_quantity >= stored_target
+  frequency = habit.frequency.value
+  period = DateDim.period_start(frequency)
+
+  # Daily totals and the total of the period each day falls in, in one grouped query
+  daily_sum = func.sum(HabitLog.quantity)
+  rows = db.execute(
+      select(
+          HabitLog.date,
+          period.label("period_start"),
+          daily_sum.label("quantity"),
+          func.sum(daily_sum).over(partition_by=period).label("period_quantity"))
+      .join(DateDim, DateDim.day == HabitLog.date)
+      .where(HabitLog.habit_id == habit_id)
+      .group_by(HabitLog.date, period)
+  ).all()
+  daily_totals = {row.date: row.quantity for row in rows}
+  period_totals = {row.period_start: row.period_quantity for row in rows}
 
-    # Update completion record using stored target
-    completion.is_completed = is_completed
-    completion.quantity_achieved = daily_quantity
-    completion.updated_at = datetime.now(UTC)
+  # Days rolled up into monthly summaries count too
+  for row in compacted_daily_totals(db, [habit_id]):
+    daily_totals[row.date] = daily_totals.get(row.date, 0) + row.quantity
+    period_start = period_bounds(frequency, row.date)[0]
+    period_totals[period_start] = period_totals.get(period_start, 0) + row.quantity
 
-    updated_count += 1
+  ranges = target_ranges(db, [habit_id]).get(habit_id, [])
+  now = datetime.now(UTC)
+  for completion in completions:
+    target = target_on(ranges, completion.date)
+    if target is not None:
+      completion.target_at_time = target
+    period_start = period_bounds(frequency, completion.date)[0]
+    completion.is_completed = period_totals.get(period_start, 0) >= completion.target_at_time
+    completion.quantity_achieved = daily_totals.get(completion.date, 0)
+    completion.updated_at = now
 
-  return updated_count
+  return len(completions)
 
 
-def update_habit_completions_for_new_target(db: Session, habit_id: uuid.UUID, new_target: int) -> int:
+def set_habit_target(db: Session, habit: Habit, new_target: int, today: date | None = None) -> None:
   """
-  Update completion records for a habit when the target changes.
-  Only updates records that don't have logs yet (future dates) or recent records.
-  Preserves historical accuracy by keeping old target_at_time values.
+  Change a habit's target from today on.
+  Closes the open habit_target_history range and appends one for the new
+  target, so past completions keep the target they were evaluated with and
+  the cost does not grow with the habit's age. Completion records from today
+  on (normally just today's) are re-evaluated against the new target.
 
   Args:
       db: Database session
-      habit_id: ID of the habit
+      habit: The habit to change
       new_target: The new target value
-
-  Returns:
-      int: Number of completion records updated
+      today: Day the new target takes effect
   """
-  # Get the habit
-  habit = db.query(Habit).filter(Habit.id == habit_id).first()
-  if not habit:
-    raise ValueError(f"Habit with ID {habit_id} not found")
-
-  # Get all completion records for this habit
-  completions = db.query(HabitCompletion).filter(
-      HabitCompletion.habit_id == habit_id
-  ).all()
-
-  updated_count = 0
-  today = date.today()
-
-  for completion in completions:
-    # Only update completions for today or future dates
-    # This preserves historical accuracy for past dates
-    if completion.date >= today:
-      # Get all logs for this specific date
-      logs = db.query(HabitLog).filter(
-          and_(
-              HabitLog.habit_id == habit_id,
-              HabitLog.date == completion.date
-          )
-      ).all()
+  today = today or date.today()
+  current = db.scalar(select(HabitTargetHistory).where(
+      HabitTargetHistory.habit_id == habit.id, HabitTargetHistory.valid_to.is_(None)))
 
-      total_quantity = sum(log.quantity for log in logs)
-      is_completed = total_quantity >= new_target
-
-      # Update completion record with new target
-      completion.is_completed = is_completed
-      completion.target_at_time = new_target
-      completion.quantity_achieved = total_quantity
-      completion.updated_at = datetime.now(UTC)
-
-      updated_count += 1
+  if current is not None and current.valid_from == today:
+    # Changed again on the same day
+    current.target = new_target
+  else:
+    if current is None:
+      # First change: the original target applied from the beginning
+      db.add(HabitTargetHistory(habit_id=habit.id, target=habit.target,
+                                valid_from=DATE_DIM_FIRST, valid_to=today - timedelta(days=1)))
+    else:
+      current.valid_to = today - timedelta(days=1)
+    db.add(HabitTargetHistory(habit_id=habit.id, target=new_target, valid_from=today))
+  habit.target = new_target
+  db.flush()
 
-  return updated_count
+  for completion_date in db.scalars(select(HabitCompletion.date).where(
+          HabitCompletion.habit_id == habit.id, HabitCompletion.date >= today)).all():
+    update_habit_completion(db, habit.id, completion_date)
 
 
 def get_habit_completion_stats(db: Session, habit_id: uuid.UUID, start_date: date | None = None, end_date: date | None = None) -> dict:
@@ -584,3 +530,104 @@ def _calculate_monthly_streaks(successful_dates: list[date]) -> dict:
       "current_streak": current_streak,
       "longest_streak": longest_streak
   }
+
+
+def compute_completions(habits: dict, daily_totals, stored_targets: dict, ranges: dict | None = None) -> list[dict]:
+  """
+  Completion rows implied by daily log totals.
+
+  Args:
+      habits: Rows with frequency and target, by habit id
+      daily_totals: Rows of (habit_id, date, quantity) with one row per habit and day
+      stored_targets: target_at_time of existing records by (habit_id, date); these
+          win over the habit's current target
+      ranges: Target history by habit id (target_history.target_ranges); the
+          target in effect wins over both
+
+  Returns:
+      list[dict]: One row per habit and day, complete when its period total reaches the target
+  """
+  # Sum daily totals into their habit period
+  period_totals: dict[tuple, int] = defaultdict(int)
+  for row in daily_totals:
+    habit = habits.get(row.habit_id)
+    if habit is None:
+      continue
+    period = period_bounds(habit.frequency.value, row.date)
+    period_totals[(row.habit_id, period)] += row.quantity
+
+  completions = []
+  for row in daily_totals:
+    habit = habits.get(row.habit_id)
+    if habit is None:
+      continue
+    period = period_bounds(habit.frequency.value, row.date)
+    target = target_on(ranges.get(row.habit_id, []), row.date) if ranges else None
+    if target is None:
+      target = stored_targets.get((row.habit_id, row.date), habit.target)
+    completions.append({
+        "habit_id": row.habit_id,
+        "date": row.date,
+        "is_completed": period_totals[(row.habit_id, period)] >= target,
+        "target_at_time": target,
+        "quantity_achieved": row.quantity,
+    })
+  return completions
+
+
+def rebuild_habit_completions(db: Session, habit_ids: list[uuid.UUID]) -> int:
+  """
+  Recompute completion records for many habits in one set-based pass.
+  Daily totals come from a single grouped query, period totals are derived
+  from them in memory, and results are written with chunked multi-row upserts.
+  Targets come from the target history, else existing target_at_time values
+  are kept for historical accuracy.
+
+  Args:
+      db: Database session
+      habit_ids: IDs of the habits to rebuild
+
+  Returns:
+      int: Number of completion records written
+  """
+  if not habit_ids:
+    return 0
+
+  habits = {
+      row.id: row for row in db.execute(
+          select(Habit.id, Habit.frequency, Habit.target).where(Habit.id.in_(habit_ids)))
+  }
+
+  daily_totals = with_compacted_totals(db, habit_ids, db.execute(
+      select(HabitLog.habit_id, HabitLog.date, func.sum(HabitLog.quantity).label("quantity"))
+      .where(HabitLog.habit_id.in_(habit_ids))
+      .group_by(HabitLog.habit_id, HabitLog.date)
+  ))
+
+  stored_targets = {
+      (row.habit_id, row.date): row.target_at_time for row in db.execute(
+          select(HabitCompletion.habit_id, HabitCompletion.date, HabitCompletion.target_at_time)
+          .where(HabitCompletion.habit_id.in_(habit_ids)))
+  }
+
+  now = datetime.now(UTC)
+  values = [
+      {"id": uuid.uuid4(), **row, "created_at": now, "updated_at": now}
+      for row in compute_completions(habits, daily_totals, stored_targets, target_ranges(db, habit_ids))
+  ]
+
+  for i in range(0, len(values), COMPLETION_UPSERT_CHUNK_SIZE):
+    stmt = dialect_insert(db, HabitCompletion.__table__).values(
+        values[i:i + COMPLETION_UPSERT_CHUNK_SIZE])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["habit_id", "date"],
+        set_={
+            "is_completed": stmt.excluded.is_completed,
+            "target_at_time": stmt.excluded.target_at_time,
+            "quantity_achieved": stmt.excluded.quantity_achieved,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    db.execute(stmt)
+
+  return len(values)
@@ -0,0 +1,36 @@
+"""
+Per-user data version, bumped by every habit or log mutation.
+
+Read endpoints derive their ETags from it so a polling client can be
+answered with 304 after a single primary-key lookup. The time of the last
+bump is kept too, for jobs that only revisit recently changed users.
+"""
+
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+
+def bump_data_version(db: Session, user_id: uuid.UUID | str) -> None:
+  """Increment the user's version and stamp the change, inside the caller's transaction"""
+  if isinstance(user_id, str):
+    user_id = uuid.UUID(user_id)
+  bump_data_versions(db, [user_id])
+
+
+def bump_data_versions(db: Session, user_ids) -> None:
+  """bump_data_version for many users at once; `user_ids` may also be a subquery"""
+  db.execute(
+      update(User)
+      .where(User.id.in_(user_ids))
+      .values(data_version=User.data_version + 1, data_updated_at=datetime.now(UTC))
+      .execution_options(synchronize_session=False)
+  )
+
+
+def get_data_version(db: Session, user_id: uuid.UUID) -> int | None:
+  return db.scalar(select(User.data_version).where(User.id == user_id))
@@ -0,0 +1,164 @@
+"""Streaming export of a user's habits, logs and completions."""
+
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit
+from app.models.habit_log import HabitLog
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log_month import HabitLogMonth
+from app.services.log_compaction import expand_months
+
+
+# Rows fetched per round trip (server-side cursor on Postgres)
+EXPORT_CHUNK_SIZE = 1000
+# Flush the output buffer once it grows beyond this many bytes
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+CSV_COLUMNS = [
+    "record_type",
+    "habit_id",
+    "title",
+    "frequency",
+    "target",
+    "category",
+    "description",
+    "date",
+    "quantity",
+    "is_completed",
+    "target_at_time",
+    "quantity_achieved",
+    "created_at",
+    "updated_at",
+]
+
+
+def _to_plain(value):
+  """Convert column values into JSON/CSV friendly primitives."""
+  if isinstance(value, Enum):
+    return value.value
+  if isinstance(value, uuid.UUID):
+    return str(value)
+  if isinstance(value, (datetime, date)):
+    return value.isoformat()
+  return value
+
+
+def iter_export_records(db: Session, user_id: uuid.UUID) -> Iterator[dict]:
+  """
+  Yield every habit, log and completion of a user as flat dicts.
+
+  Rows are read as column tuples with ``yield_per`` so only one chunk is held
+  in memory at a time, regardless of how much history the user has.
+  """
+  habits = select(
+      Habit.id, Habit.title, Habit.frequency, Habit.target,
+      Habit.category, Habit.description, Habit.created_at
+  ).where(Habit.user_id == user_id).order_by(Habit.created_at, Habit.id)
+
+  for row in db.execute(habits.execution_options(yield_per=EXPORT_CHUNK_SIZE)):
+    yield {
+        "record_type": "habit",
+        "habit_id": _to_plain(row.id),
+        "title": row.title,
+        "frequency": _to_plain(row.frequency),
+        "target": row.target,
+        "category": _to_plain(row.category),
+        "description": row.description,
+        "created_at": _to_plain(row.created_at),
+    }
+
+  logs = select(
+      HabitLog.habit_id, HabitLog.date, HabitLog.quantity, HabitLog.created_at
+  ).join(Habit, Habit.id == HabitLog.habit_id).where(
+      Habit.user_id == user_id).order_by(HabitLog.habit_id, HabitLog.date)
+
+  for row in db.execute(logs.execution_options(yield_per=EXPORT_CHUNK_SIZE)):
+    yield {
+        "record_type": "log",
+        "habit_id": _to_plain(row.habit_id),
+        "date": _to_plain(row.date),
+        "quantity": row.quantity,
+        "created_at": _to_plain(row.created_at),
+    }
+
+  # Days rolled up into monthly summaries are exported as logs without a log time
+  summaries = select(HabitLogMonth).join(Habit, Habit.id == HabitLogMonth.habit_id).where(
+      Habit.user_id == user_id).order_by(HabitLogMonth.habit_id, HabitLogMonth.month)
+
+  for summary in db.scalars(summaries.execution_options(yield_per=EXPORT_CHUNK_SIZE)):
+    for day in expand_months([summary]):
+      yield {
+          "record_type": "log",
+          "habit_id": _to_plain(day.habit_id),
+          "date": _to_plain(day.date),
+          "quantity": day.quantity,
+          "created_at": None,
+      }
+
+  completions = select(
+      HabitCompletion.habit_id, HabitCompletion.date, HabitCompletion.is_completed,
+      HabitCompletion.target_at_time, HabitCompletion.quantity_achieved,
+      HabitCompletion.created_at, HabitCompletion.updated_at
+  ).join(Habit, Habit.id == HabitCompletion.habit_id).where(
+      Habit.user_id == user_id).order_by(HabitCompletion.habit_id, HabitCompletion.date)
+
+  for row in db.execute(completions.execution_options(yield_per=EXPORT_CHUNK_SIZE)):
+    yield {
+        "record_type": "completion",
+        "habit_id": _to_plain(row.habit_id),
+        "date": _to_plain(row.date),
+        "is_completed": row.is_completed,
+        "target_at_time": row.target_at_time,
+        "quantity_achieved": row.quantity_achieved,
+        "created_at": _to_plain(row.created_at),
+        "updated_at": _to_plain(row.updated_at),
+    }
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[bytes]:
+  """Encode records as newline-delimited JSON, yielding buffered chunks."""
+  buffer = io.StringIO()
+  for record in records:
+    buffer.write(json.dumps(record, ensure_ascii=False))
+    buffer.write("\n")
+    if buffer.tell() >= EXPORT_FLUSH_BYTES:
+      yield buffer.getvalue().encode("utf-8")
+      buffer.seek(0)
+      buffer.truncate()
+  if buffer.tell():
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_csv(records: Iterable[dict]) -> Iterator[bytes]:
+  """Encode records as CSV with a fixed header, yielding buffered chunks."""
+  buffer = io.StringIO()
+  writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+  writer.writeheader()
+  for record in records:
+    writer.writerow(record)
+    if buffer.tell() >= EXPORT_FLUSH_BYTES:
+      yield buffer.getvalue().encode("utf-8")
+      buffer.seek(0)
+      buffer.truncate()
+  if buffer.tell():
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+  """Compress a byte stream on the fly into a gzip container."""
+  compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = gzip header
+  for chunk in chunks:
+    compressed = compressor.compress(chunk)
+    if compressed:
+      yield compressed
+  yield compressor.flush()
@@ -0,0 +1,88 @@
+"""
+Removal of deleted habits.
+
+Habits with little history are deleted with a single statement; their logs,
+completions and summaries go with them through ON DELETE CASCADE. Larger ones
+are soft-deleted (Habit.deleted_at hides them from ORM queries, see
+app.models.habit) and purged after the response in batches, so no single
+transaction has to delete years of rows. purge_habits.py finishes purges that
+were interrupted, e.g. by a restart.
+"""
+
+import logging
+import uuid
+from typing import Callable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.models.habit_log_archive import HabitLogArchive
+from app.models.habit_log_month import HabitLogMonth
+from app.models.habit_target_history import HabitTargetHistory
+
+
+logger = logging.getLogger(__name__)
+
+# Child tables of a habit, each with the column identifying a row within the habit
+CHILD_KEYS = (
+    (HabitLog, HabitLog.date),
+    (HabitCompletion, HabitCompletion.date),
+    (HabitLogArchive, HabitLogArchive.id),
+    (HabitLogMonth, HabitLogMonth.month),
+    (HabitTargetHistory, HabitTargetHistory.valid_from),
+)
+
+
+def needs_background_purge(db: Session, habit_id: uuid.UUID, threshold: int | None = None) -> bool:
+  """Whether the habit has more logs than the threshold; counts no further than that"""
+  if threshold is None:
+    threshold = settings.habit_purge_threshold
+  logs = select(HabitLog.date).where(HabitLog.habit_id == habit_id).limit(threshold + 1).subquery()
+  return db.scalar(select(func.count()).select_from(logs)) > threshold
+
+
+def purge_habit(db: Session, habit_id: uuid.UUID, batch_size: int | None = None) -> int:
+  """Delete a habit's child rows in committed batches, then the habit; returns child rows deleted"""
+  batch_size = batch_size or settings.habit_purge_batch_size
+  deleted = 0
+  for model, key in CHILD_KEYS:
+    while True:
+      batch = select(key).where(model.habit_id == habit_id).limit(batch_size)
+      count = db.execute(
+          delete(model).where(model.habit_id == habit_id, key.in_(batch))
+          .execution_options(synchronize_session=False)
+      ).rowcount
+      db.commit()
+      deleted += count
+      if count < batch_size:
+        break
+  db.execute(delete(Habit).where(Habit.id == habit_id).execution_options(synchronize_session=False))
+  db.commit()
+  return deleted
+
+
+def purge_habit_in_background(bind: Engine, habit_id: uuid.UUID) -> None:
+  """BackgroundTasks entry point, with its own session on the request's engine"""
+  try:
+    with Session(bind=bind) as db:
+      purge_habit(db, habit_id)
+  except Exception:
+    logger.exception("Purging habit %s failed; purge_habits.py will finish it", habit_id)
+
+
+def purge_deleted_habits(db: Session, batch_size: int | None = None,
+                         on_habit: Callable[[uuid.UUID, int], None] | None = None) -> int:
+  """Purge every soft-deleted habit; returns the number of habits purged"""
+  habit_ids = db.scalars(
+      select(Habit.id).where(Habit.deleted_at.is_not(None)).execution_options(include_deleted=True)
+  ).all()
+  for habit_id in habit_ids:
+    deleted = purge_habit(db, habit_id, batch_size)
+    if on_habit:
+      on_habit(habit_id, deleted)
+  return len(habit_ids)
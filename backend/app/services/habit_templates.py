@@ -0,0 +1,103 @@
+"""
+Catalogue of habit templates, used for onboarding and POST /habits/templates.
+
+The catalogue is built once per process; creating habits from it is a single
+multi-row INSERT whatever the number of templates, so it can share the
+transaction that creates the user.
+"""
+
+import uuid
+from datetime import datetime, timedelta, UTC
+from functools import lru_cache
+from typing import NamedTuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.habit import Category, Frequency, Habit
+
+
+class HabitTemplate(NamedTuple):
+  id: str
+  title: str
+  description: str
+  category: Category
+  frequency: Frequency
+  target: int
+
+
+# Every new user starts with these, in this order
+ONBOARDING_TEMPLATE_IDS = (
+    "morning_exercise", "drink_water", "read_books", "meditation",
+    "learn_something_new", "cardio_workout", "sleep_early", "practice_gratitude",
+)
+
+
+@lru_cache(maxsize=1)
+def template_catalogue() -> dict[str, HabitTemplate]:
+  """All templates by id"""
+  templates = [
+      HabitTemplate("morning_exercise", "Morning Exercise",
+                    "Start your day with 30 minutes of physical activity",
+                    Category.fitness, Frequency.daily, 1),
+      HabitTemplate("drink_water", "Drink Water",
+                    "Stay hydrated by drinking 8 glasses of water",
+                    Category.health, Frequency.daily, 8),
+      HabitTemplate("read_books", "Read Books",
+                    "Read for at least 20 minutes to expand your knowledge",
+                    Category.learning, Frequency.daily, 20),
+      HabitTemplate("meditation", "Meditation",
+                    "Practice mindfulness and meditation for inner peace",
+                    Category.mindfulness, Frequency.daily, 10),
+      HabitTemplate("learn_something_new", "Learn Something New",
+                    "Spend time learning a new skill or topic",
+                    Category.learning, Frequency.weekly, 2),
+      HabitTemplate("cardio_workout", "Cardio Workout",
+                    "Get your heart pumping with cardio exercises",
+                    Category.fitness, Frequency.weekly, 3),
+      HabitTemplate("sleep_early", "Sleep Early",
+                    "Go to bed before 11 PM for better rest",
+                    Category.health, Frequency.daily, 1),
+      HabitTemplate("practice_gratitude", "Practice Gratitude",
+                    "Write down 3 things you're grateful for each day",
+                    Category.mindfulness, Frequency.daily, 3),
+      HabitTemplate("evening_walk", "Evening Walk",
+                    "Take a 20 minute walk after dinner",
+                    Category.fitness, Frequency.daily, 1),
+      HabitTemplate("stretching", "Stretching",
+                    "Stretch for 10 minutes to stay flexible",
+                    Category.fitness, Frequency.daily, 1),
+      HabitTemplate("call_a_friend", "Call a Friend",
+                    "Catch up with a friend or family member",
+                    Category.social, Frequency.weekly, 1),
+      HabitTemplate("budget_review", "Budget Review",
+                    "Go through your spending and savings",
+                    Category.financial, Frequency.monthly, 1),
+  ]
+  return {template.id: template for template in templates}
+
+
+def add_habits_from_templates(db: Session, user_id: uuid.UUID, template_ids: list[str]) -> list[dict]:
+  """
+  Insert one habit per template id with a single statement, without committing.
+  Raises KeyError for unknown ids; returns the inserted rows.
+  """
+  catalogue = template_catalogue()
+  now = datetime.now(UTC)
+  # One microsecond apart, as if added one by one, so lists ordered by created_at stay stable
+  rows = [
+      {
+          "id": uuid.uuid4(),
+          "user_id": user_id,
+          "title": template.title,
+          "description": template.description,
+          "category": template.category,
+          "frequency": template.frequency,
+          "target": template.target,
+          "created_at": now + timedelta(microseconds=position),
+      }
+      for position, template in enumerate(catalogue[template_id] for template_id in template_ids)
+  ]
+  if rows:
+    db.execute(insert(Habit).values(rows))
+  return rows
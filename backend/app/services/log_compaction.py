@@ -0,0 +1,214 @@
+"""
+Roll-up of old habit logs into per-habit monthly summaries.
+
+Whole months older than the horizon are compacted: each habit's logs of a
+month become one habit_log_months row with the month total, the quantity of
+every day and the days whose completion record was completed. The raw rows
+move to habit_logs_archive in the same transaction, so habit_logs only holds
+recent data. Completion records are kept, so streaks and completion rates
+need no change.
+
+Readers that work on daily quantities (the calendar, exports, completion
+rebuilds and the drift check) add compacted_daily_totals to the hot logs.
+"""
+
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, UTC
+from itertools import chain
+from typing import Callable, Iterable, NamedTuple
+
+from sqlalchemy import and_, delete, insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.upsert import dialect_insert
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.models.habit_log_archive import HabitLogArchive
+from app.models.habit_log_month import HabitLogMonth
+from app.services.data_version import bump_data_versions
+
+
+# Habits compacted per transaction
+COMPACTION_CHUNK_SIZE = 100
+# Summary rows written per multi-row upsert statement
+SUMMARY_UPSERT_CHUNK_SIZE = 1000
+
+
+class DailyTotal(NamedTuple):
+  habit_id: uuid.UUID
+  date: date
+  quantity: int
+
+
+@dataclass
+class CompactionReport:
+  habits_checked: int = 0
+  habits_compacted: int = 0
+  logs_archived: int = 0
+  months_written: int = 0
+
+
+def compaction_cutoff(horizon_days: int | None = None, today: date | None = None) -> date:
+  """First day of the month containing the horizon; only months before it are compacted"""
+  if horizon_days is None:
+    horizon_days = settings.log_compaction_horizon_days
+  return ((today or date.today()) - timedelta(days=horizon_days)).replace(day=1)
+
+
+def expand_months(months: Iterable[HabitLogMonth]) -> list[DailyTotal]:
+  """One DailyTotal per logged day of the given summaries, in habit and date order"""
+  return [
+      DailyTotal(row.habit_id, row.month.replace(day=day), quantity)
+      for row in sorted(months, key=lambda row: (row.habit_id, row.month))
+      for day, quantity in enumerate(row.day_quantities, start=1) if quantity
+  ]
+
+
+def compacted_daily_totals(db: Session, habit_ids: list[uuid.UUID],
+                           start: date | None = None, end: date | None = None) -> list[DailyTotal]:
+  """Daily quantities of the given habits held in monthly summaries, optionally within [start, end]"""
+  if not habit_ids:
+    return []
+  q = select(HabitLogMonth).where(HabitLogMonth.habit_id.in_(habit_ids))
+  if start is not None:
+    q = q.where(HabitLogMonth.month >= start.replace(day=1))
+  if end is not None:
+    q = q.where(HabitLogMonth.month <= end)
+  return [
+      row for row in expand_months(db.scalars(q))
+      if (start is None or row.date >= start) and (end is None or row.date <= end)
+  ]
+
+
+def with_compacted_totals(db: Session, habit_ids: list[uuid.UUID], daily_totals: Iterable) -> list:
+  """Hot daily totals plus the compacted ones, still one row per habit and day"""
+  compacted = compacted_daily_totals(db, habit_ids)
+  if not compacted:
+    return list(daily_totals)
+  merged: dict[tuple, int] = {}
+  for row in chain(daily_totals, compacted):
+    merged[(row.habit_id, row.date)] = merged.get((row.habit_id, row.date), 0) + row.quantity
+  return [DailyTotal(habit_id, day, quantity) for (habit_id, day), quantity in merged.items()]
+
+
+def set_compacted_quantities(db: Session, quantities: dict[tuple[uuid.UUID, date], int]) -> set[tuple[uuid.UUID, date]]:
+  """
+  Replace the quantity of days whose month is already compacted, in its summary.
+  Hot logs of those days are removed so readers do not count them on top.
+  Returns the (habit_id, date) keys written; the others belong in habit_logs.
+  """
+  if not quantities:
+    return set()
+  summaries = {(row.habit_id, row.month): row for row in db.scalars(select(HabitLogMonth).where(
+      HabitLogMonth.habit_id.in_({habit_id for habit_id, _ in quantities}),
+      HabitLogMonth.month.in_({day.replace(day=1) for _, day in quantities})))}
+  written = {(habit_id, day) for habit_id, day in quantities if (habit_id, day.replace(day=1)) in summaries}
+  if not written:
+    return written
+
+  for habit_id, day in written:
+    row = summaries[(habit_id, day.replace(day=1))]
+    # Reassigned rather than mutated so the JSON column is flagged as changed
+    day_quantities = list(row.day_quantities)
+    day_quantities[day.day - 1] = quantities[(habit_id, day)]
+    row.day_quantities = day_quantities
+    row.total_quantity = sum(day_quantities)
+    row.days_logged = sum(1 for quantity in day_quantities if quantity)
+  db.execute(delete(HabitLog).where(or_(*(
+      and_(HabitLog.habit_id == habit_id, HabitLog.date == day) for habit_id, day in written))))
+  return written
+
+
+def _month_row(habit_id: uuid.UUID, month: date, day_quantities: list[int], completed_days: int, now: datetime) -> dict:
+  return {
+      "habit_id": habit_id,
+      "month": month,
+      "total_quantity": sum(day_quantities),
+      "days_logged": sum(1 for quantity in day_quantities if quantity),
+      "day_quantities": day_quantities,
+      "completed_days": completed_days,
+      "compacted_at": now,
+  }
+
+
+def compact_chunk(db: Session, habit_ids: list[uuid.UUID], before: date) -> CompactionReport:
+  """Summarise, archive and delete the logs of `habit_ids` dated before `before`"""
+  report = CompactionReport(habits_checked=len(habit_ids))
+  old_logs = (HabitLog.habit_id.in_(habit_ids), HabitLog.date < before)
+  logs = db.execute(select(HabitLog.habit_id, HabitLog.date, HabitLog.quantity).where(*old_logs)).all()
+  if not logs:
+    return report
+
+  months: dict[tuple, list[int]] = {}
+  for log in logs:
+    months.setdefault((log.habit_id, log.date.replace(day=1)), [0] * 31)[log.date.day - 1] += log.quantity
+  compacted_habit_ids = {habit_id for habit_id, _ in months}
+
+  # Months compacted by an earlier run are merged with late-arriving logs
+  for row in db.scalars(select(HabitLogMonth).where(
+      HabitLogMonth.habit_id.in_(compacted_habit_ids), HabitLogMonth.month < before)):
+    quantities = months.get((row.habit_id, row.month))
+    if quantities is not None:
+      for i, quantity in enumerate(row.day_quantities):
+        quantities[i] += quantity
+
+  completed: dict[tuple, int] = {}
+  for habit_id, day in db.execute(select(HabitCompletion.habit_id, HabitCompletion.date).where(
+      HabitCompletion.habit_id.in_(compacted_habit_ids), HabitCompletion.date < before, HabitCompletion.is_completed)):
+    key = (habit_id, day.replace(day=1))
+    completed[key] = completed.get(key, 0) | 1 << (day.day - 1)
+
+  now = datetime.now(UTC)
+  values = [_month_row(habit_id, month, quantities, completed.get((habit_id, month), 0), now)
+            for (habit_id, month), quantities in months.items()]
+  for i in range(0, len(values), SUMMARY_UPSERT_CHUNK_SIZE):
+    stmt = dialect_insert(db, HabitLogMonth.__table__).values(values[i:i + SUMMARY_UPSERT_CHUNK_SIZE])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["habit_id", "month"],
+        set_={column: stmt.excluded[column] for column in
+              ("total_quantity", "days_logged", "day_quantities", "completed_days", "compacted_at")}))
+
+  columns = ["id", "habit_id", "date", "quantity", "created_at"]
+  db.execute(insert(HabitLogArchive).from_select(
+      columns + ["archived_at"],
+      select(*(HabitLog.__table__.c[column] for column in columns), literal(now, HabitLogArchive.archived_at.type))
+      .where(*old_logs)))
+  db.execute(delete(HabitLog).where(*old_logs))
+  # Calendar and export responses change shape, so cached copies must go
+  bump_data_versions(db, select(Habit.user_id).where(Habit.id.in_(compacted_habit_ids)))
+
+  report.habits_compacted = len(compacted_habit_ids)
+  report.logs_archived = len(logs)
+  report.months_written = len(values)
+  return report
+
+
+def compact_logs(db: Session, before: date | None = None, chunk_size: int = COMPACTION_CHUNK_SIZE,
+                 on_chunk: Callable[[CompactionReport], None] | None = None) -> CompactionReport:
+  """
+  Compact the logs dated before `before` (default: the configured horizon),
+  walking habits in id order and committing once per chunk.
+  """
+  before = (before or compaction_cutoff()).replace(day=1)
+  total = CompactionReport()
+  last_id = None
+  while True:
+    q = select(Habit.id).order_by(Habit.id).limit(chunk_size)
+    if last_id is not None:
+      q = q.where(Habit.id > last_id)
+    habit_ids = list(db.scalars(q))
+    if not habit_ids:
+      return total
+    report = compact_chunk(db, habit_ids, before)
+    db.commit()
+    last_id = habit_ids[-1]
+
+    total.habits_checked += report.habits_checked
+    total.habits_compacted += report.habits_compacted
+    total.logs_archived += report.logs_archived
+    total.months_written += report.months_written
+    if on_chunk:
+      on_chunk(total)
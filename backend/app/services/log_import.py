@@ -0,0 +1,190 @@
+"""Streaming bulk import of historical habit logs from CSV or NDJSON."""
+
+import codecs
+import csv
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, UTC
+from typing import BinaryIO, Callable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.upsert import dialect_insert
+from app.lib.calendar import DATE_DIM_FIRST, DATE_DIM_LAST
+from app.models.habit import Habit
+from app.models.habit_log import HabitLog
+from app.services.completion_service import rebuild_habit_completions
+from app.services.data_version import bump_data_version
+from app.services.log_compaction import set_compacted_quantities
+
+
+# Rows validated and upserted per transaction
+IMPORT_BATCH_SIZE = 1000
+# Number of row errors kept in the result
+MAX_REPORTED_ERRORS = 50
+
+
+@dataclass
+class ImportResult:
+  rows_read: int = 0
+  rows_imported: int = 0
+  rows_skipped: int = 0
+  last_committed_row: int = 0
+  completions_rebuilt: int = 0
+  completed: bool = False
+  error: str | None = None
+  row_errors: list[str] = field(default_factory=list)
+
+  def add_row_error(self, row_number: int, message: str) -> None:
+    self.rows_skipped += 1
+    if len(self.row_errors) < MAX_REPORTED_ERRORS:
+      self.row_errors.append(f"row {row_number}: {message}")
+
+
+def iter_import_rows(stream: BinaryIO, format: str) -> Iterator[tuple[int, dict]]:
+  """
+  Parse an upload incrementally, yielding (row_number, record) pairs.
+  Records that belong to another record type of an export (habits,
+  completions) are passed through so the caller can skip them.
+  """
+  text = codecs.getreader("utf-8")(stream)
+  if format == "csv":
+    for row_number, record in enumerate(csv.DictReader(text), start=1):
+      yield row_number, record
+  else:
+    for row_number, line in enumerate(text, start=1):
+      line = line.strip()
+      if not line:
+        continue
+      try:
+        yield row_number, json.loads(line)
+      except json.JSONDecodeError:
+        yield row_number, {"_invalid": "invalid JSON"}
+
+
+def _parse_log_record(record: dict) -> tuple[uuid.UUID, date, int]:
+  if "_invalid" in record:
+    raise ValueError(record["_invalid"])
+  habit_id = uuid.UUID(str(record.get("habit_id", "")))
+  log_date = date.fromisoformat(str(record.get("date", "")))
+  if not DATE_DIM_FIRST <= log_date <= DATE_DIM_LAST:
+    raise ValueError(f"date must be between {DATE_DIM_FIRST} and {DATE_DIM_LAST}")
+  quantity = record.get("quantity")
+  quantity = 1 if quantity in (None, "") else int(quantity)
+  if quantity <= 0:
+    raise ValueError("quantity must be positive")
+  return habit_id, log_date, quantity
+
+
+def _upsert_logs(db: Session, logs: dict[tuple[uuid.UUID, date], int]) -> None:
+  now = datetime.now(UTC)
+  values = [
+      {"id": uuid.uuid4(), "habit_id": habit_id, "date": log_date,
+       "quantity": quantity, "created_at": now}
+      for (habit_id, log_date), quantity in logs.items()
+  ]
+  stmt = dialect_insert(db, HabitLog.__table__).values(values)
+  # Replace rather than add so replaying a batch after a failure is idempotent
+  stmt = stmt.on_conflict_do_update(
+      index_elements=["habit_id", "date"],
+      set_={"quantity": stmt.excluded.quantity}
+  )
+  db.execute(stmt)
+
+
+def import_logs(
+    db: Session,
+    user_id: uuid.UUID,
+    rows: Iterator[tuple[int, dict]],
+    start_row: int = 0,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_progress: Callable[[ImportResult], None] | None = None,
+) -> ImportResult:
+  """
+  Import habit logs for a user in committed batches.
+
+  Each batch validates its habit IDs with one query, then writes all of its
+  logs with a single multi-row upsert; days of months that are already
+  compacted are replaced in their habit_log_months summary instead. As in
+  create_log, a day's quantity may not exceed the habit's target. Completions for every touched habit
+  are rebuilt once at the end. Rows up to ``start_row`` are skipped so an
+  interrupted import can resume from ``last_committed_row``.
+  """
+  result = ImportResult(last_committed_row=start_row)
+  # Owned habit id -> target, which caps a day's quantity as in create_log
+  owned_habits: dict[uuid.UUID, int] = {}
+  foreign_habits: set[uuid.UUID] = set()
+  touched_habits: set[uuid.UUID] = set()
+
+  def flush(batch: list[tuple[int, uuid.UUID, date, int]], last_row: int) -> None:
+    unknown = {habit_id for _, habit_id, _, _ in batch} - owned_habits.keys() - foreign_habits
+    if unknown:
+      found = dict(db.execute(select(Habit.id, Habit.target).where(
+          Habit.id.in_(unknown), Habit.user_id == user_id)).all())
+      owned_habits.update(found)
+      foreign_habits.update(unknown - found.keys())
+
+    logs: dict[tuple[uuid.UUID, date], int] = {}
+    for row_number, habit_id, log_date, quantity in batch:
+      if habit_id not in owned_habits:
+        result.add_row_error(row_number, "habit not found")
+        continue
+      if quantity > owned_habits[habit_id]:
+        result.add_row_error(row_number, f"quantity exceeds habit target ({owned_habits[habit_id]})")
+        continue
+      # Later rows for the same habit and date win
+      logs[(habit_id, log_date)] = quantity
+
+    if logs:
+      # Days of compacted months are replaced in their summary, not added on top of it
+      compacted = set_compacted_quantities(db, logs)
+      hot = {key: quantity for key, quantity in logs.items() if key not in compacted}
+      if hot:
+        _upsert_logs(db, hot)
+      touched_habits.update(habit_id for habit_id, _ in logs)
+      bump_data_version(db, user_id)
+    db.commit()
+
+    result.rows_imported += len(logs)
+    result.last_committed_row = last_row
+    if on_progress:
+      on_progress(result)
+
+  batch: list[tuple[int, uuid.UUID, date, int]] = []
+  last_row = start_row
+  try:
+    for row_number, record in rows:
+      if row_number <= start_row:
+        # Habits imported by an earlier, interrupted run still need completions
+        try:
+          touched_habits.add(uuid.UUID(str(record.get("habit_id", ""))))
+        except (ValueError, AttributeError):
+          pass
+        continue
+      result.rows_read += 1
+      last_row = row_number
+      if record.get("record_type", "log") != "log":
+        continue
+      try:
+        batch.append((row_number, *_parse_log_record(record)))
+      except (ValueError, TypeError) as e:
+        result.add_row_error(row_number, str(e) or "invalid record")
+        continue
+      if len(batch) >= batch_size:
+        flush(batch, last_row)
+        batch = []
+    flush(batch, last_row)
+
+    rebuild_ids = list(db.scalars(select(Habit.id).where(
+        Habit.id.in_(touched_habits), Habit.user_id == user_id))) if touched_habits else []
+    result.completions_rebuilt = rebuild_habit_completions(db, rebuild_ids)
+    bump_data_version(db, user_id)
+    db.commit()
+    result.completed = True
+  except Exception as e:
+    db.rollback()
+    result.error = str(e)
+
+  return result
@@ -0,0 +1,58 @@
+"""
+Lookups of the target in effect on a day.
+
+A target change closes the habit's open habit_target_history range and
+appends a new one (see completion_service.set_habit_target), so history
+grows by one row per change and nothing else is rewritten. Habits without
+history use Habit.target throughout.
+"""
+
+import uuid
+from bisect import bisect_right
+from datetime import date
+from typing import NamedTuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.habit_target_history import HabitTargetHistory
+
+
+class TargetRange(NamedTuple):
+  valid_from: date
+  valid_to: date | None
+  target: int
+
+
+def in_effect(habit_id_column, date_column):
+  """Join condition matching the habit_target_history range covering `date_column`"""
+  return and_(
+      HabitTargetHistory.habit_id == habit_id_column,
+      HabitTargetHistory.valid_from <= date_column,
+      or_(HabitTargetHistory.valid_to.is_(None), HabitTargetHistory.valid_to >= date_column),
+  )
+
+
+def target_ranges(db: Session, habit_ids: list[uuid.UUID]) -> dict[uuid.UUID, list[TargetRange]]:
+  """History of the given habits in valid_from order; habits without history are absent"""
+  if not habit_ids:
+    return {}
+  ranges: dict[uuid.UUID, list[TargetRange]] = {}
+  for row in db.execute(
+      select(HabitTargetHistory.habit_id, HabitTargetHistory.valid_from, HabitTargetHistory.valid_to,
+             HabitTargetHistory.target)
+      .where(HabitTargetHistory.habit_id.in_(habit_ids))
+      .order_by(HabitTargetHistory.habit_id, HabitTargetHistory.valid_from)):
+    ranges.setdefault(row.habit_id, []).append(TargetRange(row.valid_from, row.valid_to, row.target))
+  return ranges
+
+
+def target_on(ranges: list[TargetRange], day: date) -> int | None:
+  """Target of the range covering `day`, None when no range does"""
+  i = bisect_right(ranges, day, key=lambda r: r.valid_from)
+  if i == 0:
+    return None
+  found = ranges[i - 1]
+  if found.valid_to is not None and found.valid_to < day:
+    return None
+  return found.target
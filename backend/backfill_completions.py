@@ -1,135 +1,125 @@
 #!/usr/bin/env python3
 """
 Backfill script to populate habit_completions table with historical data.
-This script calculates completion status for all existing habit logs.
-"""
-
-import sys
-from datetime import date, datetime
-from collections import defaultdict
-from sqlalchemy.orm import Session
-
-from app.db.session import get_db
-from app.models.habit import Habit
-from app.models.habit_log import HabitLog
-from app.models.habit_completion import HabitCompletion
-
-
-def backfill_habit_completions(db: Session, habit_id: str = None) -> None:
-  """
-  Backfill habit_completions table with historical data.
-
-  Args:
-      db: Database session
-      habit_id: Optional specific habit ID to backfill. If None, backfills all habits.
-  """
-  print("🔄 Starting habit completions backfill...")
-
-  # Get habits to process
-  if habit_id:
-    habits = db.query(Habit).filter(Habit.id == habit_id).all()
-    if not habits:
-      print(f"❌ Habit with ID {habit_id} not found")
-      return
-  else:
-    habits = db.query(Habit).all()
 
-  print(f"📊 Found {len(habits)} habits to process")
+Completions are computed in the database, period-aware, one habit-id range
+per transaction, and existing records are left untouched. Ranges run on a
+process pool and finished ones are checkpointed, so an interrupted run can
+be resumed with --resume.
 
-  total_completions_created = 0
-
-  for habit in habits:
-    print(f"\n📝 Processing habit: {habit.title} (ID: {habit.id})")
+    python backfill_completions.py --jobs 8
+    python backfill_completions.py --dry-run
+    python backfill_completions.py --verify
+    python backfill_completions.py <habit_id>
+"""
 
-    # Get all logs for this habit
-    logs = db.query(HabitLog).filter(
-        HabitLog.habit_id == habit.id
-    ).order_by(HabitLog.date).all()
+import argparse
+import json
+import os
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-    if not logs:
-      print(f"  ⚠️  No logs found for habit '{habit.title}'")
-      continue
+from app.db.session import SessionLocal, engine
+from app.services.completion_backfill import VerifyResult, backfill_range, count_missing, habit_id_range, verify_range
 
-    # Group logs by date and sum quantities
-    daily_totals = defaultdict(int)
-    for log in logs:
-      daily_totals[log.date] += log.quantity
 
-    print(f"  📅 Found logs for {len(daily_totals)} unique dates")
+DEFAULT_CHECKPOINT = "backfill_completions.checkpoint"
 
-    # Create completion records
-    completions_created = 0
-    for log_date, total_quantity in daily_totals.items():
-      # Check if completion record already exists
-      existing = db.query(HabitCompletion).filter(
-          HabitCompletion.habit_id == habit.id,
-          HabitCompletion.date == log_date
-      ).first()
 
-      if existing:
-        print(f"  ⚠️  Completion record already exists for {log_date}")
-        continue
+def read_checkpoint(path: str, chunks: int) -> set[int]:
+  """Return the ranges already backfilled by an earlier run with the same --chunks."""
+  if not os.path.exists(path):
+    return set()
+  with open(path) as f:
+    checkpoint = json.load(f)
+  if checkpoint.get("chunks") != chunks:
+    print(f"❌ Checkpoint was written with --chunks {checkpoint.get('chunks')}")
+    sys.exit(1)
+  return set(checkpoint.get("done", []))
 
-      # Determine if habit was completed on this date
-      is_completed = total_quantity >= habit.target
 
-      # Create completion record
-      completion = HabitCompletion(
-          habit_id=habit.id,
-          date=log_date,
-          is_completed=is_completed,
-          target_at_time=habit.target,
-          quantity_achieved=total_quantity
-      )
+def write_checkpoint(path: str, chunks: int, done: set[int]) -> None:
+  """Persist the finished ranges so the backfill can be resumed."""
+  with open(path, "w") as f:
+    json.dump({"chunks": chunks, "done": sorted(done)}, f)
 
-      db.add(completion)
-      completions_created += 1
 
-      status = "✅" if is_completed else "❌"
-      print(f"    {status} {log_date}: {total_quantity}/{habit.target} ({'completed' if is_completed else 'incomplete'})")
+def run_range(mode: str, low: uuid.UUID | None, high: uuid.UUID | None):
+  """Backfill, count or verify one habit-id range in its own session and transaction."""
+  with SessionLocal() as db:
+    if mode == "verify":
+      return verify_range(db, low, high)
+    if mode == "dry-run":
+      return count_missing(db, low, high)
+    inserted = backfill_range(db, low, high)
+    db.commit()
+    return inserted
 
-    # Commit completions for this habit
-    try:
-      db.commit()
-      print(
-          f"  ✅ Created {completions_created} completion records for '{habit.title}'")
-      total_completions_created += completions_created
-    except Exception as e:
-      print(f"  ❌ Error creating completions for '{habit.title}': {e}")
-      db.rollback()
 
-  print(
-      f"\n🎉 Backfill completed! Created {total_completions_created} total completion records")
+def _init_worker():
+  # Forked workers must not reuse the parent's pooled connections
+  engine.dispose(close=False)
 
 
 def main():
   """Main function to run the backfill script."""
-  print("🚀 Habit Completions Backfill Script")
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("habit_id", nargs="?", help="Backfill a single habit")
+  parser.add_argument("--chunks", type=int, default=256, help="Habit-id ranges to split the work into")
+  parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes (PostgreSQL)")
+  parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file")
+  parser.add_argument("--resume", action="store_true", help="Skip ranges finished by an earlier run")
+  mode = parser.add_mutually_exclusive_group()
+  mode.add_argument("--dry-run", action="store_true", help="Count the records that would be inserted")
+  mode.add_argument("--verify", action="store_true", help="Compare stored records with the logs")
+  args = parser.parse_args()
+
+  mode = "verify" if args.verify else "dry-run" if args.dry_run else "backfill"
+  print(f"🚀 Habit Completions Backfill ({mode})")
   print("=" * 50)
 
-  # Get database session
-  db = next(get_db())
-
-  try:
-    # Check if habit_id provided as command line argument
-    habit_id = sys.argv[1] if len(sys.argv) > 1 else None
-
-    if habit_id:
-      print(f"🎯 Backfilling specific habit: {habit_id}")
-    else:
-      print("🌍 Backfilling all habits")
-
-    # Run backfill
-    backfill_habit_completions(db, habit_id)
-
-  except Exception as e:
-    print(f"❌ Error during backfill: {e}")
-    db.rollback()
-    sys.exit(1)
-  finally:
-    db.close()
-
-  print("\n✨ Backfill script completed successfully!")
+  if args.habit_id:
+    habit_id = uuid.UUID(args.habit_id)
+    ranges = {0: (habit_id, uuid.UUID(int=habit_id.int + 1))}
+  else:
+    ranges = {i: habit_id_range(i, args.chunks) for i in range(args.chunks)}
+
+  # Only real backfills of every habit are checkpointed
+  checkpointed = mode == "backfill" and not args.habit_id
+  done = read_checkpoint(args.checkpoint, args.chunks) if checkpointed and args.resume else set()
+  if done:
+    print(f"⏩ Resuming: {len(done)}/{args.chunks} ranges already done")
+  pending = {i: bounds for i, bounds in ranges.items() if i not in done}
+
+  # SQLite allows a single writer, so parallel workers would only queue on its lock
+  jobs = 1 if engine.dialect.name == "sqlite" else max(args.jobs, 1)
+  total = VerifyResult() if mode == "verify" else 0
+  with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+    futures = {pool.submit(run_range, mode, low, high): i for i, (low, high) in pending.items()}
+    for finished, future in enumerate(as_completed(futures), 1):
+      result = future.result()
+      if mode == "verify":
+        total.missing += result.missing
+        total.mismatched += result.mismatched
+      else:
+        total += result
+      if checkpointed:
+        done.add(futures[future])
+        write_checkpoint(args.checkpoint, args.chunks, done)
+      if finished % max(len(futures) // 20, 1) == 0 or finished == len(futures):
+        print(f"  📊 {finished}/{len(futures)} ranges")
+
+  if mode == "verify":
+    print(f"\n🔍 {total.missing} missing, {total.mismatched} mismatched completion records")
+    sys.exit(1 if total.missing or total.mismatched else 0)
+  if mode == "dry-run":
+    print(f"\n🔍 Would create {total} completion records")
+    return
+
+  if checkpointed and os.path.exists(args.checkpoint):
+    os.remove(args.checkpoint)
+  print(f"\n🎉 Backfill completed! Created {total} completion records")
 
 
 if __name__ == "__main__":
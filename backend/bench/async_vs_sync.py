@@ -0,0 +1,99 @@
+"""
+Load comparison of the sync and async database paths.
+
+Drives the ASGI app in-process with concurrent clients against the hot
+read endpoints, once with the sync routes and once with async_db_enabled.
+
+    python -m bench.async_vs_sync --concurrency 200 --requests 4000
+    python -m bench.async_vs_sync --database-url postgresql+psycopg2://...
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+ENDPOINTS = ["/api/stats/logs/today", "/api/stats/overview/calendar", "/api/badges/"]
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+  parser.add_argument("--concurrency", type=int, default=100)
+  parser.add_argument("--requests", type=int, default=2000)
+  parser.add_argument("--cache", action="store_true",
+                      help="Keep the response and user caches on; off by default so requests reach the database")
+  return parser.parse_args()
+
+
+async def run_load(app, headers: dict, concurrency: int, total: int) -> dict:
+  import httpx
+
+  latencies: list[float] = []
+  counter = iter(range(total))
+
+  async def worker(client):
+    for i in counter:
+      started = time.perf_counter()
+      response = await client.get(ENDPOINTS[i % len(ENDPOINTS)], headers=headers)
+      latencies.append(time.perf_counter() - started)
+      response.raise_for_status()
+
+  transport = httpx.ASGITransport(app=app)
+  async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+  latencies.sort()
+  return {
+      "rps": total / elapsed,
+      "p50_ms": statistics.median(latencies) * 1000,
+      "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+  }
+
+
+def main():
+  args = parse_args()
+  if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+  else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+  # Imported late so the engines pick up DATABASE_URL
+  from app.core.config import settings
+  from app.core.security import create_access_token, hash_password
+  from app.db.base import Base
+  from app.db.session import SessionLocal, engine
+  from app.main import create_app
+  from app.models.user import User
+  from app.services.setup_initial_habits import setup_initial_habits
+
+  settings.rate_limit_enabled = False
+  # One user repeating the same requests would otherwise measure cache hits
+  settings.response_cache_enabled = args.cache
+  settings.user_cache_enabled = args.cache
+  Base.metadata.create_all(bind=engine)
+  with SessionLocal() as db:
+    user = db.query(User).filter(User.email == "bench@example.com").first()
+    if not user:
+      user = User(email="bench@example.com", name="Bench", password_hash=hash_password("bench"))
+      db.add(user)
+      db.flush()
+      setup_initial_habits(user.id, db)
+      db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+
+  for async_enabled in (False, True):
+    settings.async_db_enabled = async_enabled
+    app = create_app()
+    result = asyncio.run(run_load(app, headers, args.concurrency, args.requests))
+    label = "async" if async_enabled else "sync"
+    print(f"{label:>5}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+  main()
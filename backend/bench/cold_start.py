@@ -0,0 +1,81 @@
+"""
+Worker cold start: time to import the app in a fresh interpreter.
+
+Each run spawns ``python -c "import app.main"`` (which builds the app), as a
+gunicorn worker does on boot. The median is checked against a budget so a
+regression fails CI. ``--report`` adds a ``-X importtime`` breakdown of the
+slowest top-level packages.
+
+    python -m bench.cold_start --runs 5 --budget-ms 1500
+    python -m bench.cold_start --report --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BOOT = "import app.main"
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--runs", type=int, default=5)
+  parser.add_argument("--budget-ms", type=float, default=1500.0, help="Fail when the median exceeds this")
+  parser.add_argument("--report", action="store_true", help="Print the -X importtime breakdown")
+  parser.add_argument("--top", type=int, default=20)
+  return parser.parse_args()
+
+
+def _env() -> dict:
+  # Skip writing bytecode so every run sees the same cache state
+  return {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+
+
+def time_boot() -> float:
+  started = time.perf_counter()
+  subprocess.run([sys.executable, "-c", BOOT], cwd=BACKEND_DIR, env=_env(), check=True)
+  return (time.perf_counter() - started) * 1000
+
+
+def importtime_report() -> dict[str, float]:
+  """Self import time in ms per top-level package"""
+  result = subprocess.run([sys.executable, "-X", "importtime", "-c", BOOT],
+                          cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True, text=True)
+  totals: dict[str, float] = defaultdict(float)
+  for line in result.stderr.splitlines():
+    if not line.startswith("import time:") or "self [us]" in line:
+      continue
+    self_us, _cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+    totals[name.split(".")[0]] += int(self_us) / 1000
+  return totals
+
+
+def main():
+  args = parse_args()
+  # The first run warms the OS file cache and bytecode
+  time_boot()
+  samples = [time_boot() for _ in range(args.runs)]
+  median = statistics.median(samples)
+
+  if args.report:
+    totals = importtime_report()
+    print(f"{'package':<28}{'self ms':>10}")
+    for name, ms in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+      print(f"{name:<28}{ms:>10.1f}")
+    print()
+
+  print(f"cold start: median {median:.0f} ms, min {min(samples):.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+  if median > args.budget_ms:
+    print("over budget", file=sys.stderr)
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
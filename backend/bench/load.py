@@ -0,0 +1,325 @@
+"""
+Throughput and latency under a realistic mix of client sessions.
+
+Each virtual user replays what the app does: open it (habit list and today's
+progress), tap a few habits to log them, look at one habit's stats, and now
+and then open the badges or the calendar. Clients keep ETags and revalidate
+like the frontend. Sessions run at the given concurrency against the ASGI app
+in-process, or over HTTP against local uvicorn workers, and the report gives
+p50/p95/p99 latency and requests per second per route.
+
+    python -m bench.load --users 50 --concurrency 50 --duration 30
+    python -m bench.load --server uvicorn --workers 4 --json runs/sqlite.json
+    python -m bench.load --database-url postgresql+psycopg2://... \\
+        --json runs/postgres.json --compare runs/sqlite.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+  parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess",
+                      help="Drive the app in-process or spawn uvicorn on a local port")
+  parser.add_argument("--base-url", help="Target an already running server sharing --database-url")
+  parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+  parser.add_argument("--users", type=int, default=50, help="Distinct seeded users")
+  parser.add_argument("--concurrency", type=int, default=50, help="Sessions in flight")
+  parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+  parser.add_argument("--warmup", type=float, default=2.0, help="Seconds run before measuring")
+  parser.add_argument("--no-etags", action="store_true", help="Never send If-None-Match")
+  parser.add_argument("--cache", action="store_true",
+                      help="Keep the response and user caches on; off by default so requests reach the database")
+  parser.add_argument("--seed", type=int, default=1, help="Random seed for the session mix")
+  parser.add_argument("--label", help="Name of this run in the JSON output")
+  parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+  parser.add_argument("--compare", help="Results file of an earlier run to diff against")
+  return parser.parse_args()
+
+
+@dataclass
+class VirtualUser:
+  headers: dict
+  habit_ids: list[str]
+  etags: dict[str, str] = field(default_factory=dict)
+
+
+class Recorder:
+  """Latencies and status codes per route template, ignored until measuring starts"""
+
+  def __init__(self, use_etags: bool):
+    self.use_etags = use_etags
+    self.measuring = False
+    self.latencies: dict[str, list[float]] = defaultdict(list)
+    self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+  async def request(self, client, user: VirtualUser, route: str, method: str, path: str, **kwargs):
+    headers = dict(user.headers)
+    if method == "GET" and self.use_etags and path in user.etags:
+      headers["If-None-Match"] = user.etags[path]
+
+    started = time.perf_counter()
+    try:
+      response = await client.request(method, path, headers=headers, **kwargs)
+    except Exception:
+      if self.measuring:
+        self.statuses[route]["error"] += 1
+      return None
+    elapsed = time.perf_counter() - started
+
+    if self.measuring:
+      self.latencies[route].append(elapsed)
+      self.statuses[route][response.status_code] += 1
+    if "etag" in response.headers:
+      user.etags[path] = response.headers["etag"]
+    return response
+
+
+async def app_session(client, user: VirtualUser, recorder: Recorder, rng: random.Random):
+  """One visit: open the app, log a few habits, check stats, sometimes badges or calendar"""
+  await recorder.request(client, user, "GET /api/habits", "GET", "/api/habits")
+  response = await recorder.request(client, user, "GET /api/stats/logs/today", "GET", "/api/stats/logs/today")
+  # A 304 means nothing changed since the last visit; the client reuses its copy
+  today = response.json() if response is not None and response.status_code == 200 else []
+
+  open_habits = [h for h in today if h["current_progress"] < h["target"]]
+  for habit in rng.sample(open_habits, k=min(len(open_habits), rng.randint(0, 3))):
+    await recorder.request(client, user, "POST /api/logs/habits/{habit_id}/log", "POST",
+                           f"/api/logs/habits/{habit['habit_id']}/log", json={"quantity": 1})
+
+  habit_id = rng.choice(user.habit_ids)
+  await recorder.request(client, user, "GET /api/stats/{habit_id}/stats/streak", "GET",
+                         f"/api/stats/{habit_id}/stats/streak")
+  await recorder.request(client, user, "GET /api/stats/{habit_id}/progress", "GET",
+                         f"/api/stats/{habit_id}/progress")
+  if rng.random() < 0.3:
+    await recorder.request(client, user, "GET /api/badges/", "GET", "/api/badges/")
+  if rng.random() < 0.3:
+    await recorder.request(client, user, "GET /api/stats/overview/calendar", "GET", "/api/stats/overview/calendar")
+
+
+async def run_load(client, users: list[VirtualUser], args) -> tuple[Recorder, float]:
+  recorder = Recorder(use_etags=not args.no_etags)
+  rng = random.Random(args.seed)
+  deadline = time.perf_counter() + args.warmup + args.duration
+
+  async def worker(index: int):
+    worker_rng = random.Random(rng.random())
+    i = index
+    while time.perf_counter() < deadline:
+      await app_session(client, users[i % len(users)], recorder, worker_rng)
+      i += args.concurrency
+
+  async def start_measuring():
+    await asyncio.sleep(args.warmup)
+    recorder.measuring = True
+
+  measuring = asyncio.create_task(start_measuring())
+  await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+  await measuring
+  return recorder, args.duration
+
+
+def seed_users(count: int) -> list[VirtualUser]:
+  """Create (or reuse) bench users with the default habits and badge templates"""
+  from app.core.security import create_access_token, hash_password
+  from app.db.base import Base
+  from app.db.session import SessionLocal, engine
+  from app.models.badge import Badge
+  from app.models.habit import Habit
+  from app.models.user import User
+  from app.services.setup_initial_habits import setup_initial_habits
+
+  Base.metadata.create_all(bind=engine)
+  with SessionLocal() as db:
+    if not db.query(Badge).filter(Badge.user_id.is_(None)).first():
+      from seed_badges import seed_badges
+      with contextlib.redirect_stdout(io.StringIO()):
+        seed_badges()
+
+    password_hash = hash_password("bench")
+    users = []
+    for i in range(count):
+      email = f"bench-load-{i}@example.com"
+      user = db.query(User).filter(User.email == email).first()
+      if not user:
+        user = User(email=email, name=f"Bench {i}", password_hash=password_hash)
+        db.add(user)
+        db.flush()
+        setup_initial_habits(user.id, db)
+        db.commit()
+      habit_ids = [str(habit_id) for habit_id, in db.query(Habit.id).filter(Habit.user_id == user.id)]
+      users.append(VirtualUser(
+          headers={"Authorization": f"Bearer {create_access_token(str(user.id))}"},
+          habit_ids=habit_ids,
+      ))
+  return users
+
+
+def percentile(values: list[float], q: float) -> float:
+  """Nearest-rank percentile of sorted values"""
+  return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+  def stats(latencies: list[float], statuses: Counter) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "not_modified": statuses[304],
+        "errors": sum(n for status, n in statuses.items() if status == "error" or status >= 500),
+    }
+
+  routes = {route: stats(recorder.latencies[route], recorder.statuses[route]) for route in sorted(recorder.statuses)}
+  all_latencies = [latency for latencies in recorder.latencies.values() for latency in latencies]
+  all_statuses = sum(recorder.statuses.values(), Counter())
+  return {"total": stats(all_latencies, all_statuses), "routes": routes}
+
+
+def print_report(results: dict):
+  print(f"{results['label']}: {results['database']}, {results['server']}, "
+        f"{results['concurrency']} concurrent sessions, {results['duration_s']}s")
+  print(f"{'route':<42} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'304':>6} {'err':>5}")
+  rows = list(results["routes"].items()) + [("total", results["total"])]
+  for route, s in rows:
+    print(f"{route:<42} {s['rps']:>8.1f} {s['p50_ms'] or 0:>8.1f} {s['p95_ms'] or 0:>8.1f} "
+          f"{s['p99_ms'] or 0:>8.1f} {s['not_modified']:>6} {s['errors']:>5}")
+
+
+def print_comparison(results: dict, baseline: dict):
+  def change(new, old) -> str:
+    if not new or not old:
+      return "     n/a"
+    return f"{(new - old) / old * 100:+7.1f}%"
+
+  print(f"\nvs {baseline['label']} ({baseline['database']}, {baseline['server']})")
+  print(f"{'route':<42} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+  rows = [(route, s, baseline["routes"].get(route)) for route, s in results["routes"].items()]
+  rows.append(("total", results["total"], baseline["total"]))
+  for route, s, old in rows:
+    if old is None:
+      continue
+    print(f"{route:<42} {change(s['rps'], old['rps'])} {change(s['p50_ms'], old['p50_ms'])} "
+          f"{change(s['p95_ms'], old['p95_ms'])} {change(s['p99_ms'], old['p99_ms'])}")
+
+
+def free_port() -> int:
+  with socket.socket() as sock:
+    sock.bind(("127.0.0.1", 0))
+    return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def uvicorn_server(workers: int, cache: bool):
+  """Run the app under uvicorn on a free local port until the block exits"""
+  import httpx
+
+  port = free_port()
+  cache_enabled = "true" if cache else "false"
+  env = {**os.environ, "RATE_LIMIT_ENABLED": "false",
+         "RESPONSE_CACHE_ENABLED": cache_enabled, "USER_CACHE_ENABLED": cache_enabled}
+  process = subprocess.Popen(
+      [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+       "--workers", str(workers), "--log-level", "warning"],
+      env=env,
+  )
+  base_url = f"http://127.0.0.1:{port}"
+  try:
+    deadline = time.monotonic() + 30
+    while True:
+      try:
+        httpx.get(f"{base_url}/health").raise_for_status()
+        break
+      except httpx.TransportError:
+        if time.monotonic() > deadline or process.poll() is not None:
+          raise RuntimeError("uvicorn did not start")
+        time.sleep(0.2)
+    yield base_url
+  finally:
+    process.terminate()
+    process.wait(timeout=30)
+
+
+async def drive(args, users: list[VirtualUser], base_url: str | None) -> tuple[Recorder, float]:
+  import httpx
+
+  limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+  if base_url:
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+      return await run_load(client, users, args)
+
+  from app.core.config import settings
+  from app.main import create_app
+
+  settings.rate_limit_enabled = False
+  # Sessions repeat the same reads, so caches would otherwise answer most of them
+  settings.response_cache_enabled = args.cache
+  settings.user_cache_enabled = args.cache
+  transport = httpx.ASGITransport(app=create_app())
+  async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+    return await run_load(client, users, args)
+
+
+def main():
+  args = parse_args()
+  if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+  else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+  # Imported late so the engines pick up DATABASE_URL
+  from app.db.session import engine
+
+  users = seed_users(args.users)
+  engine.dispose()
+
+  with contextlib.ExitStack() as stack:
+    base_url = args.base_url
+    if base_url is None and args.server == "uvicorn":
+      base_url = stack.enter_context(uvicorn_server(args.workers, args.cache))
+    recorder, elapsed = asyncio.run(drive(args, users, base_url))
+
+  server = base_url if args.base_url else (
+      f"uvicorn x{args.workers}" if args.server == "uvicorn" else "in-process")
+  results = {
+      "label": args.label or f"{engine.dialect.name}-{args.server}",
+      "database": engine.dialect.name,
+      "server": server,
+      "cache": args.cache,
+      "concurrency": args.concurrency,
+      "users": args.users,
+      "duration_s": args.duration,
+      **summarize(recorder, elapsed),
+  }
+  print_report(results)
+
+  if args.json_path:
+    os.makedirs(os.path.dirname(os.path.abspath(args.json_path)), exist_ok=True)
+    with open(args.json_path, "w") as f:
+      json.dump(results, f, indent=2)
+  if args.compare:
+    with open(args.compare) as f:
+      print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,121 @@
+"""
+Latency of ordinary requests while logins are hammering bcrypt.
+
+Runs a login storm alongside a probe client hitting a sync read endpoint,
+once with bcrypt inline on the threadpool and once on the process pool.
+
+    python -m bench.login_storm --logins 200 --login-concurrency 40
+    python -m bench.login_storm --workers 4 --bcrypt-rounds 12
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+PROBE_ENDPOINT = "/api/habits"
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+  parser.add_argument("--logins", type=int, default=200)
+  parser.add_argument("--login-concurrency", type=int, default=40)
+  parser.add_argument("--probe-concurrency", type=int, default=4)
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+  parser.add_argument("--bcrypt-rounds", type=int, default=12)
+  parser.add_argument("--cache", action="store_true",
+                      help="Keep the response and user caches on; off by default so requests reach the database")
+  return parser.parse_args()
+
+
+def summarize(latencies: list[float]) -> str:
+  if not latencies:
+    return "no samples"
+  latencies.sort()
+  p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+  return f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms"
+
+
+async def run_storm(app, headers: dict, args) -> tuple[list[float], list[float], int]:
+  import httpx
+
+  login_latencies: list[float] = []
+  probe_latencies: list[float] = []
+  shed = 0
+  counter = iter(range(args.logins))
+  storm_done = asyncio.Event()
+
+  async def login_worker(client):
+    nonlocal shed
+    for _ in counter:
+      started = time.perf_counter()
+      response = await client.post("/api/auth/login", json={"email": "bench@example.com", "password": "bench"})
+      login_latencies.append(time.perf_counter() - started)
+      if response.status_code == 503:
+        shed += 1
+      else:
+        response.raise_for_status()
+
+  async def probe_worker(client):
+    while not storm_done.is_set():
+      started = time.perf_counter()
+      response = await client.get(PROBE_ENDPOINT, headers=headers)
+      probe_latencies.append(time.perf_counter() - started)
+      response.raise_for_status()
+
+  transport = httpx.ASGITransport(app=app)
+  async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+    probes = [asyncio.create_task(probe_worker(client)) for _ in range(args.probe_concurrency)]
+    await asyncio.gather(*(login_worker(client) for _ in range(args.login_concurrency)))
+    storm_done.set()
+    await asyncio.gather(*probes)
+
+  return login_latencies, probe_latencies, shed
+
+
+def main():
+  args = parse_args()
+  if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+  else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+  # Imported late so the engines pick up DATABASE_URL
+  from app.core.config import settings
+  from app.core.security import create_access_token, hash_password, shutdown_password_hasher
+  from app.db.base import Base
+  from app.db.session import SessionLocal, engine
+  from app.main import create_app
+  from app.models.user import User
+
+  settings.rate_limit_enabled = False
+  # One user repeating the same probe would otherwise measure cache hits
+  settings.response_cache_enabled = args.cache
+  settings.user_cache_enabled = args.cache
+  settings.bcrypt_rounds = args.bcrypt_rounds
+  Base.metadata.create_all(bind=engine)
+  with SessionLocal() as db:
+    user = db.query(User).filter(User.email == "bench@example.com").first()
+    if not user:
+      user = User(email="bench@example.com", name="Bench", password_hash=hash_password("bench"))
+      db.add(user)
+      db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+
+  for workers in (0, args.workers):
+    shutdown_password_hasher()
+    settings.password_hash_workers = workers
+    app = create_app()
+    logins, probes, shed = asyncio.run(run_storm(app, headers, args))
+    label = "inline" if workers == 0 else f"pool={workers}"
+    print(f"{label:>8}: login {summarize(logins)}  probe {summarize(probes)}  shed {shed}")
+
+  shutdown_password_hasher()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Roll old habit logs up into monthly summaries and archive the raw rows.
+
+Whole months before the horizon (LOG_COMPACTION_HORIZON_DAYS, two years by
+default) are compacted, one transaction per chunk of habits; re-running is
+safe and picks up logs imported into compacted months since.
+
+    python compact_logs.py
+    python compact_logs.py --horizon-days 365
+    python compact_logs.py --dry-run
+"""
+
+import argparse
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.habit_log import HabitLog
+from app.services.log_compaction import COMPACTION_CHUNK_SIZE, CompactionReport, compact_logs, compaction_cutoff
+
+
+def main():
+  """Main function to run the compaction."""
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--horizon-days", type=int, default=settings.log_compaction_horizon_days,
+                      help="Keep at least this many days of raw logs")
+  parser.add_argument("--chunk-size", type=int, default=COMPACTION_CHUNK_SIZE, help="Habits per transaction")
+  parser.add_argument("--dry-run", action="store_true", help="Count the logs that would be compacted")
+  args = parser.parse_args()
+
+  before = compaction_cutoff(args.horizon_days)
+  print("🚀 Habit Log Compaction")
+  print("=" * 50)
+  print(f"📅 Compacting logs dated before {before.isoformat()}")
+
+  def on_chunk(report: CompactionReport) -> None:
+    print(f"  📊 {report.habits_checked} habits checked, {report.logs_archived} logs archived")
+
+  with SessionLocal() as db:
+    if args.dry_run:
+      count = db.scalar(select(func.count()).select_from(HabitLog).where(HabitLog.date < before))
+      print(f"\n🔍 Would compact {count} logs")
+      return
+    report = compact_logs(db, before, chunk_size=args.chunk_size, on_chunk=on_chunk)
+
+  print(f"\n🎉 Compaction completed! {report.logs_archived} logs of {report.habits_compacted} habits "
+        f"archived into {report.months_written} monthly summaries")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Bulk import script for historical habit logs from CSV or NDJSON files.
+Progress is checkpointed after every committed batch so an interrupted
+import can be resumed with --resume.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.services.log_import import IMPORT_BATCH_SIZE, ImportResult, iter_import_rows, import_logs
+
+
+def read_checkpoint(path: str) -> int:
+  """Return the last committed row stored in the checkpoint file."""
+  if not os.path.exists(path):
+    return 0
+  with open(path) as f:
+    return int(json.load(f).get("last_committed_row", 0))
+
+
+def write_checkpoint(path: str, result: ImportResult) -> None:
+  """Persist the last committed row so the import can be resumed."""
+  with open(path, "w") as f:
+    json.dump({"last_committed_row": result.last_committed_row}, f)
+
+
+def main():
+  """Main function to run the import script."""
+  parser = argparse.ArgumentParser(description="Import historical habit logs")
+  parser.add_argument("file", help="CSV or NDJSON file to import")
+  parser.add_argument("--user-email", required=True, help="Owner of the habits")
+  parser.add_argument("--format", choices=["ndjson", "csv"],
+                      help="File format (defaults to the file extension)")
+  parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+  parser.add_argument("--checkpoint", help="Checkpoint file (defaults to <file>.checkpoint)")
+  parser.add_argument("--resume", action="store_true",
+                      help="Resume from the last checkpointed row")
+  args = parser.parse_args()
+
+  file_format = args.format or ("csv" if args.file.endswith(".csv") else "ndjson")
+  checkpoint = args.checkpoint or f"{args.file}.checkpoint"
+  start_row = read_checkpoint(checkpoint) if args.resume else 0
+
+  print("🚀 Habit Log Import Script")
+  print("=" * 50)
+
+  db = SessionLocal()
+  try:
+    user = db.query(User).filter(User.email == args.user_email).first()
+    if not user:
+      print(f"❌ User {args.user_email} not found")
+      sys.exit(1)
+
+    if start_row:
+      print(f"⏩ Resuming after row {start_row}")
+
+    def on_progress(result: ImportResult) -> None:
+      write_checkpoint(checkpoint, result)
+      print(f"  📥 row {result.last_committed_row}: {result.rows_imported} imported, {result.rows_skipped} skipped")
+
+    with open(args.file, "rb") as f:
+      result = import_logs(db, user.id, iter_import_rows(f, file_format),
+                           start_row=start_row, batch_size=args.batch_size,
+                           on_progress=on_progress)
+
+    for row_error in result.row_errors:
+      print(f"  ⚠️  {row_error}")
+
+    if not result.completed:
+      print(f"❌ Import stopped after row {result.last_committed_row}: {result.error}")
+      print("   Re-run with --resume to continue")
+      sys.exit(1)
+
+    if os.path.exists(checkpoint):
+      os.remove(checkpoint)
+    print(f"\n🎉 Imported {result.rows_imported} logs, rebuilt {result.completions_rebuilt} completion records")
+  finally:
+    db.close()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Maintain the monthly partitions of habit_logs and habit_completions (PostgreSQL).
+
+Creates the partitions of the coming months, which the app also does on
+startup; run it from cron so long-lived deployments never fall back to the
+default partition. Old months can be detached: their rows stay in standalone
+tables but are no longer read by the app.
+
+    python manage_partitions.py
+    python manage_partitions.py --months-ahead 6
+    python manage_partitions.py --detach-before 2023-01-01
+"""
+
+import argparse
+import sys
+from datetime import date
+
+from app.core.config import settings
+from app.db.partitions import PARTITIONED_TABLES, detach_partitions, ensure_partitions, is_partitioned
+from app.db.session import engine
+
+
+def main():
+  """Main function to run the partition maintenance."""
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--months-ahead", type=int, default=settings.partition_months_ahead,
+                      help="Future months to create partitions for")
+  parser.add_argument("--detach-before", type=date.fromisoformat,
+                      help="Detach the monthly partitions ending on or before this date")
+  args = parser.parse_args()
+
+  print("🚀 Habit Data Partitions")
+  print("=" * 50)
+
+  with engine.begin() as conn:
+    if not any(is_partitioned(conn, table) for table in PARTITIONED_TABLES):
+      print(f"❌ No partitioned tables on this {engine.dialect.name} database")
+      sys.exit(1)
+
+    created = ensure_partitions(conn, args.months_ahead)
+    for name in created:
+      print(f"  ✅ Created {name}")
+    print(f"📅 {len(created)} partitions created")
+
+    if args.detach_before:
+      detached = detach_partitions(conn, args.detach_before)
+      for name in detached:
+        print(f"  📦 Detached {name}")
+      print(f"🗄️  {len(detached)} partitions detached")
+
+
+if __name__ == "__main__":
+  main()
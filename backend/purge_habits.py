@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Purge soft-deleted habits.
+
+Habits with more logs than HABIT_PURGE_THRESHOLD are soft-deleted and purged
+in the background after the delete request; this finishes any purge that was
+interrupted, e.g. by a restart. Safe to run at any time, e.g. nightly.
+
+    python purge_habits.py
+    python purge_habits.py --batch-size 1000
+"""
+
+import argparse
+import uuid
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.habit_purge import purge_deleted_habits
+
+
+def main():
+  """Main function to run the purge."""
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--batch-size", type=int, default=settings.habit_purge_batch_size,
+                      help="Child rows deleted per transaction")
+  args = parser.parse_args()
+
+  print("🚀 Deleted Habit Purge")
+  print("=" * 50)
+
+  def on_habit(habit_id: uuid.UUID, deleted: int) -> None:
+    print(f"  🗑️  {habit_id}: {deleted} rows")
+
+  with SessionLocal() as db:
+    purged = purge_deleted_habits(db, batch_size=args.batch_size, on_habit=on_habit)
+
+  print(f"\n🎉 Purge completed! {purged} habits removed")
+
+
+if __name__ == "__main__":
+  main()
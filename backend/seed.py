@@ -1,13 +1,37 @@
+"""
+Seed data: the demo account, or synthetic users for capacity testing.
+
+    python seed.py
+    python seed.py --users 10000 --habits 8 --days 365 --jobs 8
+
+Synthetic data is generated per user from a RNG keyed on (seed, user index),
+so a run is reproducible and independent of --jobs. Rows are written with
+COPY on PostgreSQL and multi-row inserts elsewhere, completions included.
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import random
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import date, timedelta
+from functools import lru_cache
 
 from sqlalchemy.orm import Session
 
 from app.core.security import hash_password
 from app.db.session import SessionLocal, engine
 from app.db.base import Base
-from app.models.user import User
-from app.models.habit import Habit, Frequency
+from app.models.user import Provider, User
+from app.models.habit import Category, Habit, Frequency
 from app.models.habit_log import HabitLog
+from app.models.habit_completion import HabitCompletion
+from app.lib.calendar import period_bounds
 
 
 def seed() -> None:
@@ -55,5 +79,241 @@ def seed() -> None:
     db.close()
 
 
+# Synthetic data distributions
+FREQUENCIES = [Frequency.daily, Frequency.weekly, Frequency.monthly]
+FREQUENCY_WEIGHTS = [0.7, 0.25, 0.05]
+# Target per period, by frequency
+TARGETS = {
+    Frequency.daily: ([1, 2, 3, 5], [0.75, 0.12, 0.08, 0.05]),
+    Frequency.weekly: ([1, 2, 3, 4, 5], [0.15, 0.25, 0.35, 0.15, 0.1]),
+    Frequency.monthly: ([2, 4, 8, 12, 20], [0.2, 0.35, 0.25, 0.1, 0.1]),
+}
+TITLES = {
+    Category.health: ["Drink Water", "Take Vitamins", "Sleep 8 Hours"],
+    Category.fitness: ["Morning Run", "Cardio", "Gym Session", "Stretching", "Yoga"],
+    Category.productivity: ["Plan Tomorrow", "Inbox Zero", "Deep Work Block"],
+    Category.learning: ["Read 20 Pages", "Language Practice", "Online Course"],
+    Category.mindfulness: ["Meditation", "Journal", "Gratitude List"],
+    Category.social: ["Call Family", "Meet a Friend"],
+    Category.creative: ["Sketch", "Write 500 Words", "Practice Guitar"],
+    Category.financial: ["Track Expenses", "No Takeout"],
+    Category.hobby: ["Gardening", "Chess Puzzle"],
+    Category.other: ["Tidy Up"],
+}
+CATEGORIES = list(TITLES)
+CATEGORY_WEIGHTS = [0.15, 0.25, 0.12, 0.12, 0.12, 0.05, 0.06, 0.05, 0.05, 0.03]
+# Time of day a log is written: morning, midday and evening peaks (hour, spread, share)
+LOG_HOURS = [(7.5, 1.0, 0.45), (12.5, 1.5, 0.3), (20.5, 1.5, 0.25)]
+_LOG_HOUR_CUTOFFS = list(itertools.accumulate(share for _, _, share in LOG_HOURS))
+
+_NUMERIC_HEX = re.compile(r"[0-9]*e?[0-9]*")
+
+USER_COLUMNS = ["id", "email", "password_hash", "name", "provider", "created_at", "has_password"]
+HABIT_COLUMNS = ["id", "user_id", "title", "frequency", "target", "category", "description", "created_at"]
+LOG_COLUMNS = ["id", "habit_id", "date", "quantity", "created_at"]
+COMPLETION_COLUMNS = ["id", "habit_id", "date", "is_completed", "target_at_time",
+                      "quantity_achieved", "created_at", "updated_at"]
+
+
+@dataclass
+class SyntheticBatch:
+  """Rows as tuples of plain values, ready for COPY or a DB-API executemany"""
+  users: list[tuple] = field(default_factory=list)
+  habits: list[tuple] = field(default_factory=list)
+  logs: list[tuple] = field(default_factory=list)
+  completions: list[tuple] = field(default_factory=list)
+
+
+def _uuid(rng: random.Random) -> str:
+  """Hex of a random version 4 UUID"""
+  while True:
+    value = (rng.getrandbits(128) & _UUID_CLEAR) | _UUID_V4
+    text = f"{value:032x}"
+    # SQLite gives UUID columns numeric affinity: a hex string that parses as a
+    # number (digits and at most an "e") would be stored as a REAL and collide
+    if not _NUMERIC_HEX.fullmatch(text):
+      return text
+
+
+_UUID_CLEAR = ~((0xF000 << 64) | (0xC000 << 48)) & ((1 << 128) - 1)
+_UUID_V4 = (0x4000 << 64) | (0x8000 << 48)
+
+
+def _log_time(rng: random.Random, day: str) -> str:
+  r = rng.random()
+  hour, spread, _ = next((peak for peak, cutoff in zip(LOG_HOURS, _LOG_HOUR_CUTOFFS, strict=True) if r < cutoff),
+                         LOG_HOURS[-1])
+  seconds = int(min(max(rng.gauss(hour, spread), 0.0), 23.99) * 3600)
+  return f"{day} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+@lru_cache(maxsize=4)
+def _calendar(end_date: date, days: int) -> list[tuple[str, bool, dict[Frequency, str]]]:
+  """(ISO date, is weekend, period key per frequency) for each day of the window"""
+  calendar = []
+  for offset in range(days - 1, -1, -1):
+    day = end_date - timedelta(days=offset)
+    periods = {frequency: period_bounds(frequency.value, day)[0].isoformat() for frequency in Frequency}
+    calendar.append((day.isoformat(), day.weekday() >= 5, periods))
+  return calendar
+
+
+def generate_user(batch: SyntheticBatch, seed: int, index: int, habits_per_user: int, days: int,
+                  end_date: date, password_hash: str) -> None:
+  """Append one synthetic user with its habits, logs and completions to the batch"""
+  rng = random.Random(f"{seed}:{index}")
+  calendar = _calendar(end_date, days)
+  user_id = _uuid(rng)
+  batch.users.append((user_id, f"synthetic-{index}@example.com", password_hash, f"Synthetic User {index}",
+                      Provider.email.name, _log_time(rng, calendar[0][0]), True))
+
+  # Users differ in how consistent they are; their habits scatter around that
+  user_adherence = rng.betavariate(4, 2)
+  for _ in range(habits_per_user):
+    habit_id = _uuid(rng)
+    frequency = rng.choices(FREQUENCIES, FREQUENCY_WEIGHTS)[0]
+    targets, weights = TARGETS[frequency]
+    target = rng.choices(targets, weights)[0]
+    category = rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0]
+    # Some habits are added later, some abandoned before the end
+    start = rng.randrange(max(days // 4, 1))
+    stop = days if rng.random() < 0.8 else rng.randint(start + 1, days)
+    adherence = min(max(user_adherence * rng.uniform(0.6, 1.15), 0.02), 0.98)
+    batch.habits.append((habit_id, user_id, rng.choice(TITLES[category]), frequency.name, target, category.name,
+                         None, _log_time(rng, calendar[start][0])))
+
+    # Chance of logging on a given day, spread so a consistent user meets the period target
+    if frequency == Frequency.daily:
+      day_chance = adherence
+    else:
+      day_chance = min(adherence * target / (7 if frequency == Frequency.weekly else 30) * 1.2, 1.0)
+    weekend_chance = day_chance * 0.8
+
+    logged = []
+    period_totals: dict[str, int] = defaultdict(int)
+    for day, weekend, periods in calendar[start:stop]:
+      if rng.random() >= (weekend_chance if weekend else day_chance):
+        continue
+      if frequency == Frequency.daily:
+        quantity = target if rng.random() < adherence else rng.randint(1, target)
+      else:
+        quantity = 1 if target < 4 or rng.random() < 0.8 else 2
+      created_at = _log_time(rng, day)
+      period = periods[frequency]
+      logged.append((day, period, quantity, created_at))
+      batch.logs.append((_uuid(rng), habit_id, day, quantity, created_at))
+      period_totals[period] += quantity
+
+    # Completions as rebuild_habit_completions would write them
+    for day, period, quantity, created_at in logged:
+      batch.completions.append((_uuid(rng), habit_id, day, period_totals[period] >= target, target,
+                                quantity, created_at, created_at))
+
+
+def write_rows(conn, table: str, columns: list[str], rows: list[tuple], batch_size: int) -> None:
+  """COPY on PostgreSQL, chunked executemany on SQLite, straight through the DB-API connection"""
+  if not rows:
+    return
+  dialect = conn.dialect.name
+  cursor = conn.connection.dbapi_connection.cursor()
+  if dialect == "postgresql":
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+  elif dialect == "sqlite":
+    statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for i in range(0, len(rows), batch_size):
+      cursor.executemany(statement, rows[i:i + batch_size])
+  else:
+    raise NotImplementedError(f"Synthetic seeding is not supported on {dialect}")
+
+
+def write_batch(batch: SyntheticBatch, batch_size: int) -> None:
+  with engine.begin() as conn:
+    if conn.dialect.name == "postgresql":
+      # Timestamps are written without an offset and are UTC
+      conn.exec_driver_sql("SET LOCAL TIME ZONE 'UTC'")
+    elif conn.dialect.name == "sqlite":
+      # Throwaway capacity data: skip fsyncs and keep the indexes in memory
+      conn.exec_driver_sql("PRAGMA synchronous = OFF")
+      conn.exec_driver_sql("PRAGMA cache_size = -262144")
+    write_rows(conn, User.__tablename__, USER_COLUMNS, batch.users, batch_size)
+    write_rows(conn, Habit.__tablename__, HABIT_COLUMNS, batch.habits, batch_size)
+    write_rows(conn, HabitLog.__tablename__, LOG_COLUMNS, batch.logs, batch_size)
+    write_rows(conn, HabitCompletion.__tablename__, COMPLETION_COLUMNS, batch.completions, batch_size)
+
+
+def generate_users(first: int, last: int, seed_value: int, habits_per_user: int, days: int,
+                   end_date: date, password_hash: str, batch_size: int) -> tuple[int, int]:
+  """Generate and write users [first, last) in one transaction; returns (users, logs)"""
+  batch = SyntheticBatch()
+  for index in range(first, last):
+    generate_user(batch, seed_value, index, habits_per_user, days, end_date, password_hash)
+  write_batch(batch, batch_size)
+  return len(batch.users), len(batch.logs)
+
+
+def _init_worker():
+  # Forked workers must not reuse the parent's pooled connections
+  engine.dispose(close=False)
+
+
+def seed_synthetic(users: int, habits_per_user: int, days: int, seed_value: int = 1, first_user: int = 0,
+                   jobs: int = 1, users_per_batch: int = 500, batch_size: int = 5000,
+                   end_date: date | None = None) -> int:
+  """Create users [first_user, first_user + users) with habits, logs and completions; returns the log count"""
+  Base.metadata.create_all(bind=engine)
+  end_date = end_date or date.today()
+  # Hashed once: bcrypt per synthetic user would dominate the run
+  password_hash = hash_password("synthetic")
+  ranges = [(start, min(start + users_per_batch, first_user + users))
+            for start in range(first_user, first_user + users, users_per_batch)]
+  options = (seed_value, habits_per_user, days, end_date, password_hash, batch_size)
+
+  # SQLite allows a single writer, so parallel workers would only queue on its lock
+  if jobs <= 1 or engine.dialect.name == "sqlite":
+    results = (generate_users(first, last, *options) for first, last in ranges)
+    return _report(results, len(ranges))
+
+  with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+    futures = [pool.submit(generate_users, first, last, *options) for first, last in ranges]
+    return _report((future.result() for future in futures), len(ranges))
+
+
+def _report(results, total_batches: int) -> int:
+  started = time.perf_counter()
+  users = logs = 0
+  for done, (batch_users, batch_logs) in enumerate(results, 1):
+    users += batch_users
+    logs += batch_logs
+    elapsed = time.perf_counter() - started
+    print(f"[{done}/{total_batches}] {users} users, {logs} logs, {logs / max(elapsed, 1e-9):,.0f} logs/s")
+  return logs
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--users", type=int, help="Synthetic users to create; omit to seed the demo account")
+  parser.add_argument("--habits", type=int, default=8, help="Habits per synthetic user")
+  parser.add_argument("--days", type=int, default=365, help="Days of history")
+  parser.add_argument("--seed", type=int, default=1, help="Random seed")
+  parser.add_argument("--first-user", type=int, default=0,
+                      help="Index of the first user, to grow an existing data set")
+  parser.add_argument("--jobs", type=int, default=1, help="Worker processes (PostgreSQL)")
+  parser.add_argument("--users-per-batch", type=int, default=500, help="Users per transaction")
+  parser.add_argument("--batch-size", type=int, default=5000, help="Rows per multi-row insert")
+  args = parser.parse_args()
+
+  if args.users is None:
+    seed()
+    return
+  started = time.perf_counter()
+  logs = seed_synthetic(args.users, args.habits, args.days, seed_value=args.seed, first_user=args.first_user,
+                        jobs=args.jobs, users_per_batch=args.users_per_batch, batch_size=args.batch_size)
+  elapsed = time.perf_counter() - started
+  print(f"Seeded {args.users} users, {logs} logs in {elapsed:.1f}s ({logs / max(elapsed, 1e-9):,.0f} logs/s)")
+
+
 if __name__ == "__main__":
-  seed()
+  main()
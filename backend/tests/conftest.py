@@ -1,14 +1,15 @@
 import pytest
 import asyncio
+from contextlib import contextmanager
 from typing import Generator, AsyncGenerator
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from app.main import create_app
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.user import User
 from app.models.habit import Habit, Category, Frequency
 from app.models.habit_log import HabitLog
@@ -32,6 +33,9 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine)
 
+# date_dim is static and filled when created, so it is kept across tests
+PER_TEST_TABLES = [table for table in Base.metadata.sorted_tables if table.name != "date_dim"]
+
 
 def override_get_db():
   """Override the database dependency for testing"""
@@ -131,7 +135,7 @@ def db_session() -> Generator[Session, None, None]:
   finally:
     db.close()
     # Drop all tables after each test
-    Base.metadata.drop_all(bind=engine)
+    Base.metadata.drop_all(bind=engine, tables=PER_TEST_TABLES)
 
 
 @pytest.fixture(scope="function")
@@ -139,6 +143,13 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
   """Create a test client with database override"""
   app = create_app()
   app.dependency_overrides[get_db] = override_get_db
+  app.dependency_overrides[get_read_db] = override_get_db
+
+  # Start every test with empty user and response caches
+  from app.core.user_cache import user_cache
+  from app.core.response_cache import response_cache
+  user_cache.clear()
+  response_cache.clear()
 
   # Disable rate limiting for tests
   from app.core.config import settings
@@ -270,3 +281,89 @@ def test_habit_log(db_session: Session, test_user: User, test_habit: Habit) -> H
   db_session.commit()
   db_session.refresh(log)
   return log
+
+
+class QueryCounter:
+  """SQL statements seen on the test engine while a count_queries block is open"""
+
+  def __init__(self):
+    self.statements: list[str] = []
+
+  @property
+  def count(self) -> int:
+    return len(self.statements)
+
+
+@contextmanager
+def count_queries() -> Generator[QueryCounter, None, None]:
+  """Record every statement executed on the test engine inside the block"""
+  counter = QueryCounter()
+
+  def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter.statements.append(statement)
+
+  event.listen(engine, "before_cursor_execute", before_cursor_execute)
+  try:
+    yield counter
+  finally:
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(budget: int) -> Generator[QueryCounter, None, None]:
+  """Fail when the block executes more than `budget` statements"""
+  with count_queries() as counter:
+    yield counter
+  if counter.count > budget:
+    listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(counter.statements))
+    pytest.fail(
+        f"Expected at most {budget} queries, {counter.count} executed:\n{listing}",
+        pytrace=False)
+
+
+@pytest.fixture
+def query_budget():
+  """Context manager factory: `with query_budget(5): client.get(...)`"""
+  return assert_max_queries
+
+
+@pytest.fixture
+def many_habits(db_session: Session, test_user: User) -> list[Habit]:
+  """
+  A user with habits of every frequency and several weeks of logs.
+
+  Large enough that a per-habit or per-day query blows any endpoint budget.
+  """
+  from datetime import date, timedelta
+  from app.services.completion_service import rebuild_habit_completions
+
+  frequencies = [Frequency.daily, Frequency.weekly, Frequency.monthly]
+  categories = list(Category)
+  habits = [
+      Habit(
+          user_id=test_user.id,
+          title=f"Seeded Habit {i}",
+          description="Seeded for query budgets",
+          category=categories[i % len(categories)],
+          frequency=frequencies[i % len(frequencies)],
+          target=1 + i % 3
+      )
+      for i in range(24)
+  ]
+  db_session.add_all(habits)
+  db_session.flush()
+
+  today = date.today()
+  db_session.add_all(
+      HabitLog(habit_id=habit.id, date=today - timedelta(days=day), quantity=1 + (i + day) % 3)
+      for i, habit in enumerate(habits)
+      for day in range(35)
+      if (i + day) % 4
+  )
+  db_session.flush()
+  rebuild_habit_completions(db_session, [habit.id for habit in habits])
+  db_session.commit()
+
+  for habit in habits:
+    db_session.refresh(habit)
+  return habits
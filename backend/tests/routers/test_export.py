@@ -0,0 +1,91 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit, Frequency
+from app.models.user import User
+
+
+class TestExportEndpoints:
+  """Test data export endpoints"""
+
+  def test_export_ndjson_success(self, client: TestClient, auth_headers: dict, test_habits: list[Habit]):
+    """Test NDJSON export contains habits, logs and completions"""
+    client.post(f"/api/logs/habits/{test_habits[0].id}/log",
+                json={"quantity": 1},
+                headers=auth_headers)
+    client.post(f"/api/logs/habits/{test_habits[1].id}/log",
+                json={"quantity": 1, "date": (date.today() - timedelta(days=1)).isoformat()},
+                headers=auth_headers)
+
+    response = client.get("/api/export?format=ndjson", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "attachment" in response.headers["content-disposition"]
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    types = [r["record_type"] for r in records]
+    assert types.count("habit") == 3
+    assert types.count("log") == 2
+    assert types.count("completion") == 2
+
+    log_record = next(r for r in records if r["record_type"] == "log" and r["habit_id"] == str(test_habits[0].id))
+    assert log_record["date"] == date.today().isoformat()
+    assert log_record["quantity"] == 1
+
+  def test_export_csv_success(self, client: TestClient, auth_headers: dict, test_habit: Habit):
+    """Test CSV export has a header and one row per record"""
+    client.post(f"/api/logs/habits/{test_habit.id}/log",
+                json={"quantity": 1},
+                headers=auth_headers)
+
+    response = client.get("/api/export?format=csv", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["record_type"] for r in rows] == ["habit", "log", "completion"]
+    assert rows[0]["title"] == "Test Habit"
+    assert rows[1]["quantity"] == "1"
+
+  def test_export_gzip(self, client: TestClient, auth_headers: dict, test_habit: Habit):
+    """Test gzip export decompresses to the plain NDJSON stream"""
+    response = client.get("/api/export?format=ndjson&gzip=true", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.ndjson.gz"')
+
+    lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["habit_id"] == str(test_habit.id)
+
+  def test_export_only_own_data(self, client: TestClient, auth_headers: dict, test_user_2: User, db_session: Session):
+    """Test export excludes other users' habits"""
+    other = Habit(user_id=test_user_2.id, title="Other", frequency=Frequency.daily, target=1)
+    db_session.add(other)
+    db_session.commit()
+
+    response = client.get("/api/export", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.text == ""
+
+  def test_export_invalid_format(self, client: TestClient, auth_headers: dict):
+    """Test export with unsupported format"""
+    response = client.get("/api/export?format=xml", headers=auth_headers)
+
+    assert response.status_code == 422
+
+  def test_export_unauthenticated(self, client: TestClient):
+    """Test export without authentication"""
+    response = client.get("/api/export")
+
+    assert response.status_code == 401
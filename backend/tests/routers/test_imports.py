@@ -0,0 +1,203 @@
+import io
+import json
+import pytest
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit, Frequency
+from app.models.habit_log import HabitLog
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log_month import HabitLogMonth
+from app.models.user import User
+from app.services.log_compaction import compact_logs
+
+
+def _ndjson(records: list[dict]) -> bytes:
+  return "\n".join(json.dumps(r) for r in records).encode("utf-8")
+
+
+class TestImportEndpoints:
+  """Test bulk log import endpoints"""
+
+  def test_import_ndjson_success(self, client: TestClient, auth_headers: dict, test_habit: Habit, db_session: Session):
+    """Test NDJSON import creates logs and completions"""
+    today = date.today()
+    records = [{"habit_id": str(test_habit.id), "date": (today - timedelta(days=i)).isoformat(), "quantity": 1}
+               for i in range(5)]
+
+    response = client.post("/api/import/logs?format=ndjson",
+                           files={"file": ("logs.ndjson", _ndjson(records))},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["completed"] is True
+    assert data["rows_read"] == 5
+    assert data["rows_imported"] == 5
+    assert data["last_committed_row"] == 5
+    assert data["completions_rebuilt"] == 5
+
+    assert db_session.query(HabitLog).filter(HabitLog.habit_id == test_habit.id).count() == 5
+    completions = db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == test_habit.id).all()
+    assert all(c.is_completed for c in completions)
+
+  def test_import_csv_success(self, client: TestClient, auth_headers: dict, test_habit: Habit, db_session: Session):
+    """Test CSV import"""
+    csv_body = f"habit_id,date,quantity\n{test_habit.id},{date.today().isoformat()},1\n"
+
+    response = client.post("/api/import/logs?format=csv",
+                           files={"file": ("logs.csv", csv_body.encode("utf-8"))},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["rows_imported"] == 1
+    assert db_session.query(HabitLog).filter(HabitLog.habit_id == test_habit.id).count() == 1
+
+  def test_import_export_round_trip(self, client: TestClient, auth_headers: dict, test_habit: Habit, db_session: Session):
+    """Test an export file can be imported back, skipping non-log records"""
+    client.post(f"/api/logs/habits/{test_habit.id}/log",
+                json={"quantity": 1},
+                headers=auth_headers)
+    export = client.get("/api/export?format=ndjson", headers=auth_headers)
+    db_session.query(HabitLog).delete()
+    db_session.commit()
+
+    response = client.post("/api/import/logs",
+                           files={"file": ("export.ndjson", export.content)},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_read"] == 3  # habit, log, completion
+    assert data["rows_imported"] == 1
+    assert data["rows_skipped"] == 0
+
+  def test_import_weekly_period_completion(self, client: TestClient, auth_headers: dict, test_user: User, db_session: Session):
+    """Test completions are rebuilt against the weekly period total"""
+    habit = Habit(user_id=test_user.id, title="Gym", frequency=Frequency.weekly, target=2)
+    db_session.add(habit)
+    db_session.commit()
+    monday = date.today() - timedelta(days=date.today().weekday() + 7)
+    records = [{"habit_id": str(habit.id), "date": monday.isoformat(), "quantity": 1},
+               {"habit_id": str(habit.id), "date": (monday + timedelta(days=2)).isoformat(), "quantity": 1}]
+
+    response = client.post("/api/import/logs",
+                           files={"file": ("logs.ndjson", _ndjson(records))},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    completions = db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == habit.id).all()
+    assert len(completions) == 2
+    assert all(c.is_completed for c in completions)
+
+  def test_import_rejects_invalid_and_foreign_rows(self, client: TestClient, auth_headers: dict, test_habit: Habit, test_user_2: User, db_session: Session):
+    """Test rows for unknown habits or with bad values are skipped and reported"""
+    other = Habit(user_id=test_user_2.id, title="Other", frequency=Frequency.daily, target=1)
+    db_session.add(other)
+    db_session.commit()
+    records = [{"habit_id": str(test_habit.id), "date": date.today().isoformat(), "quantity": 1},
+               {"habit_id": str(other.id), "date": date.today().isoformat(), "quantity": 1},
+               {"habit_id": str(test_habit.id), "date": "not-a-date", "quantity": 1},
+               {"habit_id": str(test_habit.id), "date": date.today().isoformat(), "quantity": -1},
+               {"habit_id": str(test_habit.id), "date": "1969-12-31", "quantity": 1}]
+
+    response = client.post("/api/import/logs",
+                           files={"file": ("logs.ndjson", _ndjson(records))},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_imported"] == 1
+    assert data["rows_skipped"] == 4
+    assert len(data["row_errors"]) == 4
+    assert "row 5: date must be between 1970-01-01 and 2099-12-31" in data["row_errors"]
+    assert db_session.query(HabitLog).filter(HabitLog.habit_id == other.id).count() == 0
+
+  def test_import_rejects_zero_quantity(self, client: TestClient, auth_headers: dict, test_habit: Habit, db_session: Session):
+    """Test an explicit 0 quantity is rejected, and only a missing quantity defaults to 1"""
+    today = date.today()
+    csv_body = (f"habit_id,date,quantity\n"
+                f"{test_habit.id},{today.isoformat()},0\n"
+                f"{test_habit.id},{(today - timedelta(days=1)).isoformat()},\n")
+
+    response = client.post("/api/import/logs?format=csv",
+                           files={"file": ("logs.csv", csv_body.encode("utf-8"))},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_imported"] == 1
+    assert data["row_errors"] == ["row 1: quantity must be positive"]
+    logs = db_session.query(HabitLog).filter(HabitLog.habit_id == test_habit.id).all()
+    assert [(log.date, log.quantity) for log in logs] == [(today - timedelta(days=1), 1)]
+
+  def test_import_rejects_quantity_over_target(self, client: TestClient, auth_headers: dict, test_habit: Habit, db_session: Session):
+    """Test a day's quantity above the habit target is rejected, as by create_log"""
+    records = [{"habit_id": str(test_habit.id), "date": date.today().isoformat(), "quantity": test_habit.target + 1}]
+
+    response = client.post("/api/import/logs",
+                           files={"file": ("logs.ndjson", _ndjson(records))},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_imported"] == 0
+    assert data["row_errors"] == [f"row 1: quantity exceeds habit target ({test_habit.target})"]
+    assert db_session.query(HabitLog).filter(HabitLog.habit_id == test_habit.id).count() == 0
+
+  def test_reimport_into_compacted_month(self, client: TestClient, auth_headers: dict, test_user: User, db_session: Session):
+    """Test re-importing days of a compacted month replaces them in the summary instead of counting them twice"""
+    habit = Habit(user_id=test_user.id, title="Pages", frequency=Frequency.daily, target=5)
+    db_session.add(habit)
+    db_session.commit()
+    this_month = date.today().replace(day=1)
+    day = this_month - timedelta(days=20)
+    records = [{"habit_id": str(habit.id), "date": day.isoformat(), "quantity": 3}]
+
+    def run_import(quantity: int) -> None:
+      records[0]["quantity"] = quantity
+      response = client.post("/api/import/logs",
+                             files={"file": ("logs.ndjson", _ndjson(records))},
+                             headers=auth_headers)
+      assert response.json()["rows_imported"] == 1
+
+    run_import(3)
+    compact_logs(db_session, this_month)
+    run_import(2)
+    run_import(2)
+    assert compact_logs(db_session, this_month).logs_archived == 0
+
+    db_session.expire_all()
+    summary = db_session.get(HabitLogMonth, (habit.id, day.replace(day=1)))
+    assert summary.day_quantities[day.day - 1] == 2
+    assert (summary.total_quantity, summary.days_logged) == (2, 1)
+    assert db_session.query(HabitLog).filter(HabitLog.habit_id == habit.id).count() == 0
+    completion = db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == habit.id, HabitCompletion.date == day).one()
+    assert (completion.quantity_achieved, completion.is_completed) == (2, False)
+
+  def test_import_resume_from_row(self, client: TestClient, auth_headers: dict, test_habit: Habit, db_session: Session):
+    """Test start_row skips rows committed by an earlier run"""
+    today = date.today()
+    records = [{"habit_id": str(test_habit.id), "date": (today - timedelta(days=i)).isoformat(), "quantity": 1}
+               for i in range(4)]
+
+    response = client.post("/api/import/logs?start_row=2",
+                           files={"file": ("logs.ndjson", _ndjson(records))},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows_read"] == 2
+    assert data["rows_imported"] == 2
+    assert data["last_committed_row"] == 4
+
+  def test_import_unauthenticated(self, client: TestClient):
+    """Test import without authentication"""
+    response = client.post("/api/import/logs",
+                           files={"file": ("logs.ndjson", b"")})
+
+    assert response.status_code == 401
@@ -210,6 +210,14 @@ class TestLogEndpoints:
     # API doesn't validate zero quantities, so it should succeed
     assert response.status_code == 200
 
+  def test_create_log_date_outside_calendar(self, client: TestClient, auth_headers: dict, test_habit: Habit):
+    """Test dates outside the date_dim range are rejected"""
+    for day in ("1969-12-31", "2100-01-01"):
+      response = client.post(f"/api/logs/habits/{test_habit.id}/log",
+                             json={"quantity": 1, "date": day},
+                             headers=auth_headers)
+      assert response.status_code == 422
+
   def test_list_logs_with_date_filter(self, client: TestClient, auth_headers: dict, test_habit: Habit, db_session: Session):
     """Test log listing with date filtering"""
     # Create logs for different dates
@@ -0,0 +1,142 @@
+import pytest
+from datetime import date
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.security import hash_password
+from app.db.async_session import get_async_db, to_async_url
+from app.db.base import Base
+from app.db.session import get_db, get_read_db
+from app.main import create_app
+from app.models.habit import Habit, Category, Frequency
+from app.models.user import User
+
+
+@pytest.fixture
+def async_client(tmp_path):
+  """Client with async_db_enabled, sharing one SQLite file between both drivers"""
+  db_file = tmp_path / "async.db"
+  sync_engine = create_engine(f"sqlite:///{db_file}", connect_args={"check_same_thread": False})
+  async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}", poolclass=NullPool)
+  Base.metadata.create_all(bind=sync_engine)
+  SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+  AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False, autoflush=False)
+
+  def override_get_db():
+    db = SyncSession()
+    try:
+      yield db
+    finally:
+      db.close()
+
+  async_calls = []
+
+  async def override_get_async_db():
+    async_calls.append(1)
+    async with AsyncSession() as db:
+      yield db
+
+  with SyncSession() as db:
+    user = User(email="async@example.com", name="Async User",
+                password_hash=hash_password("testpassword123"))
+    db.add(user)
+    db.flush()
+    habit = Habit(user_id=user.id, title="Async Habit", category=Category.fitness,
+                  frequency=Frequency.daily, target=2)
+    db.add(habit)
+    db.commit()
+    habit_id = str(habit.id)
+
+  original = settings.async_db_enabled
+  settings.async_db_enabled = True
+  app = create_app()
+  settings.async_db_enabled = original
+  app.dependency_overrides[get_db] = override_get_db
+  app.dependency_overrides[get_read_db] = override_get_db
+  app.dependency_overrides[get_async_db] = override_get_async_db
+
+  with TestClient(app) as client:
+    response = client.post("/api/auth/login", json={
+        "email": "async@example.com", "password": "testpassword123"})
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.cookies.get('access_token')}"}
+    yield client, headers, habit_id, async_calls
+
+  sync_engine.dispose()
+
+
+class TestAsyncEndpoints:
+  """Test the async-driver variants of the hot endpoints"""
+
+  def test_to_async_url(self):
+    """Test sync URLs are mapped to their async drivers"""
+    assert to_async_url("postgresql+psycopg2://u:p@localhost:5432/db") == "postgresql+asyncpg://u:p@localhost:5432/db"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    with pytest.raises(ValueError):
+      to_async_url("mysql://localhost/db")
+
+  def test_log_and_stats_flow(self, async_client):
+    """Test logging and reading stats through the async session"""
+    client, headers, habit_id, async_calls = async_client
+
+    response = client.post(f"/api/logs/habits/{habit_id}/log",
+                           json={"quantity": 2}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["quantity"] == 2
+
+    response = client.get(f"/api/logs/habits/?habit_id={habit_id}", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+    response = client.get("/api/stats/logs/today", headers=headers)
+    assert response.status_code == 200
+    today = response.json()
+    assert today[0]["logged_today"] is True
+    assert today[0]["current_progress"] == 2
+
+    response = client.get(f"/api/stats/{habit_id}/stats/streak", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["current_streak"] == 1
+
+    response = client.get(f"/api/stats/{habit_id}/progress?periods=3", headers=headers)
+    assert response.status_code == 200
+    assert response.json()[-1]["date"] == date.today().isoformat()
+
+    response = client.get("/api/stats/overview/calendar", headers=headers)
+    assert response.status_code == 200
+    assert response.json()[0]["totalLogs"] == 1
+
+    response = client.get("/api/badges/", headers=headers)
+    assert response.status_code == 200
+
+    # Every request above went through the async session
+    assert len(async_calls) == 7
+
+  def test_async_errors(self, async_client):
+    """Test HTTP errors raised inside run_sync propagate"""
+    client, headers, _, _ = async_client
+
+    response = client.post("/api/logs/habits/00000000-0000-0000-0000-000000000000/log",
+                           json={"quantity": 1}, headers=headers)
+    assert response.status_code == 404
+
+    response = client.get("/api/stats/logs/today")
+    assert response.status_code == 401
+
+  def test_async_conditional_get(self, async_client):
+    """Test the async routes answer If-None-Match from the data version"""
+    client, headers, habit_id, _ = async_client
+
+    response = client.get("/api/badges/", headers=headers)
+    etag = response.headers["ETag"]
+    response = client.get("/api/badges/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post(f"/api/logs/habits/{habit_id}/log", json={"quantity": 1}, headers=headers)
+    response = client.get("/api/badges/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.lib.calendar import DATE_DIM_FIRST, DATE_DIM_LAST, add_months, day_info, period_bounds, period_starts
+from app.models.date_dim import DateDim
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.services.completion_service import recalculate_habit_completions
+
+
+class TestCalendar:
+  """Test the period arithmetic shared by completions and stats"""
+
+  def test_period_bounds(self):
+    """Test days, Monday-based weeks and calendar months"""
+    day = date(2024, 2, 29)
+    assert period_bounds("daily", day) == (day, day)
+    assert period_bounds("weekly", day) == (date(2024, 2, 26), date(2024, 3, 3))
+    assert period_bounds("monthly", day) == (date(2024, 2, 1), date(2024, 2, 29))
+    assert period_bounds("monthly", date(2023, 12, 5)) == (date(2023, 12, 1), date(2023, 12, 31))
+    assert period_bounds("yearly", day) == (day, day)
+
+  def test_period_starts(self):
+    """Test period starts run from the current period backwards, across years"""
+    today = date(2026, 2, 11)
+    assert period_starts("daily", 3, today) == [today, date(2026, 2, 10), date(2026, 2, 9)]
+    assert period_starts("weekly", 2, today) == [date(2026, 2, 9), date(2026, 2, 2)]
+    assert period_starts("monthly", 15, today)[-1] == date(2024, 12, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+
+
+class TestDateDim:
+  """Test the date_dim table"""
+
+  def test_matches_calendar(self, db_session: Session):
+    """Test every day is present and agrees with app.lib.calendar"""
+    assert db_session.scalar(select(func.count()).select_from(DateDim)) == \
+        (DATE_DIM_LAST - DATE_DIM_FIRST).days + 1
+    days = [DATE_DIM_FIRST, date(2000, 2, 29), date(2026, 12, 31), DATE_DIM_LAST]
+    for row in db_session.scalars(select(DateDim).where(DateDim.day.in_(days))):
+      assert (row.day, row.week_start, row.month_start, row.month_end, row.weekday, row.ordinal) == day_info(row.day)
+
+  def test_recalculate_uses_period_totals(self, db_session: Session, many_habits: list[Habit]):
+    """Test recalculating from grouped period totals keeps every completion record intact"""
+    for habit in many_habits[:3]:
+      completions = db_session.query(HabitCompletion).filter(HabitCompletion.habit_id == habit.id)
+      expected = sorted((c.date, c.is_completed, c.quantity_achieved) for c in completions)
+      for completion in completions:
+        completion.is_completed = not completion.is_completed
+        completion.quantity_achieved = 0
+      assert recalculate_habit_completions(db_session, habit.id) == len(expected)
+      assert sorted((c.date, c.is_completed, c.quantity_achieved) for c in completions) == expected
+
+  def test_progress_buckets(self, client, auth_headers: dict, db_session: Session, many_habits: list[Habit]):
+    """Test progress periods sum the completion records of each week or month"""
+    for habit in many_habits[1:3]:
+      response = client.get(f"/api/stats/{habit.id}/progress?periods=15", headers=auth_headers)
+      assert response.status_code == 200
+      data = response.json()
+      assert len(data) == 15
+      for period in data:
+        start = date.fromisoformat(period["date"])
+        end = period_bounds(habit.frequency.value, start)[1]
+        completions = db_session.query(HabitCompletion).filter(
+            HabitCompletion.habit_id == habit.id, HabitCompletion.date.between(start, end)).all()
+        assert period["actual"] == sum(c.quantity_achieved for c in completions)
+        assert period["completed"] == any(c.is_completed for c in completions)
+
+    response = client.get(f"/api/stats/{many_habits[0].id}/daily-progress?days=3", headers=auth_headers)
+    assert [day["date"] for day in response.json()] == \
+        [(date.today() - timedelta(days=i)).isoformat() for i in (2, 1, 0)]
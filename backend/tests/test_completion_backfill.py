@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.services.completion_backfill import backfill_range, count_missing, habit_id_range, verify_range
+from app.services.completion_service import rebuild_habit_completions
+
+
+def _completions(db: Session) -> list[tuple]:
+  return sorted((c.habit_id, c.date, c.is_completed, c.target_at_time, c.quantity_achieved)
+                for c in db.query(HabitCompletion))
+
+
+def _backfill_all(db: Session, chunks: int) -> int:
+  inserted = sum(backfill_range(db, *habit_id_range(i, chunks)) for i in range(chunks))
+  db.commit()
+  return inserted
+
+
+class TestCompletionBackfill:
+  """Test the set-based, range-partitioned completion backfill"""
+
+  def test_matches_rebuild(self, db_session: Session, many_habits: list[Habit]):
+    """Test period-aware results equal rebuild_habit_completions, whatever the chunking"""
+    expected = _completions(db_session)
+    db_session.query(HabitCompletion).delete()
+    db_session.commit()
+
+    assert sum(count_missing(db_session, *habit_id_range(i, 8)) for i in range(8)) == len(expected)
+    assert _backfill_all(db_session, 64) == len(expected)
+    assert _completions(db_session) == expected
+
+    db_session.query(HabitCompletion).delete()
+    rebuild_habit_completions(db_session, [habit.id for habit in many_habits])
+    db_session.commit()
+    assert _completions(db_session) == expected
+
+  def test_skips_existing_records(self, db_session: Session, many_habits: list[Habit]):
+    """Test existing rows are kept and only missing ones are inserted"""
+    habit = many_habits[1]
+    kept = db_session.query(HabitCompletion).filter(HabitCompletion.habit_id == habit.id).first()
+    kept.target_at_time = 99
+    db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == habit.id, HabitCompletion.id != kept.id).delete()
+    db_session.commit()
+
+    missing = count_missing(db_session, None, None)
+    assert missing > 0
+    assert _backfill_all(db_session, 4) == missing
+    assert count_missing(db_session, None, None) == 0
+    db_session.refresh(kept)
+    assert kept.target_at_time == 99
+
+  def test_verify(self, db_session: Session, many_habits: list[Habit]):
+    """Test verify reports missing and wrong records"""
+    assert verify_range(db_session, None, None).missing == 0
+    assert verify_range(db_session, None, None).mismatched == 0
+
+    completion = db_session.query(HabitCompletion).first()
+    completion.quantity_achieved += 5
+    db_session.add(HabitLog(habit_id=many_habits[0].id, date=date.today() - timedelta(days=400), quantity=1))
+    db_session.commit()
+
+    result = verify_range(db_session, None, None)
+    assert result.missing == 1
+    assert result.mismatched == 1
+
+  def test_ranges_cover_uuid_space(self):
+    """Test slices are contiguous, ordered and open at both ends"""
+    ranges = [habit_id_range(i, 16) for i in range(16)]
+    assert ranges[0][0] is None and ranges[-1][1] is None
+    for (_, high), (low, _) in zip(ranges, ranges[1:], strict=False):
+      assert high == low
+    highs = [high.int for _, high in ranges[:-1]]
+    assert highs == sorted(highs)
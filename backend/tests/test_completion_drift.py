@@ -0,0 +1,65 @@
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.models.user import User
+from app.services.completion_drift import check_completions
+from app.services.data_version import bump_data_version
+
+
+def _snapshot(db: Session) -> list[tuple]:
+  return sorted((c.habit_id, c.date, c.is_completed, c.quantity_achieved) for c in db.query(HabitCompletion))
+
+
+class TestCompletionDrift:
+  """Test the completion drift checker and its repair mode"""
+
+  def test_clean_data(self, db_session: Session, many_habits: list[Habit]):
+    """Test completions rebuilt from the logs report no drift"""
+    report = check_completions(db_session, chunk_size=5)
+    assert report.habits_checked == len(many_habits)
+    assert report.drifted == 0
+
+  def test_detects_and_repairs(self, db_session: Session, many_habits: list[Habit]):
+    """Test missing, mismatched and orphaned records are found and fixed in bulk"""
+    expected = _snapshot(db_session)
+    completions = db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == many_habits[0].id).order_by(HabitCompletion.date).all()
+    db_session.delete(completions[0])
+    completions[1].quantity_achieved += 1
+    completions[2].is_completed = not completions[2].is_completed
+    orphan = HabitCompletion(habit_id=many_habits[5].id, date=date.today() - timedelta(days=300),
+                             is_completed=True, target_at_time=1, quantity_achieved=1)
+    db_session.add(orphan)
+    db_session.commit()
+
+    report = check_completions(db_session, chunk_size=5)
+    assert (report.missing, report.mismatched, report.orphaned) == (1, 2, 1)
+    assert report.drifted_habit_ids == sorted([many_habits[0].id, many_habits[5].id])
+    assert report.habits_repaired == 0
+
+    report = check_completions(db_session, repair=True, chunk_size=5)
+    assert report.habits_repaired == 2
+    assert _snapshot(db_session) == expected
+    assert check_completions(db_session).drifted == 0
+
+  def test_incremental(self, db_session: Session, many_habits: list[Habit], test_user_2: User):
+    """Test only habits of users changed since the marker are checked"""
+    other = Habit(user_id=test_user_2.id, title="Other", frequency="daily", target=1)
+    db_session.add(other)
+    db_session.flush()
+    db_session.add(HabitLog(habit_id=other.id, date=date.today(), quantity=1))
+    db_session.commit()
+
+    marker = datetime.now(UTC)
+    assert check_completions(db_session, changed_since=marker).habits_checked == 0
+
+    bump_data_version(db_session, test_user_2.id)
+    db_session.commit()
+    report = check_completions(db_session, changed_since=marker)
+    assert report.habits_checked == 1
+    # The log was written without its completion record
+    assert report.missing == 1
@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.middleware import etag as etag_module
+from app.models.habit import Habit
+from app.models.user import User
+
+
+class TestConditionalGet:
+  """Test ETags derived from the per-user data version"""
+
+  def test_not_modified(self, client: TestClient, auth_headers: dict, test_habit: Habit):
+    """Test a matching If-None-Match is answered with an empty 304"""
+    response = client.get("/api/habits", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    response = client.get("/api/habits", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+  def test_mutations_change_etag(self, client: TestClient, auth_headers: dict, test_habit: Habit,
+                                 db_session: Session, test_user: User):
+    """Test habit and log writes bump the version and invalidate ETags"""
+    etags = {path: client.get(path, headers=auth_headers).headers["ETag"]
+             for path in ("/api/habits", "/api/stats/logs/today", "/api/stats/overview/calendar", "/api/badges/")}
+
+    response = client.post(f"/api/logs/habits/{test_habit.id}/log", json={"quantity": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    db_session.refresh(test_user)
+    assert test_user.data_version == 1
+
+    for path, etag in etags.items():
+      response = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+      assert response.status_code == 200, path
+
+    etag = client.get("/api/habits", headers=auth_headers).headers["ETag"]
+    client.put(f"/api/habits/{test_habit.id}", json={"title": "Renamed"}, headers=auth_headers)
+    response = client.get("/api/habits", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "Renamed"
+
+  def test_daily_etag_rolls_over(self, client: TestClient, auth_headers: dict, test_habit: Habit,
+                                 monkeypatch: pytest.MonkeyPatch):
+    """Test day-dependent endpoints change ETag at midnight"""
+    etag = client.get("/api/stats/logs/today", headers=auth_headers).headers["ETag"]
+    habits_etag = client.get("/api/habits", headers=auth_headers).headers["ETag"]
+
+    class Tomorrow(date):
+      @classmethod
+      def today(cls):
+        return date.today() + timedelta(days=1)
+    monkeypatch.setattr(etag_module, "date", Tomorrow)
+
+    response = client.get("/api/stats/logs/today", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    response = client.get("/api/habits", headers={**auth_headers, "If-None-Match": habits_etag})
+    assert response.status_code == 304
+
+  def test_etag_is_per_user(self, client: TestClient, auth_headers: dict, test_user_2: User):
+    """Test another user's ETag never matches"""
+    etag = client.get("/api/habits", headers=auth_headers).headers["ETag"]
+    login = client.post("/api/auth/login", json={"email": test_user_2.email, "password": "testpassword123"})
+    other_headers = {"Authorization": f"Bearer {login.cookies.get('access_token')}"}
+
+    response = client.get("/api/habits", headers={**other_headers, "If-None-Match": etag})
+    assert response.status_code == 200
@@ -0,0 +1,53 @@
+import uuid
+import warnings
+from datetime import datetime, UTC
+
+from fastapi.testclient import TestClient
+
+from app.core.fast_json import dump_json, type_adapter
+from app.models.habit import Category, Frequency, Habit
+from app.models.habit_log import HabitLog
+from app.schemas.habit import HabitOut, HabitRow
+from app.schemas.habit_log import HabitLogOut
+
+
+class TestFastJson:
+  """Test the TypeAdapter response path matches the model path"""
+
+  def test_row_matches_model(self):
+    """Test a HabitRow dumps to the same JSON as the equivalent HabitOut"""
+    row = {
+        "id": uuid.uuid4(), "user_id": uuid.uuid4(), "title": "Run",
+        "frequency": Frequency.weekly, "target": 3, "category": Category.fitness,
+        "description": None, "created_at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=UTC),
+    }
+    model = HabitOut(**{**row, "id": str(row["id"]), "user_id": str(row["user_id"]),
+                        "frequency": row["frequency"].value, "category": row["category"].value})
+
+    with warnings.catch_warnings():
+      warnings.simplefilter("error")
+      assert dump_json(list[HabitRow], [row]) == b"[" + model.model_dump_json().encode() + b"]"
+
+  def test_adapters_are_cached(self):
+    """Test serializers are built once per type"""
+    assert type_adapter(list[HabitRow]) is type_adapter(list[HabitRow])
+
+  def test_list_endpoints(self, client: TestClient, auth_headers: dict, test_habit: Habit, test_habit_log: HabitLog):
+    """Test list endpoints serve the same shape as their response models"""
+    response = client.get("/api/habits", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "ETag" in response.headers
+    assert response.json() == [HabitOut(**{
+        "id": str(test_habit.id), "user_id": str(test_habit.user_id), "title": test_habit.title,
+        "frequency": test_habit.frequency.value, "target": test_habit.target,
+        "category": test_habit.category.value, "description": test_habit.description,
+        "created_at": test_habit.created_at,
+    }).model_dump(mode="json")]
+
+    response = client.get(f"/api/logs/habits/?habit_id={test_habit.id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [HabitLogOut(**{
+        "id": str(test_habit_log.id), "habit_id": str(test_habit_log.habit_id), "date": test_habit_log.date,
+        "quantity": test_habit_log.quantity, "created_at": test_habit_log.created_at,
+    }).model_dump(mode="json")]
@@ -0,0 +1,144 @@
+import json
+import time
+import uuid
+
+import pytest
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.testclient import TestClient
+from google.auth import crypt, jwt as google_jwt
+from requests.adapters import BaseAdapter
+from sqlalchemy.orm import Session
+
+from app.core import google_auth
+from app.core.config import settings
+from app.core.google_auth import GoogleCertsCache, verify_google_id_token
+from app.models.habit import Habit
+from app.services.habit_templates import ONBOARDING_TEMPLATE_IDS
+
+
+CERTS_URL = "https://keys.test/certs"
+CLIENT_ID = "test-client-id"
+
+
+def _rsa_key(kid: str) -> tuple[crypt.RSASigner, str]:
+  key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+  private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+  public_pem = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+  return crypt.RSASigner.from_string(private_pem, key_id=kid), public_pem.decode()
+
+
+class StandInGoogle(BaseAdapter):
+  """In-process stand-in for Google's key server and token endpoint"""
+
+  def __init__(self, cache_control: str = "public, max-age=3600"):
+    super().__init__()
+    self.cache_control = cache_control
+    self.keys: dict[str, str] = {}
+    self.signers: dict[str, crypt.RSASigner] = {}
+    self.cert_fetches = 0
+    self.id_token = None
+
+  def add_key(self, kid: str) -> crypt.RSASigner:
+    signer, public_pem = _rsa_key(kid)
+    self.keys[kid] = public_pem
+    self.signers[kid] = signer
+    return signer
+
+  def sign(self, kid: str, **claims) -> str:
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com", "aud": CLIENT_ID, "iat": now, "exp": now + 600,
+        "sub": "google-sub-1", "name": "Google User", "email": "google@example.com",
+        "picture": "https://example.com/avatar.png",
+    }
+    payload.update(claims)
+    return google_jwt.encode(self.signers[kid], payload).decode()
+
+  def send(self, request, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.request = request
+    response.url = request.url
+    if request.method == "GET" and request.url == CERTS_URL:
+      self.cert_fetches += 1
+      response.headers["Cache-Control"] = self.cache_control
+      body = self.keys
+    elif request.method == "POST" and request.url == google_auth.GOOGLE_TOKEN_URL:
+      body = {"id_token": self.id_token}
+    else:
+      response.status_code = 404
+      body = {}
+    response._content = json.dumps(body).encode()
+    return response
+
+  def close(self):
+    pass
+
+
+@pytest.fixture
+def stand_in(monkeypatch: pytest.MonkeyPatch) -> StandInGoogle:
+  adapter = StandInGoogle()
+  session = requests.Session()
+  session.mount("https://", adapter)
+  monkeypatch.setattr(google_auth, "get_http_session", lambda: session)
+  monkeypatch.setattr(google_auth, "google_certs", GoogleCertsCache(CERTS_URL, session=session))
+  monkeypatch.setattr(settings, "google_client_id", CLIENT_ID)
+  return adapter
+
+
+class TestGoogleIdTokens:
+  """Test ID-token verification against the cached certificates"""
+
+  def test_certs_cached_for_max_age(self, stand_in: StandInGoogle):
+    """Test certificates are fetched once while max-age holds"""
+    stand_in.add_key("k1")
+    for _ in range(3):
+      idinfo = verify_google_id_token(stand_in.sign("k1"), CLIENT_ID)
+    assert idinfo["email"] == "google@example.com"
+    assert stand_in.cert_fetches == 1
+
+  def test_no_cache_refetches(self, stand_in: StandInGoogle):
+    """Test a no-cache response is not reused"""
+    stand_in.cache_control = "no-cache, no-store"
+    stand_in.add_key("k1")
+    verify_google_id_token(stand_in.sign("k1"), CLIENT_ID)
+    verify_google_id_token(stand_in.sign("k1"), CLIENT_ID)
+    assert stand_in.cert_fetches == 2
+
+  def test_rotated_key_forces_refresh(self, stand_in: StandInGoogle):
+    """Test an unknown kid refreshes the certificates once"""
+    stand_in.add_key("k1")
+    verify_google_id_token(stand_in.sign("k1"), CLIENT_ID)
+    google_auth.google_certs.min_refresh_seconds = 0
+    stand_in.add_key("k2")
+
+    idinfo = verify_google_id_token(stand_in.sign("k2"), CLIENT_ID)
+    assert idinfo["sub"] == "google-sub-1"
+    assert stand_in.cert_fetches == 2
+
+  def test_rejects_wrong_audience_and_issuer(self, stand_in: StandInGoogle):
+    """Test tokens for another client or issuer are rejected"""
+    stand_in.add_key("k1")
+    with pytest.raises(ValueError):
+      verify_google_id_token(stand_in.sign("k1", aud="someone-else"), CLIENT_ID)
+    with pytest.raises(ValueError):
+      verify_google_id_token(stand_in.sign("k1", iss="https://evil.example.com"), CLIENT_ID)
+
+
+class TestGoogleAuthEndpoints:
+  """Test the Google sign-in endpoint end to end"""
+
+  def test_google_login(self, client: TestClient, db_session: Session, stand_in: StandInGoogle):
+    """Test sign-in creates the user with demo habits once and reuses cached certificates"""
+    stand_in.add_key("k1")
+    stand_in.id_token = stand_in.sign("k1")
+
+    for _ in range(2):
+      response = client.post("/api/auth/google", json={"code": "auth-code"})
+      assert response.status_code == 200, response.text
+      assert response.json()["user"]["email"] == "google@example.com"
+    assert stand_in.cert_fetches == 1
+    user_id = uuid.UUID(response.json()["user"]["id"])
+    assert db_session.query(Habit).filter(Habit.user_id == user_id).count() == len(ONBOARDING_TEMPLATE_IDS)
@@ -0,0 +1,70 @@
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.services.habit_purge import needs_background_purge, purge_deleted_habits
+
+
+def _child_rows(db: Session, habit_id: uuid.UUID) -> int:
+  return sum(db.scalar(select(func.count()).select_from(model).where(model.habit_id == habit_id))
+             for model in (HabitLog, HabitCompletion))
+
+
+def _habit_rows(db: Session, habit_id: uuid.UUID) -> int:
+  return db.scalar(select(func.count()).select_from(Habit).where(Habit.id == habit_id)
+                   .execution_options(include_deleted=True))
+
+
+class TestHabitPurge:
+  """Test deleting habits through ON DELETE CASCADE and background purges"""
+
+  def test_small_habit_deleted_by_cascade(self, client: TestClient, auth_headers: dict, db_session: Session,
+                                          many_habits: list[Habit], query_budget):
+    """Test the habit row goes in one statement and the database removes its children"""
+    habit_id = many_habits[0].id
+    assert _child_rows(db_session, habit_id) > 0
+    with query_budget(4):
+      response = client.delete(f"/api/habits/{habit_id}", headers=auth_headers)
+    assert response.status_code == 204
+    assert _child_rows(db_session, habit_id) == 0
+    assert _habit_rows(db_session, habit_id) == 0
+
+  def test_large_habit_purged_in_background(self, client: TestClient, auth_headers: dict, db_session: Session,
+                                            many_habits: list[Habit], monkeypatch: pytest.MonkeyPatch):
+    """Test habits over the threshold are soft-deleted and purged in batches after the response"""
+    habit_id = many_habits[1].id
+    monkeypatch.setattr(settings, "habit_purge_threshold", 5)
+    monkeypatch.setattr(settings, "habit_purge_batch_size", 4)
+    assert needs_background_purge(db_session, habit_id)
+
+    response = client.delete(f"/api/habits/{habit_id}", headers=auth_headers)
+    assert response.status_code == 204
+    assert _child_rows(db_session, habit_id) == 0
+    assert _habit_rows(db_session, habit_id) == 0
+
+  def test_soft_deleted_habits_are_hidden(self, client: TestClient, auth_headers: dict, db_session: Session,
+                                          many_habits: list[Habit]):
+    """Test soft-deleted habits vanish from queries and endpoints until purged"""
+    habit = many_habits[2]
+    habit_id = habit.id
+    habit.deleted_at = datetime.now(UTC)
+    db_session.commit()
+
+    assert db_session.query(Habit).filter(Habit.id == habit_id).first() is None
+    listed = {row["id"] for row in client.get("/api/habits", headers=auth_headers).json()}
+    assert str(habit_id) not in listed and len(listed) == len(many_habits) - 1
+    assert client.get(f"/api/habits/{habit_id}", headers=auth_headers).status_code == 404
+    calendar = client.get("/api/stats/overview/calendar", headers=auth_headers).json()
+    assert str(habit_id) not in {entry["habit_id"] for day in calendar for entry in day["habits"]}
+
+    assert purge_deleted_habits(db_session, batch_size=10) == 1
+    assert _child_rows(db_session, habit_id) == 0
+    assert purge_deleted_habits(db_session) == 0
@@ -0,0 +1,67 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.security import create_access_token
+from app.models.habit import Habit
+from app.models.user import User
+from app.services.habit_templates import ONBOARDING_TEMPLATE_IDS, template_catalogue
+from app.services.setup_initial_habits import has_existing_habits, setup_initial_habits
+
+
+class TestHabitTemplates:
+  """Test the habit template catalogue, onboarding and bulk adds"""
+
+  def test_register_creates_demo_habits(self, client: TestClient, db_session: Session):
+    """Test registration commits the user and the onboarding habits together"""
+    response = client.post("/api/auth/register",
+                           json={"name": "New", "email": "new@example.com", "password": "secret123"})
+    assert response.status_code == 200
+    user_id = uuid.UUID(response.json()["user"]["id"])
+
+    headers = {"Authorization": f"Bearer {create_access_token(str(user_id))}"}
+    listed = client.get("/api/habits", headers=headers).json()
+    # Newest first, as if the templates had been added one after another
+    assert [habit["title"] for habit in listed] == [
+        template_catalogue()[template_id].title for template_id in reversed(ONBOARDING_TEMPLATE_IDS)]
+    assert db_session.get(User, user_id).data_version == 1
+
+  def test_has_existing_habits(self, db_session: Session, test_user: User):
+    """Test the EXISTS check before and after onboarding"""
+    assert not has_existing_habits(test_user.id, db_session)
+    setup_initial_habits(str(test_user.id), db_session)
+    db_session.commit()
+    assert has_existing_habits(str(test_user.id), db_session)
+
+  def test_list_templates(self, client: TestClient, auth_headers: dict):
+    """Test the catalogue is listed with plain enum values"""
+    response = client.get("/api/habits/templates", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [template["id"] for template in data] == list(template_catalogue())
+    assert {"id": "drink_water", "title": "Drink Water", "category": "health", "frequency": "daily",
+            "target": 8}.items() <= data[1].items()
+
+  def test_add_templates(self, client: TestClient, auth_headers: dict, db_session: Session, test_user: User):
+    """Test chosen templates become habits, each once, in the order given"""
+    response = client.post("/api/habits/templates", headers=auth_headers,
+                           json={"template_ids": ["budget_review", "stretching", "budget_review"]})
+    assert response.status_code == 201
+    assert [habit["title"] for habit in response.json()] == ["Budget Review", "Stretching"]
+    assert response.json()[0]["frequency"] == "monthly"
+    assert db_session.query(Habit).filter(Habit.user_id == test_user.id).count() == 2
+
+    listed = client.get("/api/habits", headers=auth_headers).json()
+    assert [habit["id"] for habit in listed] == [habit["id"] for habit in reversed(response.json())]
+
+  def test_add_unknown_template(self, client: TestClient, auth_headers: dict, db_session: Session, test_user: User):
+    """Test unknown template ids are rejected without creating anything"""
+    response = client.post("/api/habits/templates", headers=auth_headers,
+                           json={"template_ids": ["stretching", "juggling"]})
+    assert response.status_code == 422
+    assert "juggling" in response.json()["title"]
+    assert db_session.query(Habit).filter(Habit.user_id == test_user.id).count() == 0
+
+    response = client.post("/api/habits/templates", headers=auth_headers, json={"template_ids": []})
+    assert response.status_code == 422
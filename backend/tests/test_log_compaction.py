@@ -0,0 +1,125 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.habit import Frequency, Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.models.habit_log_archive import HabitLogArchive
+from app.models.habit_log_month import HabitLogMonth
+from app.models.user import User
+from app.services.completion_drift import check_completions
+from app.services.completion_service import rebuild_habit_completions
+from app.services.log_compaction import compact_logs, compaction_cutoff
+
+
+def _daily_quantities(db: Session) -> dict:
+  return {(log.habit_id, log.date): log.quantity for log in db.query(HabitLog)}
+
+
+def _calendar(client: TestClient, auth_headers: dict) -> dict:
+  days = client.get("/api/stats/overview/calendar", headers=auth_headers).json()
+  return {(entry["habit_id"], day["date"]): entry["quantity"] for day in days for entry in day["habits"]}
+
+
+class TestLogCompaction:
+  """Test the roll-up of old logs into monthly summaries"""
+
+  def test_compaction_cutoff(self):
+    """Test the cutoff is the first day of the month holding the horizon"""
+    assert compaction_cutoff(30, today=date(2026, 3, 15)) == date(2026, 2, 1)
+    assert compaction_cutoff(0, today=date(2026, 3, 1)) == date(2026, 3, 1)
+
+  def test_compacts_whole_months(self, db_session: Session, many_habits: list[Habit]):
+    """Test old logs move to the archive and their months are summarised"""
+    before = date.today().replace(day=1)
+    quantities = _daily_quantities(db_session)
+    old = {key: quantity for key, quantity in quantities.items() if key[1] < before}
+    completions = db_session.scalar(select(func.count()).select_from(HabitCompletion))
+
+    report = compact_logs(db_session, before, chunk_size=5)
+    assert report.logs_archived == len(old)
+    assert report.habits_checked == len(many_habits)
+    assert db_session.query(HabitLog).filter(HabitLog.date < before).count() == 0
+    assert db_session.query(HabitLogArchive).count() == len(old)
+    assert db_session.scalar(select(func.count()).select_from(HabitCompletion)) == completions
+
+    summaries = db_session.query(HabitLogMonth).all()
+    assert sum(summary.total_quantity for summary in summaries) == sum(old.values())
+    for summary in summaries:
+      logged = {day: quantity for day, quantity in enumerate(summary.day_quantities, start=1) if quantity}
+      assert logged == {key[1].day: quantity for key, quantity in old.items()
+                        if key[0] == summary.habit_id and key[1].replace(day=1) == summary.month}
+      completed = {c.date.day for c in db_session.query(HabitCompletion).filter(
+          HabitCompletion.habit_id == summary.habit_id, HabitCompletion.is_completed,
+          func.strftime("%Y-%m", HabitCompletion.date) == summary.month.strftime("%Y-%m"))}
+      assert {day for day in range(1, 32) if summary.completed_days >> (day - 1) & 1} == completed
+
+    # Running again has nothing left to do
+    assert compact_logs(db_session, before).logs_archived == 0
+
+  def test_reads_are_transparent(self, client: TestClient, auth_headers: dict, db_session: Session,
+                                 many_habits: list[Habit]):
+    """Test calendar, export, rebuilds and the drift check see compacted logs"""
+    calendar = _calendar(client, auth_headers)
+    compact_logs(db_session, date.today().replace(day=1))
+
+    assert _calendar(client, auth_headers) == calendar
+    assert check_completions(db_session).drifted == 0
+    expected = sorted((c.habit_id, c.date, c.is_completed, c.quantity_achieved) for c in db_session.query(HabitCompletion))
+    rebuild_habit_completions(db_session, [habit.id for habit in many_habits])
+    db_session.commit()
+    assert sorted((c.habit_id, c.date, c.is_completed, c.quantity_achieved)
+                  for c in db_session.query(HabitCompletion)) == expected
+
+    response = client.get("/api/export?format=ndjson", headers=auth_headers)
+    logs = [record for record in map(json.loads, response.text.splitlines()) if record["record_type"] == "log"]
+    assert {(record["habit_id"], record["date"]): record["quantity"] for record in logs} == calendar
+
+  def test_badges_unchanged(self, client: TestClient, auth_headers: dict, db_session: Session,
+                            many_habits: list[Habit]):
+    """Test lifetime badge totals still count compacted logs"""
+    def progress() -> dict:
+      response = client.get("/api/badges/", headers=auth_headers).json()
+      return {badge["id"]: badge["progress"] for category in response["categories"] for badge in category["badges"]}
+
+    before = progress()
+    assert before["first_log"] and before["workout_warrior"]
+    compact_logs(db_session, date.today().replace(day=1))
+    assert progress() == before
+
+  def test_merges_late_logs(self, db_session: Session, many_habits: list[Habit]):
+    """Test logs imported into a compacted month are merged on the next run"""
+    before = date.today().replace(day=1)
+    compact_logs(db_session, before)
+    habit = many_habits[1]
+    day = before - timedelta(days=40)
+    db_session.add(HabitLog(habit_id=habit.id, date=day, quantity=4))
+    db_session.commit()
+
+    report = compact_logs(db_session, before)
+    assert (report.logs_archived, report.months_written) == (1, 1)
+    summary = db_session.get(HabitLogMonth, (habit.id, day.replace(day=1)))
+    assert summary.day_quantities[day.day - 1] == 4
+    assert summary.total_quantity == 4
+
+  def test_late_log_checks_compacted_total(self, client: TestClient, auth_headers: dict, db_session: Session,
+                                           test_user: User, monkeypatch: pytest.MonkeyPatch):
+    """Test a late log is refused when the month summary already holds the day's target"""
+    monkeypatch.setattr(settings, "log_compaction_horizon_days", 0)
+    habit = Habit(user_id=test_user.id, title="Run", frequency=Frequency.daily, target=2)
+    db_session.add(habit)
+    db_session.commit()
+    day = compaction_cutoff() - timedelta(days=10)
+    log = {"quantity": 2, "date": day.isoformat()}
+    assert client.post(f"/api/logs/habits/{habit.id}/log", json=log, headers=auth_headers).status_code == 200
+    compact_logs(db_session)
+
+    response = client.post(f"/api/logs/habits/{habit.id}/log", json={**log, "quantity": 1}, headers=auth_headers)
+    assert response.status_code == 400
+    assert "Current: 2" in response.json()["title"]
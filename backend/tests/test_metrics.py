@@ -0,0 +1,66 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import request_metrics
+from app.db import query_metrics
+from app.models.habit import Habit
+
+
+class TestMetrics:
+  """Test request latency histograms, query counters and Server-Timing"""
+
+  @pytest.fixture(autouse=True)
+  def enable_metrics(self, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    monkeypatch.setattr(settings, "server_timing_enabled", True)
+
+  def test_server_timing_counts_queries(self, client: TestClient, auth_headers: dict, test_habit: Habit):
+    """Test each response reports its duration and SQL statements"""
+    response = client.get(f"/api/habits/{test_habit.id}", headers=auth_headers)
+    assert response.status_code == 200
+
+    match = re.fullmatch(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries"', response.headers["Server-Timing"])
+    assert match
+    assert int(match.group(1)) >= 1
+
+    assert client.get("/health").headers["Server-Timing"].endswith('desc="0 queries"')
+
+  def test_prometheus_endpoint(self, client: TestClient, auth_headers: dict, test_habit: Habit):
+    """Test /metrics groups requests by route template"""
+    request_metrics.clear()
+    client.get(f"/api/habits/{test_habit.id}", headers=auth_headers)
+    client.get("/api/habits/00000000-0000-0000-0000-000000000000", headers=auth_headers)
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+
+    assert 'http_requests_total{method="GET",route="/api/habits/{habit_id}",status="200"} 1' in body
+    assert 'http_requests_total{method="GET",route="/api/habits/{habit_id}",status="404"} 1' in body
+    assert 'route="unmatched"' in body
+    assert str(test_habit.id) not in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/habits/{habit_id}"} 2' in body
+    assert 'http_request_db_queries_bucket{method="GET",route="/api/habits/{habit_id}",le="+Inf"} 2' in body
+    assert 'db_pool_checkouts_total{pool="primary"}' in body
+
+  def test_queries_outside_requests_are_ignored(self, db_session):
+    """Test scripts and background work do not need a request context"""
+    assert query_metrics.current_stats() is None
+    db_session.query(Habit).count()
+
+
+class TestMetricsDisabled:
+  """Test timings are not exposed unless enabled"""
+
+  def test_off_by_default(self, client: TestClient, auth_headers: dict, test_habit: Habit):
+    """Test no Server-Timing header and no metrics endpoints with the default settings"""
+    response = client.get(f"/api/habits/{test_habit.id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics/pool").status_code == 404
@@ -0,0 +1,84 @@
+from datetime import date
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from app.db.partitions import detach_partitions, ensure_partitions, partition_name
+from app.lib.calendar import add_months
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+
+
+class FakePostgres:
+  """Records the SQL sent to it and answers the catalog queries of app.db.partitions"""
+
+  dialect = SimpleNamespace(name="postgresql")
+
+  def __init__(self, partitions: list[str], stray_months: set[date] = frozenset()):
+    self.partitions = partitions
+    self.stray_months = stray_months
+    self.statements: list[str] = []
+
+  def execute(self, statement, params=None):
+    sql = str(statement)
+    self.statements.append(sql)
+    if "relkind" in sql:
+      value = True
+    elif "pg_inherits" in sql:
+      return SimpleNamespace(scalars=lambda: [name for name in self.partitions if name.startswith(params["table"])])
+    elif sql.startswith("SELECT EXISTS"):
+      value = params["start"] in self.stray_months
+    else:
+      value = None
+    return SimpleNamespace(scalar=lambda: value)
+
+  def ddl(self, prefix: str) -> list[str]:
+    return [sql for sql in self.statements if sql.startswith(prefix)]
+
+
+class TestPartitions:
+  """Test the monthly partition maintenance of habit_logs and habit_completions"""
+
+  def test_month_helpers(self):
+    """Test month arithmetic across year boundaries and partition naming"""
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_name("habit_logs", date(2026, 3, 1)) == "habit_logs_p2026_03"
+
+  def test_models_partitioned_on_postgres(self):
+    """Test both tables are declared range-partitioned with date in the primary key"""
+    for model in (HabitLog, HabitCompletion):
+      ddl = str(CreateTable(model.__table__).compile(dialect=postgresql.dialect()))
+      assert "PARTITION BY RANGE (date)" in ddl
+      assert "PRIMARY KEY (id, date)" in ddl
+
+  def test_ensure_creates_missing_months(self):
+    """Test only missing months up to the horizon are created, plus the default partition"""
+    conn = FakePostgres(["habit_logs_p2026_10", "habit_logs_default", "habit_completions_p2026_10"])
+    created = ensure_partitions(conn, months_ahead=2, today=date(2026, 10, 19))
+    assert created == [
+        "habit_logs_p2026_11", "habit_logs_p2026_12",
+        "habit_completions_p2026_11", "habit_completions_p2026_12",
+    ]
+    assert len(conn.ddl("CREATE TABLE IF NOT EXISTS habit_logs_default PARTITION OF habit_logs DEFAULT")) == 1
+    assert "CREATE TABLE habit_logs_p2026_12 PARTITION OF habit_logs FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')" \
+        in conn.statements
+
+  def test_ensure_moves_rows_out_of_default(self):
+    """Test a month with rows in the default partition is built aside and attached"""
+    conn = FakePostgres(["habit_logs_p2026_10", "habit_completions_p2026_10"], stray_months={date(2026, 11, 1)})
+    ensure_partitions(conn, months_ahead=1, today=date(2026, 10, 19))
+    assert conn.ddl("CREATE TABLE habit_logs_p2026_11 (LIKE habit_logs")
+    assert any("DELETE FROM habit_logs_default" in sql for sql in conn.statements)
+    assert conn.ddl("ALTER TABLE habit_logs ATTACH PARTITION habit_logs_p2026_11 FOR VALUES FROM ('2026-11-01')")
+
+  def test_detach_before(self):
+    """Test only months ending on or before the cutoff are detached"""
+    conn = FakePostgres(["habit_logs_p2024_12", "habit_logs_p2025_01", "habit_logs_p2025_02", "habit_logs_default"])
+    assert detach_partitions(conn, date(2025, 2, 1)) == ["habit_logs_p2024_12", "habit_logs_p2025_01"]
+
+  def test_noop_on_sqlite(self, db_session: Session):
+    """Test the SQLite test schema stays unpartitioned"""
+    assert ensure_partitions(db_session.connection(), months_ahead=3) == []
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import settings
+from app.db.pool_metrics import TimedQueuePool, instrument_engine, pool_snapshot
+from app.db.session import engine_options
+
+
+class TestPoolMetrics:
+  """Test connection pool configuration and instrumentation"""
+
+  def test_engine_options_postgres(self, monkeypatch: pytest.MonkeyPatch):
+    """Test pool settings are applied to Postgres engines"""
+    monkeypatch.setattr(settings, "db_pool_size", 20)
+    monkeypatch.setattr(settings, "db_max_overflow", 5)
+    monkeypatch.setattr(settings, "db_pool_pre_ping", False)
+    monkeypatch.setattr(settings, "db_statement_timeout_ms", 2000)
+
+    options = engine_options("postgresql+psycopg2://u:p@localhost/db")
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 5
+    assert options["pool_pre_ping"] is False
+    assert options["poolclass"] is TimedQueuePool
+    assert options["connect_args"] == {"options": "-c statement_timeout=2000"}
+
+    async_options = engine_options("postgresql+asyncpg://u:p@localhost/db", is_async=True)
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "2000"}}
+
+  def test_engine_options_sqlite(self):
+    """Test pool sizing is skipped for SQLite"""
+    options = engine_options("sqlite:///./test.db")
+    assert "pool_size" not in options
+    assert "poolclass" not in options
+
+  def test_checkout_wait_and_saturation(self, tmp_path):
+    """Test checkouts, saturation and timeouts are recorded"""
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05,
+                           pool_logging_name="test_pool")
+    instrument_engine(engine, "test_pool")
+
+    conn = engine.connect()
+    conn.execute(text("SELECT 1"))
+    stats = pool_snapshot()["test_pool"]
+    assert stats["checkouts"] == 1
+    assert stats["connects"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["saturation"] == 1.0
+
+    with pytest.raises(exc.TimeoutError):
+      engine.connect()
+    stats = pool_snapshot()["test_pool"]
+    assert stats["checkout_timeouts"] == 1
+    assert stats["checkout_wait_seconds_max"] >= 0.05
+
+    conn.close()
+    stats = pool_snapshot()["test_pool"]
+    assert stats["checkins"] == 1
+    assert stats["saturation"] == 0.0
+    engine.dispose()
+
+  def test_pool_metrics_endpoint(self, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest):
+    """Test the pool metrics endpoint lists the primary pool when metrics are enabled"""
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    client: TestClient = request.getfixturevalue("client")
+    response = client.get("/metrics/pool")
+
+    assert response.status_code == 200
+    assert "primary" in response.json()["pools"]
@@ -0,0 +1,142 @@
+import json
+from typing import NamedTuple
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.badge import Badge, BadgeCategoryEnum, BadgeStatus
+from app.models.habit import Habit
+from app.routers import auth, badges, export, habits, imports, logs, stats
+
+
+# Mount points from app.main, used to match declared budgets to routes
+ROUTER_PREFIXES = [
+    (auth.router, "/api/auth"),
+    (habits.router, "/api/habits"),
+    (logs.router, "/api/logs/habits"),
+    (stats.router, "/api/stats"),
+    (badges.router, "/api/badges"),
+    (export.router, "/api/export"),
+    (imports.router, "/api/import"),
+]
+
+# Every badge id the progress calculation knows, so the badge loops actually run
+BADGE_IDS = [
+    "first_habit", "first_log", "week_warrior", "streak_master", "workout_warrior",
+    "sharing_champion", "perfect_week", "early_bird", "night_owl", "habit_creator",
+    "cardio_king", "flexibility_master", "meditation_master", "hydration_hero",
+    "sleep_champion", "motivator", "community_helper",
+]
+
+
+class Budget(NamedTuple):
+  method: str
+  route: str
+  max_queries: int
+  json: dict | None = None
+  params: dict | None = None
+  # Which seeded habit fills {habit_id}: daily, weekly or monthly
+  habit: str = "daily"
+  upload: bool = False
+
+
+# Statements per call against the many_habits data set, including the
+# token lookup and ETag version check. None of them may grow with the data.
+BUDGETS = [
+    Budget("POST", "/api/auth/login", 2, json={"email": "test@example.com", "password": "testpassword123"}),
+    Budget("GET", "/api/auth/me", 1),
+    Budget("POST", "/api/auth/logout", 0),
+    Budget("POST", "/api/auth/change-password", 4,
+           json={"currentPassword": "testpassword123", "newPassword": "newpassword123"}),
+    Budget("POST", "/api/auth/register", 5, json={"name": "New", "email": "new@example.com", "password": "secret123"}),
+    Budget("PUT", "/api/auth/update-profile", 5, json={"name": "Renamed"}),
+    Budget("POST", "/api/auth/setup-password", 5, json={"password": "newpassword123"}),
+    Budget("GET", "/api/habits", 2),
+    Budget("POST", "/api/habits", 3, json={"title": "New", "category": "fitness", "frequency": "daily", "target": 1}),
+    Budget("GET", "/api/habits/templates", 0),
+    Budget("POST", "/api/habits/templates", 2, json={"template_ids": ["drink_water", "stretching"]}),
+    Budget("GET", "/api/habits/{habit_id}", 1),
+    Budget("PUT", "/api/habits/{habit_id}", 10, json={"target": 5}, habit="weekly"),
+    Budget("DELETE", "/api/habits/{habit_id}", 4, habit="monthly"),
+    Budget("POST", "/api/logs/habits/{habit_id}/log", 12, json={"quantity": 1}),
+    Budget("POST", "/api/logs/habits/{habit_id}/log", 12, json={"quantity": 1}, habit="weekly"),
+    Budget("POST", "/api/logs/habits/{habit_id}/log", 12, json={"quantity": 1}, habit="monthly"),
+    Budget("GET", "/api/logs/habits/", 2, params={"habit_id": "{habit_id}"}),
+    Budget("GET", "/api/stats/overview/calendar", 3),
+    Budget("GET", "/api/stats/{habit_id}/stats/streak", 6),
+    Budget("GET", "/api/stats/{habit_id}/daily-progress", 3, params={"days": 30}),
+    Budget("GET", "/api/stats/{habit_id}/progress", 3),
+    Budget("GET", "/api/stats/{habit_id}/progress", 3, habit="weekly"),
+    Budget("GET", "/api/stats/{habit_id}/progress", 3, habit="monthly"),
+    Budget("GET", "/api/stats/logs/today", 4),
+    Budget("GET", "/api/badges/", 17),
+    Budget("GET", "/api/export", 4),
+    Budget("POST", "/api/import/logs", 12, upload=True),
+]
+
+# Routes whose query count is covered elsewhere
+UNBUDGETED = {
+    # Needs the Google token exchange stubbed; see tests/test_google_auth.py
+    ("POST", "/api/auth/google"),
+}
+
+
+@pytest.fixture
+def badge_templates(db_session: Session) -> None:
+  """Replace the conftest badges with one template per known badge id"""
+  db_session.query(Badge).delete()
+  db_session.add_all(
+      Badge(badge_id=badge_id, title=badge_id, description=badge_id,
+            category=BadgeCategoryEnum.special_achievements, status=BadgeStatus.locked)
+      for badge_id in BADGE_IDS
+  )
+  db_session.commit()
+
+
+def _request_kwargs(budget: Budget, habits_by_frequency: dict[str, Habit], headers: dict) -> dict:
+  habit_id = str(habits_by_frequency[budget.habit].id)
+  kwargs = {"headers": headers}
+  if budget.json is not None:
+    kwargs["json"] = budget.json
+  if budget.params is not None:
+    kwargs["params"] = {k: str(v).format(habit_id=habit_id) for k, v in budget.params.items()}
+  if budget.upload:
+    rows = [{"habit_id": habit_id, "date": f"2020-01-{day:02d}", "quantity": 1} for day in range(1, 29)]
+    body = "".join(json.dumps(row) + "\n" for row in rows)
+    kwargs["files"] = {"file": ("logs.ndjson", body.encode("utf-8"))}
+  return kwargs
+
+
+class TestQueryBudgets:
+  """Test every endpoint stays within its SQL statement budget on a large data set"""
+
+  @pytest.mark.parametrize("budget", BUDGETS, ids=lambda b: f"{b.method} {b.route} [{b.habit}]")
+  def test_endpoint_budget(self, client: TestClient, auth_headers: dict, many_habits: list[Habit],
+                           badge_templates, query_budget, budget: Budget):
+    """Test the endpoint executes at most its declared number of statements"""
+    # Seeded habits without a log today, one per frequency
+    habits_by_frequency = {"daily": many_habits[0], "weekly": many_habits[4], "monthly": many_habits[8]}
+    path = budget.route.format(habit_id=habits_by_frequency[budget.habit].id)
+    kwargs = _request_kwargs(budget, habits_by_frequency, auth_headers)
+
+    with query_budget(budget.max_queries):
+      response = client.request(budget.method, path, **kwargs)
+
+    assert response.status_code < 400, response.text
+
+  def test_every_route_has_budget(self):
+    """Test new routes cannot be added without declaring a budget"""
+    declared = {(b.method, b.route) for b in BUDGETS} | UNBUDGETED
+    for router, prefix in ROUTER_PREFIXES:
+      for route in router.routes:
+        for method in route.methods:
+          assert (method, prefix + route.path) in declared, f"No query budget for {method} {prefix}{route.path}"
+
+  def test_budget_catches_n_plus_one(self, client: TestClient, db_session: Session, many_habits: list[Habit],
+                                     query_budget):
+    """Test the budget fails a block issuing one query per habit"""
+    with pytest.raises(pytest.fail.Exception, match="Expected at most 2 queries"):
+      with query_budget(2):
+        for habit in many_habits:
+          db_session.get(Habit, habit.id, populate_existing=True)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import MemoryRateLimiter, RedisRateLimiter
+from app.models.habit import Habit
+
+
+class TestMemoryRateLimiter:
+  """Test the in-process sliding-window counters"""
+
+  def test_blocks_after_limit(self):
+    """Test hits beyond the limit are refused with a retry delay"""
+    limiter = MemoryRateLimiter()
+    assert all(limiter.hit_sync("k", 3, 60) == 0 for _ in range(3))
+    assert limiter.hit_sync("k", 3, 60) > 0
+    assert limiter.hit_sync("other", 3, 60) == 0
+
+  def test_window_slides(self, monkeypatch: pytest.MonkeyPatch):
+    """Test the previous window's hits decay as the window slides"""
+    now = [6000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    limiter = MemoryRateLimiter()
+    for _ in range(4):
+      limiter.hit_sync("k", 4, 60)
+
+    # Early in the next window most of the previous hits still count
+    now[0] = 6060.0 + 6
+    assert limiter.hit_sync("k", 4, 60) == 0
+    assert limiter.hit_sync("k", 4, 60) > 0
+    # Halfway through, half of them have expired
+    now[0] = 6060.0 + 30
+    assert limiter.hit_sync("k", 4, 60) == 0
+    assert limiter.hit_sync("k", 4, 60) > 0
+
+  def test_evicts_least_recent_keys(self):
+    """Test memory stays bounded by dropping the keys hit longest ago"""
+    limiter = MemoryRateLimiter(max_keys=10)
+    for i in range(10):
+      limiter.hit_sync(f"ip-{i}", 5, 60)
+    limiter.hit_sync("ip-0", 5, 60)
+    limiter.hit_sync("fresh", 5, 60)
+    assert len(limiter._windows) == 10
+    assert "ip-1" not in limiter._windows
+    assert "ip-0" in limiter._windows
+
+  def test_key_flood_keeps_active_limits(self):
+    """Test rotating through many keys does not reset a blocked client's window"""
+    limiter = MemoryRateLimiter(max_keys=10)
+    for _ in range(3):
+      limiter.hit_sync("abuser", 3, 60)
+    for i in range(9):
+      limiter.hit_sync(f"spoofed-{i}", 3, 60)
+    assert limiter.hit_sync("abuser", 3, 60) > 0
+    for i in range(9, 100):
+      limiter.hit_sync(f"spoofed-{i}", 3, 60)
+      assert limiter.hit_sync("abuser", 3, 60) > 0
+
+  def test_check_is_cheap(self):
+    """Test a check costs microseconds, not milliseconds"""
+    limiter = MemoryRateLimiter()
+    started = time.perf_counter()
+    for i in range(10000):
+      limiter.hit_sync(f"user-{i % 100}", 1000, 60)
+    assert (time.perf_counter() - started) / 10000 < 50e-6
+
+  def test_redis_errors_fall_back_to_memory(self):
+    """Test an unreachable Redis degrades to local counters"""
+    limiter = RedisRateLimiter("redis://127.0.0.1:1/0", fallback=MemoryRateLimiter())
+    assert asyncio.run(limiter.hit("k", 1, 60)) == 0
+    assert asyncio.run(limiter.hit("k", 1, 60)) > 0
+
+
+class TestRateLimitEndpoints:
+  """Test limits wired into the auth and log routes"""
+
+  def test_login_limited_per_ip(self, client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    """Test repeated logins from one address get a 429"""
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_auth_per_minute", 2)
+    payload = {"email": "nobody@example.com", "password": "wrong-password"}
+
+    assert client.post("/api/auth/login", json=payload).status_code == 401
+    assert client.post("/api/auth/login", json=payload).status_code == 401
+    response = client.post("/api/auth/login", json=payload)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+  def test_log_writes_limited_per_user(self, client: TestClient, auth_headers: dict, test_habit: Habit, monkeypatch: pytest.MonkeyPatch):
+    """Test log writes are limited per user before touching the database"""
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_log_writes_per_minute", 1)
+    url = f"/api/logs/habits/{test_habit.id}/log"
+
+    assert client.post(url, json={"quantity": 1}, headers=auth_headers).status_code == 200
+    assert client.post(url, json={"quantity": 1}, headers=auth_headers).status_code == 429
+    # Reads are not limited
+    assert client.get(f"/api/logs/habits/?habit_id={test_habit.id}", headers=auth_headers).status_code == 200
@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.db import session as db_session_module
+from app.db.session import PRIMARY_PIN_COOKIE, get_read_db
+
+
+def _request(cookies: dict | None = None) -> Request:
+  headers = []
+  if cookies:
+    cookie = "; ".join(f"{k}={v}" for k, v in cookies.items())
+    headers.append((b"cookie", cookie.encode()))
+  return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.fixture
+def replica(monkeypatch: pytest.MonkeyPatch):
+  """Configure a stand-in replica engine"""
+  replica_engine = create_engine("sqlite://")
+  monkeypatch.setattr(db_session_module, "replica_engine", replica_engine)
+  monkeypatch.setattr(db_session_module, "ReplicaSessionLocal", sessionmaker(bind=replica_engine))
+  monkeypatch.setattr(settings, "database_replica_url", "sqlite://")
+  yield replica_engine
+  replica_engine.dispose()
+
+
+class TestReadReplica:
+  """Test read-replica routing and the read-your-writes guard"""
+
+  def test_reads_use_primary_without_replica(self):
+    """Test reads fall back to the primary when no replica is configured"""
+    db = next(get_read_db(_request()))
+    assert db.get_bind() is db_session_module.engine
+    db.close()
+
+  def test_reads_use_replica(self, replica):
+    """Test reads go to the replica when configured"""
+    db = next(get_read_db(_request()))
+    assert db.get_bind() is replica
+    db.close()
+
+  def test_pinned_reads_use_primary(self, replica):
+    """Test a pinned client reads from the primary"""
+    db = next(get_read_db(_request({PRIMARY_PIN_COOKIE: "1"})))
+    assert db.get_bind() is db_session_module.engine
+    db.close()
+
+  def test_write_sets_pin_cookie(self, client: TestClient, auth_headers: dict, replica):
+    """Test successful writes pin the client to the primary"""
+    response = client.post("/api/habits",
+                           json={"title": "Pinned", "frequency": "daily", "target": 1},
+                           headers=auth_headers)
+
+    assert response.status_code == 201
+    assert PRIMARY_PIN_COOKIE in response.headers["set-cookie"]
+    assert f"Max-Age={settings.replica_pin_seconds}" in response.headers["set-cookie"]
+
+  def test_read_and_failed_write_do_not_pin(self, client: TestClient, auth_headers: dict, replica):
+    """Test reads and rejected writes leave the client unpinned"""
+    response = client.get("/api/habits", headers=auth_headers)
+    assert PRIMARY_PIN_COOKIE not in response.headers.get("set-cookie", "")
+
+    response = client.post("/api/habits",
+                           json={"title": "Bad", "frequency": "yearly", "target": 1},
+                           headers=auth_headers)
+    assert response.status_code == 422
+    assert PRIMARY_PIN_COOKIE not in response.headers.get("set-cookie", "")
+
+  def test_no_pin_without_replica(self, client: TestClient, auth_headers: dict):
+    """Test writes do not set the pin cookie when no replica is configured"""
+    response = client.post("/api/habits",
+                           json={"title": "Unpinned", "frequency": "daily", "target": 1},
+                           headers=auth_headers)
+
+    assert response.status_code == 201
+    assert PRIMARY_PIN_COOKIE not in response.headers.get("set-cookie", "")
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.response_cache import ResponseCache
+from app.models.habit import Habit
+from app.routers import stats
+
+
+class FakeRedis:
+  """Dict-backed stand-in for the few Redis calls the cache makes"""
+
+  def __init__(self):
+    self.data: dict[str, bytes] = {}
+
+  def get(self, key):
+    return self.data.get(key)
+
+  def set(self, key, value, nx=False, px=None, ex=None):
+    if nx and key in self.data:
+      return False
+    self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+    return True
+
+  def delete(self, key):
+    self.data.pop(key, None)
+
+
+class TestResponseCache:
+  """Test the two-tier cache and its single-flight behaviour"""
+
+  def test_concurrent_misses_compute_once(self):
+    """Test threads missing the same key share one computation"""
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    def compute():
+      calls.append(1)
+      time.sleep(0.05)
+      return b"[]"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    assert results == [b"[]"] * 8
+    assert len(calls) == 1
+
+  def test_async_misses_compute_once(self):
+    """Test concurrent async misses await the first caller"""
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    async def compute():
+      calls.append(1)
+      await asyncio.sleep(0.01)
+      return b"{}"
+
+    async def run():
+      return await asyncio.gather(*(cache.aget_or_compute("k", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == [b"{}"] * 5
+    assert len(calls) == 1
+
+  def test_errors_are_not_cached(self):
+    """Test a failing computation is retried by the next request"""
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+
+    def fail():
+      raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+      cache.get_or_compute("k", fail)
+    assert cache.get_or_compute("k", lambda: b"ok") == b"ok"
+
+  def test_lru_bound(self):
+    """Test the local tier evicts least recently used entries"""
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set_local("a", b"1")
+    cache.set_local("b", b"2")
+    cache.get_local("a")
+    cache.set_local("c", b"3")
+    assert cache.get_local("b") is None
+    assert cache.get_local("a") == b"1"
+
+  def test_redis_tier_shared_between_workers(self, monkeypatch: pytest.MonkeyPatch):
+    """Test a second worker reads the first worker's result from Redis"""
+    redis = FakeRedis()
+    worker_a = ResponseCache(max_entries=10, ttl_seconds=60)
+    worker_b = ResponseCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(worker_a, "_redis_client", lambda: redis)
+    monkeypatch.setattr(worker_b, "_redis_client", lambda: redis)
+
+    assert worker_a.get_or_compute("k", lambda: b"computed") == b"computed"
+    assert worker_b.get_or_compute("k", lambda: pytest.fail("recomputed")) == b"computed"
+    assert "k:lock" not in redis.data
+
+  def test_waits_for_other_worker(self, monkeypatch: pytest.MonkeyPatch):
+    """Test a worker that loses the Redis lock polls for the winner's result"""
+    redis = FakeRedis()
+    redis.set("k:lock", 1)
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(cache, "_redis_client", lambda: redis)
+    threading.Timer(0.1, lambda: redis.set("k", b"from-other-worker")).start()
+
+    assert cache.get_or_compute("k", lambda: pytest.fail("recomputed")) == b"from-other-worker"
+
+
+class TestResponseCacheEndpoints:
+  """Test cached stats responses"""
+
+  def test_stats_served_from_cache_until_write(self, client: TestClient, auth_headers: dict, test_habit: Habit,
+                                                monkeypatch: pytest.MonkeyPatch):
+    """Test repeated reads compute once and a log write invalidates"""
+    calls = []
+    original = stats._today_habits_logs_stats
+
+    def counting(*args):
+      calls.append(1)
+      return original(*args)
+    monkeypatch.setattr(stats, "_today_habits_logs_stats", counting)
+
+    first = client.get("/api/stats/logs/today", headers=auth_headers)
+    second = client.get("/api/stats/logs/today", headers=auth_headers)
+    assert first.json() == second.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(calls) == 1
+
+    client.post(f"/api/logs/habits/{test_habit.id}/log", json={"quantity": 1}, headers=auth_headers)
+    response = client.get("/api/stats/logs/today", headers=auth_headers)
+    assert response.json()[0]["current_progress"] == 1
+    assert len(calls) == 2
+
+  def test_not_found_is_not_cached(self, client: TestClient, auth_headers: dict):
+    """Test errors from the endpoint pass through the cache"""
+    url = "/api/stats/00000000-0000-0000-0000-000000000000/stats/streak"
+    assert client.get(url, headers=auth_headers).status_code == 404
+    assert client.get(url, headers=auth_headers).status_code == 404
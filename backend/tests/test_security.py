@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.models.user import User
+
+
+class TestPasswordHashing:
+  """Test bcrypt hashing on the process pool"""
+
+  def test_hash_and_verify_on_pool(self):
+    """Test hashing round-trips through the worker processes"""
+    password_hash = security.hash_password("secret")
+
+    assert security._executor is not None
+    assert security.verify_password("secret", password_hash)
+    assert not security.verify_password("wrong", password_hash)
+
+  def test_hash_inline_when_pool_disabled(self, monkeypatch: pytest.MonkeyPatch):
+    """Test hashing runs inline with zero workers"""
+    monkeypatch.setattr(settings, "password_hash_workers", 0)
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+
+    assert security.hash_password("secret").startswith("$2b$04$")
+
+  def test_queue_depth_limit(self, monkeypatch: pytest.MonkeyPatch):
+    """Test requests beyond the pending limit are shed with a 503"""
+    security.shutdown_password_hasher()
+    monkeypatch.setattr(settings, "password_hash_max_pending", 1)
+    _, pending = security._get_executor()
+    pending.acquire()
+    try:
+      with pytest.raises(HTTPException) as exc_info:
+        security.hash_password("secret")
+      assert exc_info.value.status_code == 503
+    finally:
+      pending.release()
+      security.shutdown_password_hasher()
+
+  def test_login_upgrades_outdated_hash(self, client: TestClient, db_session: Session):
+    """Test login rehashes passwords stored with an older cost factor"""
+    user = User(email="legacy@example.com", name="Legacy",
+                password_hash=security._hash("legacypass", 4))
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/api/auth/login", json={
+        "email": "legacy@example.com", "password": "legacypass"})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert user.password_hash.startswith(f"$2b${settings.bcrypt_rounds}$")
+    assert security.verify_password("legacypass", user.password_hash)
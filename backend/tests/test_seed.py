@@ -0,0 +1,66 @@
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+import seed
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_log import HabitLog
+from app.models.user import User
+from app.services.completion_service import rebuild_habit_completions
+
+
+END_DATE = date(2025, 3, 31)
+
+
+def _generate(first: int, last: int, seed_value: int = 7) -> seed.SyntheticBatch:
+  batch = seed.SyntheticBatch()
+  for index in range(first, last):
+    seed.generate_user(batch, seed_value, index, 6, 120, END_DATE, "hash")
+  return batch
+
+
+class TestSyntheticSeed:
+  """Test the synthetic capacity-testing data generator"""
+
+  def test_deterministic_per_user(self):
+    """Test output depends only on the seed and user index, not on batching"""
+    whole = _generate(0, 4)
+    split = _generate(0, 2)
+    rest = _generate(2, 4)
+    assert whole.logs == split.logs + rest.logs
+    assert whole.completions == split.completions + rest.completions
+    assert _generate(0, 4, seed_value=8).logs != whole.logs
+
+  def test_distributions(self):
+    """Test logs stay within the window, one per habit and day, at mixed times of day"""
+    batch = _generate(0, 20)
+    assert len(batch.habits) == 120
+    assert {h[3] for h in batch.habits} >= {"daily", "weekly"}
+    assert len({(log[1], log[2]) for log in batch.logs}) == len(batch.logs)
+    assert all("2024-12-02" <= log[2] <= END_DATE.isoformat() for log in batch.logs)
+    hours = {int(log[4][11:13]) for log in batch.logs}
+    assert min(hours) < 9 and max(hours) >= 19
+
+  def test_written_rows_match_rebuild(self, db_session: Session):
+    """Test written rows load through the ORM and completions match a rebuild"""
+    batch = _generate(0, 3)
+    conn = db_session.connection()
+    seed.write_rows(conn, User.__tablename__, seed.USER_COLUMNS, batch.users, 100)
+    seed.write_rows(conn, Habit.__tablename__, seed.HABIT_COLUMNS, batch.habits, 100)
+    seed.write_rows(conn, HabitLog.__tablename__, seed.LOG_COLUMNS, batch.logs, 100)
+    seed.write_rows(conn, HabitCompletion.__tablename__, seed.COMPLETION_COLUMNS, batch.completions, 100)
+    db_session.commit()
+
+    assert db_session.query(User).filter(User.email == "synthetic-0@example.com").one().has_password
+    assert db_session.query(HabitLog).count() == len(batch.logs)
+
+    def completions():
+      return sorted((c.habit_id, c.date, c.is_completed, c.quantity_achieved)
+                    for c in db_session.query(HabitCompletion))
+
+    generated = completions()
+    db_session.query(HabitCompletion).delete()
+    rebuild_habit_completions(db_session, [habit.id for habit in db_session.query(Habit)])
+    db_session.commit()
+    assert completions() == generated
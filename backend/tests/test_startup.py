@@ -0,0 +1,21 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ["google.auth", "google.oauth2", "requests", "jose", "passlib", "redis"]
+
+
+class TestStartup:
+  """Test worker boot stays free of heavy optional imports"""
+
+  def test_boot_does_not_import_heavy_dependencies(self):
+    """Test importing the app leaves Google, requests, jose and passlib unloaded"""
+    script = (
+        "import sys, app.main\n"
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.lib.calendar import DATE_DIM_FIRST, period_starts
+from app.models.habit import Habit
+from app.models.habit_completion import HabitCompletion
+from app.models.habit_target_history import HabitTargetHistory
+from app.services.completion_backfill import backfill_range
+from app.services.completion_service import rebuild_habit_completions, set_habit_target
+
+
+def _history(db: Session, habit: Habit) -> list[tuple]:
+  return [(row.valid_from, row.valid_to, row.target) for row in db.query(HabitTargetHistory).filter(
+      HabitTargetHistory.habit_id == habit.id).order_by(HabitTargetHistory.valid_from)]
+
+
+def _completion(db: Session, habit: Habit, day: date) -> HabitCompletion:
+  return db.query(HabitCompletion).filter(HabitCompletion.habit_id == habit.id, HabitCompletion.date == day).one()
+
+
+class TestTargetHistory:
+  """Test effective-dated habit targets"""
+
+  def test_changes_append_ranges(self, db_session: Session, test_habit: Habit):
+    """Test each change closes the open range, and same-day changes overwrite it"""
+    today = date.today()
+    set_habit_target(db_session, test_habit, 3, today=today - timedelta(days=10))
+    set_habit_target(db_session, test_habit, 5, today=today)
+    set_habit_target(db_session, test_habit, 4, today=today)
+    db_session.commit()
+
+    assert test_habit.target == 4
+    assert _history(db_session, test_habit) == [
+        (DATE_DIM_FIRST, today - timedelta(days=11), 1),
+        (today - timedelta(days=10), today - timedelta(days=1), 3),
+        (today, None, 4),
+    ]
+
+  def test_change_cost_is_constant(self, db_session: Session, many_habits: list[Habit], query_budget):
+    """Test a target change does not touch past completion records"""
+    habit = many_habits[3]
+    past = sorted((c.date, c.target_at_time, c.is_completed) for c in db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == habit.id, HabitCompletion.date < date.today()))
+    with query_budget(10):
+      set_habit_target(db_session, habit, 50)
+    db_session.commit()
+
+    today = _completion(db_session, habit, date.today())
+    assert (today.target_at_time, today.is_completed) == (50, False)
+    assert sorted((c.date, c.target_at_time, c.is_completed) for c in db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == habit.id, HabitCompletion.date < date.today())) == past
+
+  def test_api_update(self, client: TestClient, auth_headers: dict, db_session: Session, test_habit: Habit):
+    """Test updating the target through the API re-evaluates today against it"""
+    response = client.post(f"/api/logs/habits/{test_habit.id}/log",
+                           json={"quantity": 1, "date": date.today().isoformat()}, headers=auth_headers)
+    assert response.status_code == 200
+    assert _completion(db_session, test_habit, date.today()).is_completed
+
+    response = client.put(f"/api/habits/{test_habit.id}", json={"target": 3}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["target"] == 3
+    db_session.expire_all()
+    completion = _completion(db_session, test_habit, date.today())
+    assert (completion.target_at_time, completion.is_completed) == (3, False)
+    assert _history(db_session, test_habit)[-1] == (date.today(), None, 3)
+
+  def test_rebuild_and_backfill_use_range_in_effect(self, db_session: Session, many_habits: list[Habit]):
+    """Test set-based rebuilds and backfills judge each day against its own target"""
+    habit = many_habits[0]
+    changed = date.today() - timedelta(days=10)
+    set_habit_target(db_session, habit, 50, today=changed)
+    db_session.commit()
+
+    rebuild_habit_completions(db_session, [habit.id])
+    db_session.commit()
+    expected = {c.date: (c.target_at_time, c.is_completed) for c in db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == habit.id)}
+    assert {target for day, (target, _) in expected.items() if day >= changed} == {50}
+    assert 50 not in {target for day, (target, _) in expected.items() if day < changed}
+
+    db_session.execute(delete(HabitCompletion).where(HabitCompletion.habit_id == habit.id))
+    backfill_range(db_session, None, None)
+    db_session.commit()
+    assert {c.date: (c.target_at_time, c.is_completed) for c in db_session.query(HabitCompletion).filter(
+        HabitCompletion.habit_id == habit.id)} == expected
+
+  def test_progress_shows_target_per_period(self, client: TestClient, auth_headers: dict, db_session: Session,
+                                            many_habits: list[Habit]):
+    """Test progress charts show the target in effect at the end of each period"""
+    habit = many_habits[1]
+    assert habit.frequency.value == "weekly"
+    old_target = habit.target
+    weeks = period_starts("weekly", 4)
+    set_habit_target(db_session, habit, 40, today=weeks[1] + timedelta(days=2))
+    db_session.commit()
+
+    data = client.get(f"/api/stats/{habit.id}/progress?periods=4", headers=auth_headers).json()
+    assert [period["date"] for period in data] == [week.isoformat() for week in weeks]
+    assert [period["target"] for period in data] == [40, 40, old_target, old_target]
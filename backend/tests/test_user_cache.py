@@ -0,0 +1,158 @@
+import uuid
+import pytest
+from datetime import datetime, UTC
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.user_cache import UserCache, user_cache
+from app.models.user import Provider, User
+
+
+def _user(name: str = "Cached") -> User:
+  return User(id=uuid.uuid4(), email=f"{name.lower()}@example.com", name=name,
+              provider=Provider.email, created_at=datetime.now(UTC), has_password=True)
+
+
+class FakeRedis:
+  """Dict-backed stand-in for the few Redis calls the cache makes"""
+
+  def __init__(self):
+    self.data: dict[str, bytes] = {}
+
+  def get(self, key):
+    return self.data.get(key)
+
+  def mget(self, *keys):
+    return [self.data.get(key) for key in keys]
+
+  def set(self, key, value, ex=None):
+    self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+
+  def incr(self, key):
+    self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+
+  def delete(self, key):
+    self.data.pop(key, None)
+
+
+class TestUserCache:
+  """Test the authenticated-user cache"""
+
+  def test_get_returns_detached_snapshot(self):
+    """Test cached users round-trip their profile fields"""
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    user = _user()
+    cache.set(user, cache.version(user.id))
+
+    cached = cache.get(user.id)
+    assert cached is not user
+    assert cached.id == user.id
+    assert cached.email == user.email
+    assert cached.provider == Provider.email
+    assert cached.created_at == user.created_at
+
+  def test_ttl_expiry(self):
+    """Test entries expire after the TTL"""
+    cache = UserCache(max_entries=10, ttl_seconds=0)
+    user = _user()
+    cache.set(user, cache.version(user.id))
+
+    assert cache.get(user.id) is None
+
+  def test_lru_eviction(self):
+    """Test the least recently used entry is evicted"""
+    cache = UserCache(max_entries=2, ttl_seconds=60)
+    first, second, third = _user("First"), _user("Second"), _user("Third")
+    cache.set(first, 0)
+    cache.set(second, 0)
+    cache.get(first.id)
+    cache.set(third, 0)
+
+    assert cache.get(first.id) is not None
+    assert cache.get(second.id) is None
+    assert cache.get(third.id) is not None
+
+  def test_stale_version_not_stored(self):
+    """Test a row read before an invalidation is not cached afterwards"""
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    user = _user()
+    version = cache.version(user.id)
+    cache.invalidate(user.id)
+    cache.set(user, version)
+
+    assert cache.get(user.id) is None
+
+  def test_invalidated_versions_are_bounded(self):
+    """Test invalidations are forgotten beyond max_entries without letting stale rows in"""
+    cache = UserCache(max_entries=2, ttl_seconds=60)
+    user = _user()
+    version = cache.version(user.id)
+    cache.invalidate(user.id)
+    for _ in range(3):
+      cache.invalidate(uuid.uuid4())
+    assert len(cache._invalidated) == 2
+
+    cache.set(user, version)
+    assert cache.get(user.id) is None
+    cache.set(user, cache.version(user.id))
+    assert cache.get(user.id) is not None
+
+  def test_invalidation_reaches_other_workers(self, monkeypatch: pytest.MonkeyPatch):
+    """Test an invalidation in one worker retires the local entry of another through Redis"""
+    redis = FakeRedis()
+    monkeypatch.setattr(settings, "user_cache_redis_enabled", True)
+    worker_a = UserCache(max_entries=10, ttl_seconds=60)
+    worker_b = UserCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(worker_a, "_redis_client", lambda: redis)
+    monkeypatch.setattr(worker_b, "_redis_client", lambda: redis)
+    user = _user()
+    worker_a.set(user, worker_a.version(user.id))
+    assert worker_b.get(user.id).name == "Cached"
+
+    worker_a.invalidate(user.id)
+    assert worker_b.get(user.id) is None
+    stale_version = 0
+    worker_b.set(user, stale_version)
+    assert worker_a.get(user.id) is None
+
+    user.name = "Renamed"
+    worker_a.set(user, worker_a.version(user.id))
+    assert worker_b.get(user.id).name == "Renamed"
+
+  def test_me_is_cached_until_profile_update(self, client: TestClient, auth_headers: dict, test_user: User, db_session: Session):
+    """Test /me serves the cached user and update-profile evicts it"""
+    assert client.get("/api/auth/me", headers=auth_headers).json()["user"]["name"] == "Test User"
+
+    # A change that bypasses the API is not visible while cached
+    test_user.name = "Changed Directly"
+    db_session.commit()
+    assert client.get("/api/auth/me", headers=auth_headers).json()["user"]["name"] == "Test User"
+
+    response = client.put("/api/auth/update-profile", json={"name": "Updated"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get("/api/auth/me", headers=auth_headers).json()["user"]["name"] == "Updated"
+
+  def test_password_change_evicts_user(self, client: TestClient, auth_headers: dict, test_user: User):
+    """Test change-password evicts the cached user"""
+    client.get("/api/auth/me", headers=auth_headers)
+    assert user_cache.get(test_user.id) is not None
+
+    response = client.post("/api/auth/change-password",
+                           json={"currentPassword": "testpassword123", "newPassword": "newpassword123"},
+                           headers=auth_headers)
+    assert response.status_code == 200
+    assert user_cache.get(test_user.id) is None
+
+  def test_claims_only_endpoints_skip_user_lookup(self, client: TestClient, auth_headers: dict, test_user: User, db_session: Session):
+    """Test id-only endpoints authenticate from the token alone"""
+    db_session.delete(test_user)
+    db_session.commit()
+
+    # Token is still valid; the habit list simply has nothing for this id
+    response = client.get("/api/habits", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = client.get("/api/auth/me", headers=auth_headers)
+    assert response.status_code == 401
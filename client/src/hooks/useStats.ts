@@ -14,7 +14,7 @@ interface HabitLog {
   habit_title: string;
   quantity: number;
   target: number;
-  logged_at: string;
+  logged_at: string | null;
 }
 
 interface DayLogs {